@@ -0,0 +1,100 @@
+"""Benchmark: per-feature vs batched drift checks (ml-monitor-svc).
+
+Compares, on the same baseline/recent samples:
+
+  - loop        : the previous detect_drift path — per feature, two
+                  np.histogram calls for PSI and one scipy ks_2samp
+  - vectorized  : the served path — set_baseline/set_recent build every
+                  feature's sketch in one stacked pass, and detect_drift
+                  computes KS and PSI for all features at once from the
+                  stacked sketch counts (app/monitor/batch.py)
+
+Half of the features get a small shift so the comparison also checks
+that both paths flag the same features.
+
+Run:
+    python benchmarks/drift_batch.py [--features 25] [--samples 1000000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "services", "ml-monitor-svc"))
+
+from app.monitor import drift  # noqa: E402
+
+
+def _calculate_psi(expected, actual, buckets=10):
+    # Previous monitor/drift.py implementation, kept here for reference
+    eps = 1e-6
+    breakpoints = np.linspace(min(expected.min(), actual.min()),
+                              max(expected.max(), actual.max()),
+                              buckets + 1)
+    expected_counts = np.histogram(expected, bins=breakpoints)[0] / len(expected) + eps
+    actual_counts = np.histogram(actual, bins=breakpoints)[0] / len(actual) + eps
+    return float(np.sum((actual_counts - expected_counts) * np.log(actual_counts / expected_counts)))
+
+
+def _loop(baseline, recent):
+    from scipy.stats import ks_2samp
+
+    out = {}
+    for name in baseline:
+        ks_stat, ks_p = ks_2samp(baseline[name], recent[name])
+        out[name] = {"ks_statistic": ks_stat, "ks_p_value": ks_p, "psi": _calculate_psi(baseline[name], recent[name])}
+    return out
+
+
+def _served(baseline, recent):
+    drift.set_baseline(baseline)
+    return drift.detect_drift(recent)["feature_reports"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--features", type=int, default=25)
+    parser.add_argument("--samples", type=int, default=1_000_000)
+    parser.add_argument("--rounds", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    baseline, recent = {}, {}
+    for j in range(args.features):
+        baseline[f"f{j}"] = rng.normal(0, 1, args.samples)
+        recent[f"f{j}"] = rng.normal(0.05 if j % 2 else 0.0, 1, args.samples)
+
+    results = {}
+    for kind, fn in (("loop", _loop), ("vectorized", _served)):
+        times = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            report = fn(baseline, recent)
+            times.append(time.perf_counter() - start)
+        results[kind] = (min(times), report)
+
+    loop_report, vec_report = results["loop"][1], results["vectorized"][1]
+    max_ks_diff = max(abs(loop_report[n]["ks_statistic"] - vec_report[n]["ks_statistic"]) for n in baseline)
+    same_flags = all(
+        (loop_report[n]["ks_p_value"] < 0.05) == (vec_report[n]["ks_p_value"] < 0.05) for n in baseline
+    )
+
+    print(f"{args.features} features x {args.samples:,} samples (baseline and recent)")
+    print(f"{'variant':<12}{'seconds':>10}{'speedup':>10}")
+    base = results["loop"][0]
+    for kind, (elapsed, _) in results.items():
+        print(f"{kind:<12}{elapsed:>10.2f}{base / elapsed:>9.1f}x")
+    print(f"max |KS diff| = {max_ks_diff:.2e} (sketch bins vs raw values), same KS drift flags: {same_flags}")
+
+    # The check itself, once the sketches exist (what /drift/check pays);
+    # most of it is scipy's kstwo.sf p-values, which both variants share
+    start = time.perf_counter()
+    drift.detect_drift()
+    print(f"detect_drift on existing sketches: {(time.perf_counter() - start) * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
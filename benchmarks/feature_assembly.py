@@ -0,0 +1,120 @@
+"""Benchmark: per-request feature assembly cost (risk-svc).
+
+Assembles the same scoring payloads into the (1, 25) float32 row the
+model reads, through:
+
+  - dict      : the previous path — assemble_features builds a 25-key
+                dict, which predict.py re-reads column by column into its
+                per-thread row buffer
+  - row       : assemble_row writes the values straight into a new
+                float32 vector (what /score does; the row outlives the
+                request for shadow scoring)
+  - row_reuse : assemble_row into one preallocated vector
+
+and reports per-request p50 / mean latency plus the peak bytes allocated
+per request (tracemalloc, including the returned object).
+The intel / origin fields are supplied, as the gateway does, so the
+sanctions lookups do not dominate.
+
+Run:
+    python benchmarks/feature_assembly.py [--calls 20000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "services", "risk-svc"))
+
+from app.features.assemble import FEATURE_COLUMNS, assemble_features, assemble_row  # noqa: E402
+from app.model.predict import _as_row  # noqa: E402
+
+
+def _payloads(n: int):
+    rng = np.random.default_rng(0)
+    return [
+        {
+            "blockchain_trust_score": float(rng.uniform(0, 100)),
+            "years_active": int(rng.integers(0, 30)),
+            "violation_count": int(rng.integers(0, 5)),
+            "aeo_tier": int(rng.integers(0, 4)),
+            "recent_clean_inspections": int(rng.integers(0, 20)),
+            "vision_anomaly_flag": bool(rng.random() < 0.2),
+            "vision_confidence": float(rng.random()),
+            "vision_detection_count": int(rng.integers(0, 4)),
+            "vision_class": str(rng.choice(["none", "weapon", "narcotic"])),
+            "cargo_hs_code": str(rng.choice(["8471.30.10", "7108.12.00", "6109.10.00"])),
+            "cargo_declared_value": float(rng.lognormal(12, 2)),
+            "cargo_weight": float(rng.uniform(100, 20000)),
+            "cargo_volume": float(rng.uniform(1, 60)),
+            "cargo_category": str(rng.choice(["electronics", "textiles", "metals"])),
+            "route_origin_risk_index": float(rng.uniform(0, 10)),
+            "route_transshipment_count": int(rng.integers(0, 3)),
+            "intel_ofac_match": False,
+            "intel_un_conflict_flag": False,
+            "intel_interpol_alert": False,
+        }
+        for _ in range(n)
+    ]
+
+
+def _latencies(fn, payloads, warmup: int = 500) -> np.ndarray:
+    for payload in payloads[:warmup]:
+        fn(payload)
+    out = np.empty(len(payloads))
+    for i, payload in enumerate(payloads):
+        start = time.perf_counter()
+        fn(payload)
+        out[i] = time.perf_counter() - start
+    return out
+
+
+def _peak_bytes(fn, payloads) -> float:
+    """Mean peak bytes allocated while assembling one request."""
+    fn(payloads[0])
+    tracemalloc.start()
+    total = 0
+    for payload in payloads:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        result = fn(payload)  # noqa: F841 (kept alive, as a caller would)
+        total += tracemalloc.get_traced_memory()[1] - base
+        del result
+    tracemalloc.stop()
+    return total / len(payloads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--alloc-calls", type=int, default=200, help="requests traced for allocations")
+    args = parser.parse_args()
+
+    payloads = _payloads(args.calls)
+    buffer = np.empty(len(FEATURE_COLUMNS), dtype=np.float32)
+    variants = {
+        "dict": lambda p: _as_row(assemble_features(p)),
+        "row": lambda p: _as_row(assemble_row(p)),
+        "row_reuse": lambda p: _as_row(assemble_row(p, out=buffer)),
+    }
+    reference = [variants["dict"](p).copy() for p in payloads[:200]]
+    for name in ("row", "row_reuse"):
+        assert all(np.array_equal(variants[name](p), ref) for p, ref in zip(payloads, reference)), name
+
+    print(f"{args.calls:,} payloads -> (1, {len(FEATURE_COLUMNS)}) float32 rows")
+    print(f"{'variant':<12}{'p50 us':>10}{'mean us':>10}{'peak B':>10}")
+    p50 = {}
+    for name, fn in variants.items():
+        lat = _latencies(fn, payloads) * 1e6
+        peak = _peak_bytes(fn, payloads[: args.alloc_calls])
+        p50[name] = np.percentile(lat, 50)
+        print(f"{name:<12}{p50[name]:>10.2f}{lat.mean():>10.2f}{peak:>10.0f}")
+    print(f"p50 speedup row {p50['dict'] / p50['row']:.2f}x, row_reuse {p50['dict'] / p50['row_reuse']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
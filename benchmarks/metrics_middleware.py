@@ -0,0 +1,115 @@
+"""Micro-benchmark: per-request overhead of the shared metrics middleware.
+
+Drives a minimal Starlette app directly through ASGI (no sockets, no HTTP
+client) so the measured difference is the middleware itself. Compares:
+
+  - bare        : no metrics
+  - histogram   : services/shared/metrics.py MetricsMiddleware
+  - basehttp    : the previous @app.middleware("http") implementation
+                  (BaseHTTPMiddleware + global counters), for reference
+
+Run:
+    python benchmarks/metrics_middleware.py [--requests 20000]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "services", "shared"))
+
+from starlette.applications import Starlette  # noqa: E402
+from starlette.responses import PlainTextResponse  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+import metrics  # noqa: E402
+
+
+async def _score(request):
+    return PlainTextResponse("ok")
+
+
+def _build_app(kind: str) -> Starlette:
+    app = Starlette(routes=[Route("/score/{item_id}", _score, methods=["GET"])])
+    if kind == "histogram":
+        metrics.setup_metrics(app, service_name="bench")
+    elif kind == "basehttp":
+        counters = {"total": 0, "latency_sum": 0.0}
+
+        @app.middleware("http")
+        async def legacy(request, call_next):
+            counters["total"] += 1
+            start = time.time()
+            try:
+                return await call_next(request)
+            finally:
+                counters["latency_sum"] += time.time() - start
+    return app
+
+
+async def _drive(app, n: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/score/42",
+        "raw_path": b"/score/42",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "server": ("bench", 80),
+        "client": ("127.0.0.1", 1234),
+    }
+
+    never = asyncio.Event()
+
+    def make_receive():
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await never.wait()  # client stays connected until the response ends
+
+        return receive
+
+    async def send(message):
+        pass
+
+    # Warm-up (builds the middleware stack and route lookup tables)
+    for _ in range(200):
+        await app(dict(scope), make_receive(), send)
+
+    start = time.perf_counter()
+    for _ in range(n):
+        await app(dict(scope), make_receive(), send)
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    for kind in ("bare", "histogram", "basehttp"):
+        app = _build_app(kind)
+        samples = [asyncio.run(_drive(app, args.requests)) for _ in range(args.rounds)]
+        results[kind] = statistics.median(samples)
+
+    bare = results["bare"]
+    print(f"{'variant':<12}{'us/request':>12}{'overhead us':>14}")
+    for kind, per_req in results.items():
+        print(f"{kind:<12}{per_req * 1e6:>12.2f}{(per_req - bare) * 1e6:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
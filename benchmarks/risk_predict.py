@@ -0,0 +1,96 @@
+"""Benchmark: single-row risk scoring latency (risk-svc).
+
+Scores the same rows one at a time through:
+
+  - wrapper  : the previous path — build a (1, 25) array and call
+               XGBClassifier.predict_proba (input validation + DMatrix)
+  - inplace  : app/model/predict.py predict_proba_inplace — the row is
+               written into a preallocated float32 buffer and passed to
+               Booster.inplace_predict with PREDICT_THREADS threads
+
+and reports per-call p50 / p99 / mean latency. Uses a model trained on
+synthetic data with the production hyperparameters unless --model
+points at a saved one.
+
+Run:
+    python benchmarks/risk_predict.py [--calls 5000] [--model path.json]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "services", "risk-svc"))
+
+from app.model.predict import FEATURE_COLUMNS, load_model, predict_proba_inplace  # noqa: E402
+
+
+def _synthetic_model(samples: int):
+    import xgboost as xgb
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(samples, len(FEATURE_COLUMNS))).astype(np.float32)
+    y = (X[:, 0] + X[:, 5] > 0).astype(int) + (X[:, 9] > 1).astype(int)
+    model = xgb.XGBClassifier(
+        n_estimators=300, max_depth=6, learning_rate=0.1, subsample=0.8,
+        colsample_bytree=0.8, min_child_weight=3, objective="multi:softprob", num_class=3,
+    )
+    model.fit(X, y)
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".risk_predict_model.json")
+    model.save_model(path)
+    try:
+        return load_model(path)  # loaded the way risk-svc loads it
+    finally:
+        os.remove(path)
+
+
+def _latencies(fn, rows, warmup: int = 200) -> np.ndarray:
+    for features in rows[:warmup]:
+        fn(features)
+    out = np.empty(len(rows))
+    for i, features in enumerate(rows):
+        start = time.perf_counter()
+        fn(features)
+        out[i] = time.perf_counter() - start
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--samples", type=int, default=6000, help="synthetic training rows")
+    parser.add_argument("--model", default=None, help="saved XGBoost model to load instead")
+    args = parser.parse_args()
+
+    model = load_model(args.model) if args.model else _synthetic_model(args.samples)
+    if model is None:
+        sys.exit(f"Cannot load model from {args.model}")
+
+    rng = np.random.default_rng(1)
+    rows = [dict(zip(FEATURE_COLUMNS, r.tolist())) for r in rng.normal(size=(args.calls, len(FEATURE_COLUMNS)))]
+
+    def wrapper(features):
+        vector = np.array([[features.get(col, 0.0) for col in FEATURE_COLUMNS]], dtype=np.float32)
+        return model.predict_proba(vector)[0]
+
+    def inplace(features):
+        return predict_proba_inplace(model, features)
+
+    max_diff = max(float(np.abs(wrapper(r) - inplace(r)).max()) for r in rows[:200])
+
+    print(f"{args.calls:,} single-row predictions, {model.get_booster().num_boosted_rounds()} rounds x 3 classes")
+    print(f"{'variant':<10}{'p50 us':>10}{'p99 us':>10}{'mean us':>10}")
+    results = {}
+    for name, fn in (("wrapper", wrapper), ("inplace", inplace)):
+        lat = _latencies(fn, rows) * 1e6
+        results[name] = lat
+        print(f"{name:<10}{np.percentile(lat, 50):>10.1f}{np.percentile(lat, 99):>10.1f}{lat.mean():>10.1f}")
+    speedup = np.percentile(results["wrapper"], 50) / np.percentile(results["inplace"], 50)
+    print(f"p50 speedup {speedup:.2f}x, max |prob diff| = {max_diff:.1e}")
+
+
+if __name__ == "__main__":
+    main()
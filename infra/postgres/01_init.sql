@@ -1,7 +1,10 @@
 CREATE EXTENSION IF NOT EXISTS pgcrypto;
 
+-- clearance_decisions is range-partitioned on created_at so the hot
+-- dashboard queries (today's rows) only touch the newest partition and
+-- old data can be retired by detaching whole partitions.
 CREATE TABLE clearance_decisions (
-    id                  UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    id                  UUID         NOT NULL DEFAULT gen_random_uuid(),
     container_id        VARCHAR(30)  NOT NULL,
     importer_gstin      VARCHAR(20)  NOT NULL,
     risk_score          FLOAT        NOT NULL,
@@ -12,12 +15,112 @@ CREATE TABLE clearance_decisions (
     heatmap_s3_url      TEXT,
     officer_override    BOOLEAN      DEFAULT FALSE,
     override_reason     TEXT,
-    created_at          TIMESTAMPTZ  DEFAULT NOW(),
-    audit_hash          VARCHAR(64)
-);
+    created_at          TIMESTAMPTZ  NOT NULL DEFAULT NOW(),
+    audit_hash          VARCHAR(64),
+    -- The partition key must be part of the primary key; lane is carried
+    -- in the index so the override lookup (SELECT id, lane ... WHERE id)
+    -- is an index-only scan.
+    PRIMARY KEY (id, created_at) INCLUDE (lane)
+) PARTITION BY RANGE (created_at);
+
+-- Catch-all for rows outside any pre-created range (backfills, clock skew)
+CREATE TABLE clearance_decisions_default PARTITION OF clearance_decisions DEFAULT;
 
 CREATE INDEX idx_clearance_importer ON clearance_decisions(importer_gstin);
-CREATE INDEX idx_clearance_created  ON clearance_decisions(created_at DESC);
+
+-- Dashboard: today's totals / lane counts / avg risk and the "recent 20"
+-- list are all answered from this index without touching the heap.
+CREATE INDEX idx_clearance_created ON clearance_decisions(created_at DESC)
+    INCLUDE (id, container_id, importer_gstin, risk_score, lane, vision_anomaly, officer_override);
+
+-- Lane-filtered dashboard / analytics queries
+CREATE INDEX idx_clearance_lane_created ON clearance_decisions(lane, created_at DESC)
+    INCLUDE (risk_score);
+
+
+-- ─── Partition maintenance ──────────────────────────────────────────
+--
+-- create_clearance_partitions('month' | 'day', ahead) creates the
+-- partition holding NOW() plus `ahead` further partitions. Existing
+-- partitions are left untouched, so it is safe to call repeatedly
+-- (api-gateway runs it on startup and on a timer).
+
+CREATE OR REPLACE FUNCTION create_clearance_partitions(
+    p_interval TEXT DEFAULT 'month',
+    p_ahead    INTEGER DEFAULT 3
+) RETURNS INTEGER AS $$
+DECLARE
+    v_step    INTERVAL;
+    v_fmt     TEXT;
+    v_start   TIMESTAMPTZ;
+    v_end     TIMESTAMPTZ;
+    v_name    TEXT;
+    v_created INTEGER := 0;
+BEGIN
+    IF p_interval = 'month' THEN
+        v_step := INTERVAL '1 month';
+        v_fmt  := 'YYYY_MM';
+    ELSIF p_interval = 'day' THEN
+        v_step := INTERVAL '1 day';
+        v_fmt  := 'YYYY_MM_DD';
+    ELSE
+        RAISE EXCEPTION 'Unsupported partition interval: %', p_interval;
+    END IF;
+
+    v_start := date_trunc(p_interval, NOW());
+
+    FOR i IN 0..p_ahead LOOP
+        v_end  := v_start + v_step;
+        v_name := 'clearance_decisions_p' || to_char(v_start, v_fmt);
+
+        IF to_regclass(v_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF clearance_decisions FOR VALUES FROM (%L) TO (%L)',
+                v_name, v_start, v_end
+            );
+            v_created := v_created + 1;
+        END IF;
+
+        v_start := v_end;
+    END LOOP;
+
+    RETURN v_created;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- detach_expired_clearance_partitions(retain) detaches every range
+-- partition whose upper bound is older than NOW() - retain. Detached
+-- tables are kept as standalone tables for archival / pg_dump and can be
+-- dropped separately; no rows are deleted from the live table.
+
+CREATE OR REPLACE FUNCTION detach_expired_clearance_partitions(
+    p_retain INTERVAL DEFAULT INTERVAL '24 months'
+) RETURNS SETOF TEXT AS $$
+DECLARE
+    v_part  RECORD;
+    v_upper TIMESTAMPTZ;
+BEGIN
+    FOR v_part IN
+        SELECT c.oid::regclass::text AS name,
+               pg_get_expr(c.relpartbound, c.oid) AS bound
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'clearance_decisions'::regclass
+    LOOP
+        CONTINUE WHEN v_part.bound = 'DEFAULT';
+
+        v_upper := substring(v_part.bound FROM 'TO \(''([^'']+)''\)')::timestamptz;
+        IF v_upper <= NOW() - p_retain THEN
+            EXECUTE format('ALTER TABLE clearance_decisions DETACH PARTITION %s', v_part.name);
+            RETURN NEXT v_part.name;
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT create_clearance_partitions('month', 3);
+
 
 CREATE TABLE tariff_risk_weights (
     hs_code           VARCHAR(12)  PRIMARY KEY,
@@ -28,21 +131,28 @@ CREATE TABLE tariff_risk_weights (
     last_synced_at    TIMESTAMPTZ
 );
 
+-- clearance_id is not a foreign key: a FK into a partitioned table would
+-- need (id, created_at) and would block detaching expired partitions.
 CREATE TABLE ml_training_queue (
     id              UUID      PRIMARY KEY DEFAULT gen_random_uuid(),
-    clearance_id    UUID      REFERENCES clearance_decisions(id),
+    clearance_id    UUID,
     label_correct   BOOLEAN,
     officer_label   VARCHAR(20),
     flagged_at      TIMESTAMPTZ     DEFAULT NOW(),
     trained         BOOLEAN         DEFAULT FALSE
 );
 
+CREATE INDEX idx_training_queue_clearance ON ml_training_queue(clearance_id);
+
 CREATE TABLE officer_overrides (
     id              UUID      PRIMARY KEY DEFAULT gen_random_uuid(),
-    clearance_id    UUID      REFERENCES clearance_decisions(id),
+    clearance_id    UUID,
     officer_id      VARCHAR(30) NOT NULL,
     original_lane   VARCHAR(10),
     override_lane   VARCHAR(10),
     reason          TEXT,
     created_at      TIMESTAMPTZ DEFAULT NOW()
 );
+
+CREATE INDEX idx_overrides_clearance ON officer_overrides(clearance_id);
+CREATE INDEX idx_overrides_created   ON officer_overrides(created_at DESC);
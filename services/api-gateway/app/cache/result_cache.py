@@ -0,0 +1,157 @@
+"""Read-through cache for clearance decisions.
+
+Client systems poll GET /clearance/{id}/result until the decision
+appears, so the orchestrator writes the decision into this cache as soon
+as it is stored and the result endpoint only falls back to PostgreSQL on
+a miss. Entries are invalidated whenever the stored decision changes
+(officer override, store_clearance).
+
+Backends:
+  - memory (default): per-process LRU with TTL
+  - redis: shared across gateway replicas (RESULT_CACHE_BACKEND=redis)
+"""
+
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RESULT_CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "memory")  # 'memory' | 'redis'
+RESULT_CACHE_TTL_SEC = int(os.getenv("RESULT_CACHE_TTL_SEC", "300"))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "10000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+
+_KEY_PREFIX = "scannr:clearance:result:"
+
+
+class ResultCache:
+    """Clearance decision cache with hit/miss accounting."""
+
+    def __init__(
+        self,
+        ttl_sec: int = RESULT_CACHE_TTL_SEC,
+        max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+        redis_url: Optional[str] = None,
+        key_prefix: str = _KEY_PREFIX,
+        metric_prefix: Optional[str] = "clearance_result_cache",
+    ):
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self.key_prefix = key_prefix
+        self.metric_prefix = metric_prefix
+        self._local: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._redis = None
+        if redis_url:
+            try:
+                import redis.asyncio as aioredis
+
+                self._redis = aioredis.from_url(redis_url)
+            except Exception as e:
+                logger.warning(f"Redis result cache unavailable, using memory: {e}")
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self) -> str:
+        return "redis" if self._redis is not None else "memory"
+
+    async def get(self, clearance_id: str) -> Optional[Dict[str, Any]]:
+        """Return the cached decision, or None on a miss."""
+        value = None
+        if self._redis is not None:
+            try:
+                raw = await self._redis.get(self.key_prefix + clearance_id)
+                value = json.loads(raw) if raw else None
+            except Exception as e:
+                logger.warning(f"Redis result cache get failed: {e}")
+        else:
+            entry = self._local.get(clearance_id)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at < time.monotonic():
+                    del self._local[clearance_id]
+                    value = None
+                else:
+                    self._local.move_to_end(clearance_id)
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        if self.metric_prefix:
+            _export_metrics(self)
+        return value
+
+    async def set(self, clearance_id: str, decision: Dict[str, Any]) -> None:
+        """Cache a decision under its clearance id."""
+        if self._redis is not None:
+            try:
+                await self._redis.set(
+                    self.key_prefix + clearance_id, json.dumps(decision), ex=self.ttl_sec
+                )
+            except Exception as e:
+                logger.warning(f"Redis result cache set failed: {e}")
+            return
+
+        self._local[clearance_id] = (time.monotonic() + self.ttl_sec, decision)
+        self._local.move_to_end(clearance_id)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def invalidate(self, clearance_id: str) -> None:
+        """Drop a cached decision after it has been modified."""
+        if self._redis is not None:
+            try:
+                await self._redis.delete(self.key_prefix + clearance_id)
+            except Exception as e:
+                logger.warning(f"Redis result cache invalidate failed: {e}")
+            return
+        self._local.pop(clearance_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "local_entries": len(self._local),
+        }
+
+
+_set_gauge = None
+_set_gauge_resolved = False
+
+
+def _export_metrics(cache: ResultCache) -> None:
+    """Publish hit/miss gauges through shared/metrics.py when it is loaded."""
+    global _set_gauge, _set_gauge_resolved
+    if not _set_gauge_resolved:
+        try:
+            from metrics import set_gauge as _set_gauge
+        except ImportError:
+            _set_gauge = None
+        _set_gauge_resolved = True
+    if _set_gauge is None:
+        return
+    lookups = cache.hits + cache.misses
+    prefix = cache.metric_prefix
+    _set_gauge(f"{prefix}_hits", cache.hits)
+    _set_gauge(f"{prefix}_misses", cache.misses)
+    _set_gauge(f"{prefix}_hit_ratio", round(cache.hits / lookups, 4) if lookups else 0.0)
+
+
+_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> ResultCache:
+    """Get or create the process-wide result cache."""
+    global _cache
+    if _cache is None:
+        redis_url = REDIS_URL if RESULT_CACHE_BACKEND == "redis" else None
+        _cache = ResultCache(redis_url=redis_url)
+    return _cache
@@ -0,0 +1,74 @@
+"""Partition maintenance for the clearance_decisions table.
+
+clearance_decisions is range-partitioned on created_at (see
+infra/postgres/01_init.sql). This module keeps future partitions created
+ahead of time and detaches partitions that fall outside the retention
+window, using the SQL helpers defined alongside the schema.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Optional
+
+from app.db.connection import get_db_pool
+
+logger = logging.getLogger(__name__)
+
+PARTITION_INTERVAL = os.getenv("CLEARANCE_PARTITION_INTERVAL", "month")  # 'month' | 'day'
+PARTITIONS_AHEAD = int(os.getenv("CLEARANCE_PARTITIONS_AHEAD", "3"))
+RETENTION_MONTHS = int(os.getenv("CLEARANCE_RETENTION_MONTHS", "24"))
+MAINTENANCE_INTERVAL_HOURS = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL_HOURS", "6"))
+
+_maintenance_task: Optional[asyncio.Task] = None
+
+
+async def run_partition_maintenance() -> Dict[str, Any]:
+    """Create upcoming partitions and detach expired ones.
+
+    Returns:
+        Dict with the number of partitions created and the names of the
+        partitions detached in this run.
+    """
+    pool = await get_db_pool()
+    async with pool.acquire() as conn:
+        created = await conn.fetchval(
+            "SELECT create_clearance_partitions($1, $2)",
+            PARTITION_INTERVAL,
+            PARTITIONS_AHEAD,
+        )
+        detached = await conn.fetch(
+            "SELECT * FROM detach_expired_clearance_partitions(make_interval(months => $1))",
+            RETENTION_MONTHS,
+        )
+
+    detached_names = [r[0] for r in detached]
+    if created or detached_names:
+        logger.info(
+            f"Partition maintenance: created={created}, detached={detached_names}"
+        )
+    return {"created": created or 0, "detached": detached_names}
+
+
+async def _maintenance_loop():
+    while True:
+        try:
+            await run_partition_maintenance()
+        except Exception as e:
+            logger.warning(f"Partition maintenance failed (non-fatal): {e}")
+        await asyncio.sleep(MAINTENANCE_INTERVAL_HOURS * 3600)
+
+
+def start_partition_maintenance() -> None:
+    """Start the periodic maintenance loop (idempotent)."""
+    global _maintenance_task
+    if _maintenance_task is None or _maintenance_task.done():
+        _maintenance_task = asyncio.get_running_loop().create_task(_maintenance_loop())
+
+
+def stop_partition_maintenance() -> None:
+    """Cancel the periodic maintenance loop."""
+    global _maintenance_task
+    if _maintenance_task is not None:
+        _maintenance_task.cancel()
+        _maintenance_task = None
@@ -1,5 +1,6 @@
 import asyncio
 import json
+import logging
 import os
 
 from starlette.applications import Starlette
@@ -11,13 +12,22 @@ from starlette.websockets import WebSocket
 import httpx
 
 from app.orchestrator.clearance import initiate_clearance
+from app.orchestrator.jobs import (
+    CLEARANCE_MODE,
+    ESTIMATED_COMPLETION_SEC,
+    QueueFullError,
+    QueueUnavailableError,
+    get_job_queue,
+    is_valid_callback_url,
+)
 from app.orchestrator.override import officer_override
 from app.orchestrator.result import clearance_result
 from app.middleware.auth import check_jwt
 from app.bridge.gstn import GSTNIntegration
 from app.bridge.icegate import ICEGATEBridge
 from app.bridge.mha import MHASanctionsFeed
-from app.db.connection import get_db_pool
+from app.db.connection import get_db_pool, close_db_pool
+from app.db.partitions import start_partition_maintenance, stop_partition_maintenance
 
 # Metrics — lightweight, zero-dependency Prometheus exporter
 import sys, os
@@ -30,6 +40,8 @@ except ImportError:
 
 IDENTITY_SVC_URL = os.getenv("IDENTITY_SVC_URL", "http://identity-svc:8000")
 
+logger = logging.getLogger(__name__)
+
 
 # ─── Health ───────────────────────────────────────────────────────────
 
@@ -48,13 +60,54 @@ def _auth(request: Request) -> dict:
 # ─── Clearance endpoints ─────────────────────────────────────────────
 
 async def clearance_initiate(request: Request):
+    """POST /clearance/initiate — enqueue a clearance job (or run inline).
+
+    In async mode (default) the response returns immediately with a job id;
+    poll GET /clearance/jobs/{job_id} or pass ``callback_url`` to be
+    notified. ``"mode": "sync"`` in the payload (or CLEARANCE_MODE=sync)
+    runs the full pipeline inside the request.
+    """
     try:
         _auth(request)
     except Exception:
         return JSONResponse({"error": "Unauthorized"}, status_code=401)
     payload = await request.json()
-    result = await initiate_clearance(payload)
-    return JSONResponse(result)
+
+    if payload.pop("mode", CLEARANCE_MODE) == "sync":
+        result = await initiate_clearance(payload)
+        return JSONResponse(result)
+
+    callback_url = payload.pop("callback_url", None)
+    if callback_url is not None and not await is_valid_callback_url(callback_url):
+        return JSONResponse(
+            {"error": "callback_url must be an http(s) URL on a public or allowlisted host"},
+            status_code=400,
+        )
+
+    try:
+        job = await get_job_queue().enqueue(payload, callback_url=callback_url)
+    except (QueueFullError, QueueUnavailableError) as e:
+        return JSONResponse({"error": str(e)}, status_code=503)
+
+    return JSONResponse({
+        "clearance_id": job["clearance_id"],
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "estimated_completion_sec": ESTIMATED_COMPLETION_SEC,
+        "status_url": f"/clearance/jobs/{job['job_id']}",
+    })
+
+
+async def clearance_job_status(request: Request):
+    """GET /clearance/jobs/{job_id} — poll an asynchronous clearance job."""
+    try:
+        _auth(request)
+    except Exception:
+        return JSONResponse({"error": "Unauthorized"}, status_code=401)
+    job = await get_job_queue().get_job(request.path_params["job_id"])
+    if job is None:
+        return JSONResponse({"error": "Job not found"}, status_code=404)
+    return JSONResponse(job)
 
 
 async def clearance_result_handler(request: Request):
@@ -95,24 +148,20 @@ async def _compute_stats() -> dict:
     try:
         pool = await get_db_pool()
         async with pool.acquire() as conn:
-            total = await conn.fetchval(
-                "SELECT COUNT(*) FROM clearance_decisions WHERE created_at >= CURRENT_DATE"
-            )
-            green = await conn.fetchval(
-                "SELECT COUNT(*) FROM clearance_decisions WHERE lane = 'GREEN' AND created_at >= CURRENT_DATE"
-            )
-            yellow = await conn.fetchval(
-                "SELECT COUNT(*) FROM clearance_decisions WHERE lane = 'YELLOW' AND created_at >= CURRENT_DATE"
-            )
-            red = await conn.fetchval(
-                "SELECT COUNT(*) FROM clearance_decisions WHERE lane = 'RED' AND created_at >= CURRENT_DATE"
+            # Single pass over today's partition via the covering
+            # idx_clearance_created index (no heap access).
+            today = await conn.fetchrow(
+                """SELECT COUNT(*)                                   AS total,
+                          COUNT(*) FILTER (WHERE lane = 'GREEN')     AS green,
+                          COUNT(*) FILTER (WHERE lane = 'YELLOW')    AS yellow,
+                          COUNT(*) FILTER (WHERE lane = 'RED')       AS red,
+                          COALESCE(AVG(risk_score), 0)               AS avg_risk
+                   FROM clearance_decisions
+                   WHERE created_at >= CURRENT_DATE"""
             )
             overrides = await conn.fetchval(
                 "SELECT COUNT(*) FROM officer_overrides WHERE created_at >= CURRENT_DATE"
             )
-            avg_risk = await conn.fetchval(
-                "SELECT COALESCE(AVG(risk_score), 0) FROM clearance_decisions WHERE created_at >= CURRENT_DATE"
-            )
             recent = await conn.fetch(
                 """SELECT id, container_id, importer_gstin, risk_score, lane,
                           vision_anomaly, officer_override, created_at
@@ -133,12 +182,12 @@ async def _compute_stats() -> dict:
         }
 
     return {
-        "total_scanned_today": total or 0,
-        "green_lane": green or 0,
-        "yellow_lane": yellow or 0,
-        "red_lane": red or 0,
+        "total_scanned_today": today["total"] or 0,
+        "green_lane": today["green"] or 0,
+        "yellow_lane": today["yellow"] or 0,
+        "red_lane": today["red"] or 0,
         "officer_overrides_today": overrides or 0,
-        "avg_risk_score": round(float(avg_risk or 0), 2),
+        "avg_risk_score": round(float(today["avg_risk"] or 0), 2),
         "recent_clearances": [
             {
                 "clearance_id": str(r["id"]),
@@ -294,12 +343,31 @@ async def ws_stats(websocket: WebSocket):
         _ws_clients.discard(websocket)
 
 
+# ─── Lifecycle ───────────────────────────────────────────────────────
+
+async def on_startup():
+    """Start clearance job workers and partition maintenance."""
+    start_partition_maintenance()
+    queue = get_job_queue()  # a misconfigured broker/store fails startup
+    try:
+        await queue.start()
+    except Exception as e:
+        logger.warning(f"Clearance job queue failed to start: {e}")
+
+
+async def on_shutdown():
+    stop_partition_maintenance()
+    await get_job_queue().stop()
+    await close_db_pool()
+
+
 # ─── Application ─────────────────────────────────────────────────────
 
 _routes = [
     # Core
     Route("/health", health, methods=["GET"]),
     Route("/clearance/initiate", clearance_initiate, methods=["POST"]),
+    Route("/clearance/jobs/{job_id}", clearance_job_status, methods=["GET"]),
     Route("/clearance/{clearance_id}/result", clearance_result_handler, methods=["GET"]),
     Route("/officer/override", officer_override_handler, methods=["POST"]),
     # Dashboard
@@ -319,7 +387,11 @@ _routes = [
 if _HAS_METRICS:
     _routes.append(get_metrics_route())
 
-app = Starlette(routes=_routes)
+app = Starlette(
+    routes=_routes,
+    on_startup=[on_startup],
+    on_shutdown=[on_shutdown],
+)
 
 # Register metrics middleware
 if _HAS_METRICS:
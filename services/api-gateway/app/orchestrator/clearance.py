@@ -2,12 +2,32 @@ import uuid
 import hashlib
 import json
 from datetime import datetime, timezone
+from typing import Optional
 import httpx
 import os
+import sys
 
 from app.bridge.gstn import GSTNIntegration
 from app.bridge.icegate import ICEGATEBridge
 from app.bridge.mha import MHASanctionsFeed
+from app.cache.result_cache import get_result_cache
+from app.orchestrator.result import decision_from_row
+
+# Stage timing — shared/tracing.py, optional like the metrics exporter
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'shared'))
+try:
+    from tracing import finish_trace, span, start_trace, trace_headers
+except ImportError:
+    from contextlib import nullcontext as span
+
+    def start_trace(trace_id=None, service=""):
+        return None
+
+    def finish_trace(trace, **fields):
+        return {}
+
+    def trace_headers():
+        return {}
 
 # Service URLs from environment
 VISION_SVC_URL = os.getenv("VISION_SVC_URL", "http://vision-svc:8000")
@@ -20,7 +40,7 @@ _icegate = ICEGATEBridge()
 _mha = MHASanctionsFeed()
 
 
-async def initiate_clearance(payload: dict):
+async def run_clearance(payload: dict, clearance_id: Optional[str] = None) -> dict:
     """Orchestrate the full clearance workflow across all three pillars.
     
     Integrates:
@@ -30,22 +50,34 @@ async def initiate_clearance(payload: dict):
     - identity-svc blockchain trust profile
     - vision-svc X-ray analysis
     - risk-svc scoring with all 25+ features
+
+    Each step is timed as a stage (gstn, icegate, sanctions, identity,
+    vision, risk, store) under a trace whose id is the clearance id and
+    which is forwarded to vision-svc and risk-svc in X-Trace-Id.
+
+    Returns:
+        The complete decision (status COMPLETED), including ``result_id``
+        for GET /clearance/{id}/result, or an ERROR dict.
     """
     start_time = datetime.now(timezone.utc)
-    clearance_id = f"CLR-{start_time.strftime('%Y%m%d')}-{uuid.uuid4().hex[:8]}"
+    clearance_id = clearance_id or new_clearance_id(start_time)
     container_id = payload.get("container_id")
     importer_gstin = payload.get("importer_gstin")
     xray_scan_id = payload.get("xray_scan_id")
+    trace = start_trace(clearance_id, "api-gateway")
+    outcome = {"status": "ERROR"}
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with httpx.AsyncClient(timeout=30.0, headers=trace_headers()) as client:
             # ── Step 0a: GSTN Validation ─────────────────────────────
-            gstn_result = await _gstn.validate_gstin(importer_gstin)
+            with span("gstn"):
+                gstn_result = await _gstn.validate_gstin(importer_gstin)
             gstn_valid = gstn_result.get("valid", True)
 
             # ── Step 0b: ICEGATE Manifest Enrichment ─────────────────
             bill_no = payload.get("bill_no", container_id or "0000")
-            manifest_data = await _icegate.fetch_manifest(bill_no, str(start_time.year))
+            with span("icegate"):
+                manifest_data = await _icegate.fetch_manifest(bill_no, str(start_time.year))
             # Merge manifest data into payload (prefer explicit payload values)
             enriched = {**manifest_data, **{k: v for k, v in payload.items() if v}}
 
@@ -53,8 +85,9 @@ async def initiate_clearance(payload: dict):
             importer_name = gstn_result.get("legal_name", importer_gstin)
             origin_country = enriched.get("origin_country", payload.get("origin_country", ""))
 
-            sanctions_name = await _mha.check_entity("name", importer_name)
-            sanctions_country = await _mha.check_entity("country", origin_country) if origin_country else {"match": False}
+            with span("sanctions"):
+                sanctions_name = await _mha.check_entity("name", importer_name)
+                sanctions_country = await _mha.check_entity("country", origin_country) if origin_country else {"match": False}
 
             ofac_match = sanctions_name.get("match", False) or sanctions_country.get("match", False)
             un_conflict = sanctions_country.get("match", False)
@@ -62,10 +95,12 @@ async def initiate_clearance(payload: dict):
             # Seasonal smuggling index
             hs_code = enriched.get("hs_code", payload.get("hs_code", "0000.00"))
             month = start_time.month
-            seasonal_index = await _mha.get_seasonal_smuggling_index(hs_code, month)
+            with span("sanctions"):
+                seasonal_index = await _mha.get_seasonal_smuggling_index(hs_code, month)
 
             # ── Step 1: Blockchain Identity Check ────────────────────
-            identity_response = await client.get(f"{IDENTITY_SVC_URL}/importer/{importer_gstin}")
+            with span("identity"):
+                identity_response = await client.get(f"{IDENTITY_SVC_URL}/importer/{importer_gstin}")
             if identity_response.status_code == 404:
                 identity_data = {
                     "importer_id": importer_gstin,
@@ -85,8 +120,9 @@ async def initiate_clearance(payload: dict):
                 "confidence": payload.get("confidence", 0.05),
                 "anomaly_class": payload.get("anomaly_class", "density_anomaly"),
             }
-            vision_response = await client.post(f"{VISION_SVC_URL}/scan", json=scan_payload)
-            vision_data = vision_response.json()
+            with span("vision"):
+                vision_response = await client.post(f"{VISION_SVC_URL}/scan", json=scan_payload)
+                vision_data = vision_response.json()
 
             # ── Step 3: Risk Scoring (all 25+ features) ──────────────
             # Determine origin risk using bridge data
@@ -94,6 +130,9 @@ async def initiate_clearance(payload: dict):
             origin_risk_val = payload.get("origin_risk", 1.0)
 
             risk_payload = {
+                # Routing key for risk-svc's A/B split
+                "clearance_id": clearance_id,
+                "container_id": container_id,
                 # Blockchain trust features (5)
                 "blockchain_trust_score": identity_data.get("trust_score", 50.0),
                 "years_active": identity_data.get("years_active", 0),
@@ -128,8 +167,9 @@ async def initiate_clearance(payload: dict):
                 "intel_seasonal_index": seasonal_index,
                 "intel_sanctions_severity": sanctions_name.get("severity", "NONE") if sanctions_name.get("match") else "NONE",
             }
-            risk_response = await client.post(f"{RISK_SVC_URL}/score", json=risk_payload)
-            risk_data = risk_response.json()
+            with span("risk"):
+                risk_response = await client.post(f"{RISK_SVC_URL}/score", json=risk_payload)
+                risk_data = risk_response.json()
 
             # ── Compute decision time ────────────────────────────────
             end_time = datetime.now(timezone.utc)
@@ -165,7 +205,11 @@ async def initiate_clearance(payload: dict):
                     "confidence": vision_data.get("confidence", 0.0),
                     "detections": vision_data.get("detections", []),
                 },
-                "risk_features": {"top_features": risk_data.get("top_features", [])},
+                "risk_features": {
+                    "top_features": risk_data.get("top_features", []),
+                    "model_version": risk_data.get("model_version"),
+                    "hs_weights_version": risk_data.get("hs_weights_version"),
+                },
                 "decision_time_sec": round(decision_time_sec, 2),
                 "audit_hash": "",
                 "officer_override": False,
@@ -176,8 +220,14 @@ async def initiate_clearance(payload: dict):
             audit_data = json.dumps(result, sort_keys=True)
             result["audit_hash"] = hashlib.sha256(audit_data.encode()).hexdigest()
 
-            # Store in database
-            await store_clearance_result(result)
+            # Store in database and prime the result cache so the client's
+            # first poll of /clearance/{id}/result is served from memory
+            with span("store"):
+                row = await store_clearance_result(result)
+                await get_result_cache().set(
+                    str(row["id"]),
+                    decision_from_row({**_decision_columns(result), **row}),
+                )
 
             # Submit result back to ICEGATE
             try:
@@ -187,42 +237,74 @@ async def initiate_clearance(payload: dict):
             except Exception:
                 pass  # Non-blocking; ICEGATE submission is best-effort
 
-            return {
-                "clearance_id": clearance_id,
-                "status": "PROCESSING",
-                "estimated_completion_sec": 50,
-                "lane": result["lane"],
-                "risk_score": result["risk_score"],
-                "decision_time_sec": result["decision_time_sec"],
-            }
+            result["result_id"] = str(row["id"])
+            outcome = {"status": "COMPLETED", "lane": result["lane"]}
+            return result
 
     except Exception as e:
         return {"clearance_id": clearance_id, "status": "ERROR", "error": str(e)}
+    finally:
+        finish_trace(trace, **outcome)
+
+
+def new_clearance_id(now: Optional[datetime] = None) -> str:
+    """Generate a public clearance id (CLR-YYYYMMDD-xxxxxxxx)."""
+    now = now or datetime.now(timezone.utc)
+    return f"CLR-{now.strftime('%Y%m%d')}-{uuid.uuid4().hex[:8]}"
+
 
+async def initiate_clearance(payload: dict) -> dict:
+    """Run the clearance pipeline inline and return the decision summary."""
+    result = await run_clearance(payload)
+    if result["status"] != "COMPLETED":
+        return result
+    return {
+        "clearance_id": result["clearance_id"],
+        "result_id": result["result_id"],
+        "status": "COMPLETED",
+        "lane": result["lane"],
+        "risk_score": result["risk_score"],
+        "decision_time_sec": result["decision_time_sec"],
+    }
 
-async def store_clearance_result(result: dict):
-    """Store clearance result in PostgreSQL."""
+
+def _decision_columns(result: dict) -> dict:
+    """Map an orchestrator result onto clearance_decisions columns."""
+    return {
+        "container_id": result["container_id"],
+        "importer_gstin": result["importer_gstin"],
+        "risk_score": result["risk_score"],
+        "lane": result["lane"],
+        "vision_anomaly": result["vision_result"]["anomaly_detected"],
+        "vision_confidence": result["vision_result"]["confidence"],
+        "blockchain_trust": result["blockchain_trust"]["score"],
+        "heatmap_s3_url": result["vision_result"]["heatmap_url"],
+        "officer_override": result["officer_override"],
+        "override_reason": result["override_reason"],
+        "audit_hash": result["audit_hash"],
+    }
+
+
+async def store_clearance_result(result: dict) -> dict:
+    """Store clearance result in PostgreSQL.
+
+    Returns:
+        Dict with the generated row ``id`` and ``created_at``.
+    """
     from app.db.connection import get_db_pool
 
+    cols = _decision_columns(result)
     pool = await get_db_pool()
     async with pool.acquire() as conn:
-        await conn.execute(
+        row = await conn.fetchrow(
             """
             INSERT INTO clearance_decisions (
                 container_id, importer_gstin, risk_score, lane,
                 vision_anomaly, vision_confidence, blockchain_trust,
                 heatmap_s3_url, officer_override, override_reason, audit_hash
             ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
+            RETURNING id, created_at
             """,
-            result["container_id"],
-            result["importer_gstin"],
-            result["risk_score"],
-            result["lane"],
-            result["vision_result"]["anomaly_detected"],
-            result["vision_result"]["confidence"],
-            result["blockchain_trust"]["score"],
-            result["vision_result"]["heatmap_url"],
-            result["officer_override"],
-            result["override_reason"],
-            result["audit_hash"],
+            *cols.values(),
         )
+    return {"id": row["id"], "created_at": row["created_at"]}
@@ -1,5 +1,6 @@
 import uuid
 
+from app.cache.result_cache import get_result_cache
 from app.db.connection import get_db_pool
 
 
@@ -60,4 +61,5 @@ async def officer_override(payload: dict):
             override_to,
         )
 
+    await get_result_cache().invalidate(str(clearance_id))
     return {"status": "ok", "override_id": override_id}
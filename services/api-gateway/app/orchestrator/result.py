@@ -1,6 +1,29 @@
+from app.cache.result_cache import get_result_cache
 from app.db.connection import get_db_pool
 
 
+def decision_from_row(row) -> dict:
+    """Shape a clearance_decisions row (or equivalent mapping) for the API."""
+    return {
+        "clearance_id": str(row["id"]),
+        "container_id": row["container_id"],
+        "importer_gstin": row["importer_gstin"],
+        "risk_score": float(row["risk_score"]),
+        "lane": row["lane"],
+        "vision_anomaly": row["vision_anomaly"],
+        "vision_confidence": (
+            float(row["vision_confidence"]) if row["vision_confidence"] else None
+        ),
+        "blockchain_trust": float(row["blockchain_trust"]) if row["blockchain_trust"] else None,
+        "heatmap_s3_url": row["heatmap_s3_url"],
+        "officer_override": row["officer_override"],
+        "override_reason": row["override_reason"],
+        "created_at": row["created_at"].isoformat() if row["created_at"] else None,
+        "audit_hash": row["audit_hash"],
+        "status": "COMPLETED",
+    }
+
+
 async def get_clearance(clearance_id: str):
     """Get clearance decision from PostgreSQL."""
     pool = await get_db_pool()
@@ -21,24 +44,7 @@ async def get_clearance(clearance_id: str):
         if row is None:
             return None
 
-        return {
-            "clearance_id": str(row["id"]),
-            "container_id": row["container_id"],
-            "importer_gstin": row["importer_gstin"],
-            "risk_score": float(row["risk_score"]),
-            "lane": row["lane"],
-            "vision_anomaly": row["vision_anomaly"],
-            "vision_confidence": (
-                float(row["vision_confidence"]) if row["vision_confidence"] else None
-            ),
-            "blockchain_trust": float(row["blockchain_trust"]) if row["blockchain_trust"] else None,
-            "heatmap_s3_url": row["heatmap_s3_url"],
-            "officer_override": row["officer_override"],
-            "override_reason": row["override_reason"],
-            "created_at": row["created_at"].isoformat() if row["created_at"] else None,
-            "audit_hash": row["audit_hash"],
-            "status": "COMPLETED",
-        }
+        return decision_from_row(row)
 
 
 async def store_clearance(clearance_id: str, decision: dict):
@@ -57,11 +63,16 @@ async def store_clearance(clearance_id: str, decision: dict):
             decision.get("audit_hash"),
             clearance_id,
         )
+    await get_result_cache().invalidate(str(clearance_id))
 
 
 async def clearance_result(clearance_id: str):
-    """Get clearance result by ID."""
-    decision = await get_clearance(clearance_id)
-    if not decision:
-        return {"error": "Clearance not found"}
+    """Get clearance result by ID (read-through cache over PostgreSQL)."""
+    cache = get_result_cache()
+    decision = await cache.get(clearance_id)
+    if decision is None:
+        decision = await get_clearance(clearance_id)
+        if not decision:
+            return {"error": "Clearance not found"}
+        await cache.set(clearance_id, decision)
     return decision
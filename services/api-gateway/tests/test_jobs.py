@@ -0,0 +1,179 @@
+import sys
+import os
+import asyncio
+
+# Add the parent directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from app.orchestrator import jobs
+from app.orchestrator.jobs import JobQueue, QueueFullError
+
+
+def test_jobs_complete_with_bounded_concurrency(monkeypatch):
+    running = {"now": 0, "peak": 0}
+
+    async def fake_run_clearance(payload, clearance_id=None):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        return {"clearance_id": clearance_id, "status": "COMPLETED", "result_id": "r-1", "lane": "GREEN"}
+
+    monkeypatch.setattr(jobs, "run_clearance", fake_run_clearance)
+
+    async def scenario():
+        queue = JobQueue(workers=2, max_queued=10, backend="local")
+        submitted = [await queue.enqueue({"container_id": f"C{i}"}) for i in range(6)]
+        assert all(j["status"] == "PROCESSING" for j in submitted)
+        await queue._queue.join()
+        finished = [await queue.get_job(j["job_id"]) for j in submitted]
+        await queue.stop()
+        return finished
+
+    finished = asyncio.run(scenario())
+    assert running["peak"] == 2
+    assert all(j["status"] == "COMPLETED" and j["result_id"] == "r-1" for j in finished)
+
+
+def test_queue_full_and_callback(monkeypatch):
+    calls = []
+
+    async def fake_run_clearance(payload, clearance_id=None):
+        return {"clearance_id": clearance_id, "status": "ERROR", "error": "boom"}
+
+    async def fake_callback(job):
+        calls.append(job)
+
+    monkeypatch.setattr(jobs, "run_clearance", fake_run_clearance)
+    monkeypatch.setattr(jobs, "_send_callback", fake_callback)
+
+    async def scenario():
+        queue = JobQueue(workers=1, max_queued=1, backend="local")
+        job = await queue.enqueue({}, callback_url="http://client.example/hook")
+        with pytest.raises(QueueFullError):
+            await queue.enqueue({})
+        await queue._queue.join()
+        await queue.stop()
+        return job
+
+    job = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert calls[0]["job_id"] == job["job_id"]
+    assert calls[0]["status"] == "ERROR"
+
+
+def test_failed_job_is_recorded_and_reported(monkeypatch):
+    calls = []
+
+    async def broken_run_clearance(payload, clearance_id=None):
+        raise RuntimeError("store down")
+
+    async def fake_callback(job):
+        calls.append(job)
+
+    monkeypatch.setattr(jobs, "run_clearance", broken_run_clearance)
+    monkeypatch.setattr(jobs, "_send_callback", fake_callback)
+
+    async def scenario():
+        queue = JobQueue(workers=1, max_queued=5, backend="local")
+        job = await queue.enqueue({}, callback_url="http://client.example/hook")
+        await queue._queue.join()
+        await queue._process({"payload": {}})  # malformed: dropped, no crash
+        finished = await queue.get_job(job["job_id"])
+        await queue.stop()
+        return finished
+
+    finished = asyncio.run(scenario())
+    assert finished["status"] == "ERROR" and finished["stage"] == "done"
+    assert "store down" in finished["error"] and finished["completed_at"]
+    assert calls and calls[0]["status"] == "ERROR"
+
+
+def test_broker_start_is_retried_and_requires_shared_store(monkeypatch):
+    with pytest.raises(ValueError):
+        JobQueue(backend="rabbitmq")  # in-memory job store
+
+    class SharedStore(jobs.ResultCache):
+        backend = "redis"
+
+    attempts = []
+
+    async def flaky_start(self):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("broker down")
+        self._amqp = ("conn", "chan")
+
+    monkeypatch.setattr(JobQueue, "_start_rabbitmq", flaky_start)
+
+    async def scenario():
+        queue = JobQueue(backend="rabbitmq", store=SharedStore())
+        with pytest.raises(jobs.QueueUnavailableError):
+            await queue.start()
+        await queue.start()
+        await queue.start()
+        return queue
+
+    queue = asyncio.run(scenario())
+    assert len(attempts) == 2 and queue._amqp == ("conn", "chan")
+
+
+def test_callback_urls_must_reach_public_or_allowlisted_hosts(monkeypatch):
+    monkeypatch.setattr(jobs, "CALLBACK_ALLOWED_HOSTS", {"hooks.internal"})
+
+    async def check(url):
+        return await jobs.is_valid_callback_url(url)
+
+    for url in ["http://127.0.0.1:8000/", "http://localhost/x", "http://169.254.169.254/latest",
+                "http://10.1.2.3/hook", "http://[::1]/", "http://risk-svc.invalid/weights",
+                "ftp://93.184.216.34/", "http:///nohost"]:
+        assert not asyncio.run(check(url)), url
+    assert asyncio.run(check("https://93.184.216.34/hook"))
+    assert asyncio.run(check("http://hooks.internal:9000/clearance"))
+
+
+def test_worker_survives_job_errors_and_bad_hosts_are_rejected(monkeypatch):
+    async def fake_run_clearance(payload, clearance_id=None):
+        return {"clearance_id": clearance_id, "status": "COMPLETED", "result_id": "r-1"}
+
+    async def broken_callback(job):
+        raise UnicodeError("label empty or too long")
+
+    monkeypatch.setattr(jobs, "run_clearance", fake_run_clearance)
+    monkeypatch.setattr(jobs, "_send_callback", broken_callback)
+
+    async def scenario():
+        queue = JobQueue(workers=1, max_queued=5, backend="local")
+        first = await queue.enqueue({}, callback_url="http://client.example/hook")
+        await asyncio.wait_for(queue._queue.join(), 5)
+        # the only worker is still alive for the next job
+        second = await queue.enqueue({})
+        await asyncio.wait_for(queue._queue.join(), 5)
+        # a job failing outside _process's own handling is marked ERROR
+        third = await queue.enqueue({})
+        monkeypatch.setattr(queue, "_process", lambda message: broken_callback(None))
+        await asyncio.wait_for(queue._queue.join(), 5)
+        finished = [await queue.get_job(j["job_id"]) for j in (first, second, third)]
+        await queue.stop()
+        return finished
+
+    first, second, third = asyncio.run(scenario())
+    assert first["status"] == second["status"] == "COMPLETED"
+    assert third["status"] == "ERROR" and third["stage"] == "done" and "label" in third["error"]
+
+    bad_host = "http://" + "a" * 64 + ".example.com/hook"
+    assert not asyncio.run(jobs.is_valid_callback_url(bad_host))
+    assert not asyncio.run(jobs.is_valid_callback_url("http://a..example.com/hook"))
+
+    from starlette.testclient import TestClient
+
+    from app.main import app
+
+    response = TestClient(app).post(
+        "/clearance/initiate",
+        json={"container_id": "TCMU-001", "callback_url": bad_host},
+        headers={"Authorization": "Bearer valid-jwt-token"},
+    )
+    assert response.status_code == 400
@@ -0,0 +1,38 @@
+import sys
+import os
+import asyncio
+
+# Add the parent directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.cache.result_cache import ResultCache
+
+
+def test_miss_then_hit():
+    cache = ResultCache(ttl_sec=60, max_entries=10)
+    assert asyncio.run(cache.get("c1")) is None
+    asyncio.run(cache.set("c1", {"lane": "GREEN"}))
+    assert asyncio.run(cache.get("c1")) == {"lane": "GREEN"}
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_invalidate_and_expiry():
+    cache = ResultCache(ttl_sec=60, max_entries=10)
+    asyncio.run(cache.set("c1", {"lane": "GREEN"}))
+    asyncio.run(cache.invalidate("c1"))
+    assert asyncio.run(cache.get("c1")) is None
+
+    expired = ResultCache(ttl_sec=-1, max_entries=10)
+    asyncio.run(expired.set("c2", {"lane": "RED"}))
+    assert asyncio.run(expired.get("c2")) is None
+
+
+def test_lru_eviction():
+    cache = ResultCache(ttl_sec=60, max_entries=2)
+    for cid in ("a", "b", "c"):
+        asyncio.run(cache.set(cid, {"id": cid}))
+    assert asyncio.run(cache.get("a")) is None
+    assert asyncio.run(cache.get("c")) == {"id": "c"}
@@ -3,23 +3,77 @@
 PRD §5.3.3 Step 4-5:
   - Deploy new model to 10% traffic for 48 hours
   - Compare accuracy → auto-promote if better
+
+Results are folded into per-arm counters (totals, accuracy, lane
+confusion matrix) as they arrive, plus an optional ring of per-interval
+counters for accuracy over time; no per-prediction records are kept.
 """
 
 import logging
-from typing import Dict, Any, List, Optional
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, Any, List, Optional, Tuple
 from datetime import datetime, timezone
 
+from app.ab_test.sequential import SequentialTest
+
 logger = logging.getLogger(__name__)
 
+LANES = ("GREEN", "YELLOW", "RED")
+
+# Optional per-interval history (AB_HISTORY_BUCKETS=0 disables it)
+AB_HISTORY_BUCKET_SEC = int(os.getenv("AB_HISTORY_BUCKET_SEC", "3600"))
+AB_HISTORY_BUCKETS = int(os.getenv("AB_HISTORY_BUCKETS", "72"))
+
+
+class ArmCounters:
+    """Running outcome counts for one arm; memory does not grow with traffic."""
+
+    __slots__ = ("total", "evaluated", "correct", "confusion")
+
+    def __init__(self):
+        self.total = 0
+        self.evaluated = 0
+        self.correct = 0
+        # confusion[actual][predicted]
+        self.confusion: Dict[str, Dict[str, int]] = {
+            actual: {predicted: 0 for predicted in LANES} for actual in LANES
+        }
+
+    def record(self, predicted_lane: str, actual_lane: Optional[str] = None) -> None:
+        self.total += 1
+        if not actual_lane:
+            return
+        self.evaluated += 1
+        if predicted_lane == actual_lane:
+            self.correct += 1
+        row = self.confusion.setdefault(actual_lane, {})
+        row[predicted_lane] = row.get(predicted_lane, 0) + 1
+
+    def metrics(self) -> Dict[str, Any]:
+        if not self.evaluated:
+            return {"accuracy": 0.0, "total_predictions": self.total, "evaluated": 0}
+        return {
+            "accuracy": round(self.correct / self.evaluated, 4),
+            "total_predictions": self.total,
+            "evaluated": self.evaluated,
+            "correct": self.correct,
+            "confusion": {actual: dict(row) for actual, row in self.confusion.items()},
+        }
+
+
 # In-memory A/B test state
 _ab_state: Dict[str, Any] = {
     "active": False,
     "model_a": {"name": "risk-xgboost", "version": "v1.0.0", "traffic": 90},
     "model_b": {"name": "risk-xgboost", "version": "v1.1.0", "traffic": 10},
     "started_at": None,
-    "results_a": [],
-    "results_b": [],
 }
+_arms: Dict[str, ArmCounters] = {"a": ArmCounters(), "b": ArmCounters()}
+_sequential = SequentialTest()
+# (bucket epoch, per-arm counters), oldest first
+_history: Deque[Tuple[int, Dict[str, ArmCounters]]] = deque(maxlen=max(AB_HISTORY_BUCKETS, 1))
 
 
 def start_ab_test(
@@ -37,69 +91,89 @@ def start_ab_test(
     Returns:
         Test configuration.
     """
-    global _ab_state
+    global _ab_state, _arms, _sequential
     _ab_state = {
         "active": True,
         "model_a": {"name": "risk-xgboost", "version": model_a_version, "traffic": 100 - traffic_split},
         "model_b": {"name": "risk-xgboost", "version": model_b_version, "traffic": traffic_split},
         "started_at": datetime.now(timezone.utc).isoformat(),
-        "results_a": [],
-        "results_b": [],
     }
+    _arms = {"a": ArmCounters(), "b": ArmCounters()}
+    _sequential = SequentialTest()
+    _history.clear()
     logger.info(f"A/B test started: {model_a_version} ({100-traffic_split}%) vs {model_b_version} ({traffic_split}%)")
     return _ab_state
 
 
-def record_result(model: str, predicted_lane: str, actual_lane: Optional[str] = None) -> None:
+def _history_bucket(now: Optional[float]) -> Optional[Dict[str, ArmCounters]]:
+    epoch = int((time.time() if now is None else now) // AB_HISTORY_BUCKET_SEC)
+    if not _history or epoch > _history[-1][0]:
+        _history.append((epoch, {"a": ArmCounters(), "b": ArmCounters()}))
+        while epoch - _history[0][0] >= AB_HISTORY_BUCKETS:
+            _history.popleft()
+        return _history[-1][1]
+    # Late event: add it to its bucket if that is still kept
+    for bucket_epoch, arms in reversed(_history):
+        if bucket_epoch == epoch:
+            return arms
+    return None
+
+
+def record_result(
+    model: str,
+    predicted_lane: str,
+    actual_lane: Optional[str] = None,
+    now: Optional[float] = None,
+) -> None:
     """Record a prediction result for A/B comparison.
 
     Args:
         model: 'a' or 'b'.
         predicted_lane: Model's predicted lane.
         actual_lane: Ground truth (when available from officer feedback).
+        now: Event time (epoch seconds) for the history buckets; defaults to now.
     """
-    entry = {
-        "predicted": predicted_lane,
-        "actual": actual_lane,
-        "correct": predicted_lane == actual_lane if actual_lane else None,
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-    }
-    if model == "a":
-        _ab_state["results_a"].append(entry)
-    else:
-        _ab_state["results_b"].append(entry)
+    arm = "a" if model == "a" else "b"
+    _arms[arm].record(predicted_lane, actual_lane)
+    if actual_lane:
+        a, b = _arms["a"], _arms["b"]
+        _sequential.update(a.evaluated, a.correct, b.evaluated, b.correct)
+    if AB_HISTORY_BUCKETS > 0:
+        bucket = _history_bucket(now)
+        if bucket is not None:
+            bucket[arm].record(predicted_lane, actual_lane)
+
+
+def ab_history() -> List[Dict[str, Any]]:
+    """Per-interval accuracy for each arm, oldest bucket first."""
+    return [
+        {
+            "bucket_start": datetime.fromtimestamp(epoch * AB_HISTORY_BUCKET_SEC, timezone.utc).isoformat(),
+            "model_a": arms["a"].metrics(),
+            "model_b": arms["b"].metrics(),
+        }
+        for epoch, arms in _history
+    ]
 
 
-def ab_compare() -> Dict[str, Any]:
+def ab_compare(include_history: bool = False) -> Dict[str, Any]:
     """Compare A/B test results and determine winner.
 
-    Uses accuracy comparison with a minimum sample threshold
-    to ensure statistical reliability.
+    Uses the always-valid sequential test (see sequential.py), so the
+    report may be checked at any time: once its running p-value drops
+    below alpha the challenger is promoted (better) or stopped (worse)
+    without waiting for the planned duration. That decision is the one
+    taken at the crossing look and does not flip with later accuracy
+    changes. Reads only the running
+    counters, so the cost does not depend on how many results were
+    recorded.
 
     Returns:
         Comparison report with winner and promotion recommendation.
     """
-    results_a = _ab_state.get("results_a", [])
-    results_b = _ab_state.get("results_b", [])
-
-    def _calc_metrics(results: List[Dict]) -> Dict[str, Any]:
-        evaluated = [r for r in results if r.get("correct") is not None]
-        total = len(results)
-        if not evaluated:
-            return {"accuracy": 0.0, "total_predictions": total, "evaluated": 0}
-        correct = sum(1 for r in evaluated if r["correct"])
-        return {
-            "accuracy": round(correct / len(evaluated), 4),
-            "total_predictions": total,
-            "evaluated": len(evaluated),
-            "correct": correct,
-        }
-
-    metrics_a = _calc_metrics(results_a)
-    metrics_b = _calc_metrics(results_b)
+    metrics_a = _arms["a"].metrics()
+    metrics_b = _arms["b"].metrics()
 
-    # Determine winner (need minimum 30 evaluated samples each)
-    min_samples = 30
     a_eval = metrics_a.get("evaluated", 0)
     b_eval = metrics_b.get("evaluated", 0)
 
@@ -107,36 +181,16 @@ def ab_compare() -> Dict[str, Any]:
     promote = False
     recommendation = "insufficient_data"
 
-    if a_eval >= min_samples and b_eval >= min_samples:
-        # Statistical significance test (proportion z-test)
-        from scipy.stats import norm
-        import numpy as np
-
-        p_a = metrics_a["accuracy"]
-        p_b = metrics_b["accuracy"]
-        n_a = a_eval
-        n_b = b_eval
-
-        p_pool = (metrics_a["correct"] + metrics_b["correct"]) / (n_a + n_b)
-        se = np.sqrt(p_pool * (1 - p_pool) * (1/n_a + 1/n_b))
-
-        if se > 0:
-            z = (p_b - p_a) / se
-            p_value = 1 - norm.cdf(z)
-        else:
-            z = 0.0
-            p_value = 0.5
-
-        if p_b > p_a and p_value < 0.05:
+    if a_eval >= _sequential.min_samples and b_eval >= _sequential.min_samples:
+        if not _sequential.significant:
+            recommendation = "continue"
+        elif _sequential.effect_sign > 0:
             winner = "model_b"
             promote = True
             recommendation = "promote_model_b"
-        elif p_a >= p_b:
-            winner = "model_a"
-            promote = False
-            recommendation = "keep_model_a"
         else:
-            recommendation = "not_significant"
+            winner = "model_a"
+            recommendation = "stop_model_b"
     elif a_eval == 0 and b_eval == 0:
         # No evaluations — return demo comparison
         metrics_a = {"accuracy": 0.92, "total_predictions": 900, "evaluated": 900, "correct": 828}
@@ -145,16 +199,26 @@ def ab_compare() -> Dict[str, Any]:
         promote = True
         recommendation = "promote_model_b"
 
-    return {
+    report = {
         "active": _ab_state.get("active", False),
         "model_a": {**_ab_state["model_a"], **metrics_a},
         "model_b": {**_ab_state["model_b"], **metrics_b},
         "winner": winner,
         "promote": promote,
         "recommendation": recommendation,
+        "sequential": {
+            "p_value": round(_sequential.p_value, 6),
+            "alpha": _sequential.alpha,
+            "tau": _sequential.tau,
+            "looks": _sequential.looks,
+            "decided_at_look": _sequential.decided_at,
+        },
         "started_at": _ab_state.get("started_at"),
         "checked_at": datetime.now(timezone.utc).isoformat(),
     }
+    if include_history:
+        report["history"] = ab_history()
+    return report
 
 
 def stop_ab_test() -> Dict[str, Any]:
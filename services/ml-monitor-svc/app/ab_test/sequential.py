@@ -0,0 +1,81 @@
+"""Always-valid sequential test for the A/B accuracy difference.
+
+Mixture SPRT (mSPRT, Johari et al. 2017) with a normal mixing prior
+N(0, tau^2) on the difference in accuracy theta = p_b - p_a. With the
+observed difference theta_hat and its pooled variance
+V = p(1 - p)(1/n_a + 1/n_b), the mixture likelihood ratio against
+theta = 0 is
+
+    Lambda = sqrt(V / (V + tau^2)) * exp(tau^2 * theta_hat^2 / (2 V (V + tau^2)))
+
+and min(1, 1/Lambda), minimised over every look so far, is a p-value
+that stays valid however often it is checked. The test can therefore
+stop as soon as that p-value drops below alpha, in either direction.
+The direction is the sign of theta_hat at that look and is kept from
+then on, even if later looks drift the other way.
+
+Everything is computed from the per-arm counters (evaluated, correct),
+so an update is O(1). The functions accept NumPy arrays as well, which
+the simulation tests use.
+"""
+
+import os
+from typing import Optional
+
+import numpy as np
+
+AB_SEQ_ALPHA = float(os.getenv("AB_SEQ_ALPHA", "0.05"))
+# Mixing scale: the size of accuracy difference the test is tuned to find
+AB_SEQ_TAU = float(os.getenv("AB_SEQ_TAU", "0.05"))
+# Evaluated samples per arm before the normal approximation is trusted
+AB_SEQ_MIN_SAMPLES = int(os.getenv("AB_SEQ_MIN_SAMPLES", "30"))
+
+
+def msprt_log_lr(n_a, correct_a, n_b, correct_b, tau: float = AB_SEQ_TAU):
+    """Log mixture likelihood ratio for p_b != p_a (0 where undefined)."""
+    n_a = np.asarray(n_a, dtype=np.float64)
+    n_b = np.asarray(n_b, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        theta = correct_b / n_b - correct_a / n_a
+        pooled = (correct_a + correct_b) / (n_a + n_b)
+        v = pooled * (1 - pooled) * (1 / n_a + 1 / n_b)
+        tau2 = tau * tau
+        log_lr = 0.5 * np.log(v / (v + tau2)) + tau2 * theta ** 2 / (2 * v * (v + tau2))
+    return np.where((v > 0) & np.isfinite(log_lr), log_lr, 0.0)
+
+
+def msprt_p_value(n_a, correct_a, n_b, correct_b, tau: float = AB_SEQ_TAU):
+    """p-value at a single look: min(1, 1 / Lambda)."""
+    return np.minimum(1.0, np.exp(-msprt_log_lr(n_a, correct_a, n_b, correct_b, tau)))
+
+
+class SequentialTest:
+    """Running always-valid p-value for one A/B test."""
+
+    __slots__ = ("alpha", "tau", "min_samples", "p_value", "looks", "effect_sign", "decided_at")
+
+    def __init__(self, alpha: float = AB_SEQ_ALPHA, tau: float = AB_SEQ_TAU,
+                 min_samples: int = AB_SEQ_MIN_SAMPLES):
+        self.alpha = alpha
+        self.tau = tau
+        self.min_samples = min_samples
+        self.p_value = 1.0
+        self.looks = 0
+        # +1 (B better) or -1 (A better), fixed at the look that crossed alpha
+        self.effect_sign = 0
+        self.decided_at: Optional[int] = None
+
+    def update(self, n_a: int, correct_a: int, n_b: int, correct_b: int) -> float:
+        """Fold in the current counters; returns the running p-value."""
+        if n_a >= self.min_samples and n_b >= self.min_samples:
+            self.looks += 1
+            p = float(msprt_p_value(n_a, correct_a, n_b, correct_b, self.tau))
+            self.p_value = min(self.p_value, p)
+            if self.decided_at is None and self.p_value < self.alpha:
+                self.effect_sign = 1 if correct_b * n_a > correct_a * n_b else -1
+                self.decided_at = self.looks
+        return self.p_value
+
+    @property
+    def significant(self) -> bool:
+        return self.decided_at is not None
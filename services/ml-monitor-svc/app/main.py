@@ -21,13 +21,20 @@ try:
 except ImportError:
     _HAS_METRICS = False
 
-from app.monitor.drift import detect_drift, set_baseline
+from app.monitor.drift import detect_drift, observe, set_baseline
+from app.monitor.evaluator import (
+    get_latest_report,
+    invalidate_report,
+    start_drift_evaluator,
+    stop_drift_evaluator,
+)
 from app.ab_test.ab_test import ab_compare, start_ab_test, stop_ab_test, record_result
 from app.mlflow.registry import (
     register_model,
     promote_model,
     list_models,
     get_production_model,
+    subscribe,
 )
 
 logging.basicConfig(level=logging.INFO)
@@ -43,8 +50,9 @@ async def health(request):
 # ------------------------------------------------------------------
 
 async def drift_report(request):
-    """GET /drift — run drift detection and return report."""
-    report = detect_drift()
+    """GET /drift — latest scheduled drift report (?refresh=true to re-run)."""
+    refresh = request.query_params.get("refresh", "").lower() in ("1", "true")
+    report = get_latest_report(refresh=refresh)
     return JSONResponse(report)
 
 
@@ -52,6 +60,14 @@ async def drift_baseline(request: Request):
     """POST /drift/baseline — set baseline feature distributions."""
     payload = await request.json()
     result = set_baseline(payload.get("features", {}))
+    invalidate_report()
+    return JSONResponse(result)
+
+
+async def drift_observe(request: Request):
+    """POST /drift/observe — add live feature values to the recent sketches."""
+    payload = await request.json()
+    result = observe(payload.get("features", {}))
     return JSONResponse(result)
 
 
@@ -67,8 +83,9 @@ async def drift_check(request: Request):
 # ------------------------------------------------------------------
 
 async def ab_report(request):
-    """GET /ab — get current A/B test comparison."""
-    report = ab_compare()
+    """GET /ab — get current A/B test comparison (?history=true adds per-interval accuracy)."""
+    history = request.query_params.get("history", "").lower() in ("1", "true")
+    report = ab_compare(include_history=history)
     return JSONResponse(report)
 
 
@@ -90,14 +107,16 @@ async def ab_stop(request: Request):
 
 
 async def ab_record(request: Request):
-    """POST /ab/record — record a prediction result for A/B comparison."""
+    """POST /ab/record — record one result, or a batch under "results"."""
     payload = await request.json()
-    record_result(
-        model=payload.get("model", "a"),
-        predicted_lane=payload.get("predicted"),
-        actual_lane=payload.get("actual"),
-    )
-    return JSONResponse({"status": "recorded"})
+    results = payload.get("results", [payload])
+    for entry in results:
+        record_result(
+            model=entry.get("model", "a"),
+            predicted_lane=entry.get("predicted"),
+            actual_lane=entry.get("actual"),
+        )
+    return JSONResponse({"status": "recorded", "count": len(results)})
 
 
 # ------------------------------------------------------------------
@@ -119,6 +138,7 @@ async def registry_register(request: Request):
         version=payload.get("version"),
         metrics=payload.get("metrics"),
         stage=payload.get("stage", "Staging"),
+        artifact_uri=payload.get("artifact_uri"),
     )
     return JSONResponse(result)
 
@@ -143,11 +163,23 @@ async def registry_production(request: Request):
     return JSONResponse({"error": f"No production model for {name}"}, status_code=404)
 
 
+async def registry_subscribe(request: Request):
+    """POST /registry/subscribe — webhook called on every promotion."""
+    payload = await request.json()
+    if not payload.get("url"):
+        return JSONResponse({"error": "url is required"}, status_code=400)
+    try:
+        return JSONResponse(subscribe(payload["url"], payload.get("name")))
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+
 _routes = [
     Route("/health", health, methods=["GET"]),
     # Drift
     Route("/drift", drift_report, methods=["GET"]),
     Route("/drift/baseline", drift_baseline, methods=["POST"]),
+    Route("/drift/observe", drift_observe, methods=["POST"]),
     Route("/drift/check", drift_check, methods=["POST"]),
     # A/B Testing
     Route("/ab", ab_report, methods=["GET"]),
@@ -159,12 +191,23 @@ _routes = [
     Route("/registry", registry_register, methods=["POST"]),
     Route("/registry/promote", registry_promote, methods=["POST"]),
     Route("/registry/production/{name}", registry_production, methods=["GET"]),
+    Route("/registry/subscribe", registry_subscribe, methods=["POST"]),
 ]
 
 if _HAS_METRICS:
     _routes.append(get_metrics_route())
 
-app = Starlette(routes=_routes)
+
+async def on_startup():
+    """Start the scheduled drift evaluator."""
+    start_drift_evaluator()
+
+
+async def on_shutdown():
+    stop_drift_evaluator()
+
+
+app = Starlette(routes=_routes, on_startup=[on_startup], on_shutdown=[on_shutdown])
 
 if _HAS_METRICS:
     _setup_metrics(app, service_name="ml-monitor-svc")
@@ -4,19 +4,75 @@ PRD §Phase 5:
   - Model registry with version tagging
   - Never delete old versions
   - Staging / Production promotion
+
+Versions are stored locally in SQLite (REGISTRY_DB_PATH), which is kept
+even when an MLflow server is configured. The table is unique on
+(name, version) and indexed by (name, stage). Each process caches the
+current Production entry per model name, and reloads that cache only
+when SQLite's data_version shows that another connection has committed.
+
+Promotions are pushed to subscribers instead of being polled for:
+in-process listeners (add_listener) and webhook URLs (subscribe), which
+receive a POST with {"event", "name", "version", "stage",
+"artifact_uri"}. A service hot-loads the new model on that call.
+
+Webhooks are configured at deploy time through REGISTRY_WEBHOOKS, e.g.
+"risk-xgboost=http://risk-svc:8000/model/reload" (risk-svc's
+/model/reload hot-swaps the promoted model). vision-svc loads its
+weights from MODEL_PATH per request and has no reload endpoint, so it
+is not subscribed. POST /registry/subscribe only accepts http(s) URLs
+whose host is one of those configured webhook hosts or is listed in
+REGISTRY_SUBSCRIBE_HOSTS; anything else is rejected, since the registry
+would otherwise POST to any address a caller supplies. An http webhook
+host that resolves to several
+addresses (a headless Kubernetes service) is notified at every address,
+so each replica reloads.
 """
 
+import asyncio
+import json
 import os
 import logging
-from typing import Dict, Any, List, Optional
+import socket
+import sqlite3
+import threading
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple
 from datetime import datetime, timezone
+from urllib.parse import urlsplit
 
 logger = logging.getLogger(__name__)
 
 MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "")
+REGISTRY_DB_PATH = os.getenv("REGISTRY_DB_PATH", "data/registry.db")
+# Comma-separated "[model=]url" webhooks, added on startup (no model → all models)
+REGISTRY_WEBHOOKS = os.getenv("REGISTRY_WEBHOOKS", "")
+# Extra hosts /registry/subscribe may point at (REGISTRY_WEBHOOKS hosts are always allowed)
+REGISTRY_SUBSCRIBE_HOSTS = {
+    h.strip().lower() for h in os.getenv("REGISTRY_SUBSCRIBE_HOSTS", "").split(",") if h.strip()
+}
 
-# In-memory registry fallback when MLflow server is unavailable
-_local_registry: List[Dict[str, Any]] = [
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS model_versions (
+    id             INTEGER PRIMARY KEY AUTOINCREMENT,
+    name           TEXT NOT NULL,
+    version        TEXT NOT NULL,
+    stage          TEXT NOT NULL,
+    registered_at  TEXT NOT NULL,
+    updated_at     TEXT NOT NULL,
+    metrics        TEXT NOT NULL DEFAULT '{}',
+    artifact_uri   TEXT,
+    mlflow_version TEXT,
+    UNIQUE (name, version)
+);
+CREATE INDEX IF NOT EXISTS idx_model_versions_name_stage ON model_versions (name, stage);
+CREATE TABLE IF NOT EXISTS registry_subscribers (
+    url  TEXT PRIMARY KEY,
+    name TEXT
+);
+"""
+
+# Seed versions, inserted once into an empty registry
+_SEED_MODELS: List[Dict[str, Any]] = [
     {
         "name": "vision-yolov8",
         "version": "v1.0.0",
@@ -33,6 +89,90 @@ _local_registry: List[Dict[str, Any]] = [
     },
 ]
 
+_conn: Optional[sqlite3.Connection] = None
+_lock = threading.RLock()
+_production_cache: Dict[str, Dict[str, Any]] = {}
+_cache_data_version = -1
+_listeners: List[Callable[[Dict[str, Any]], None]] = []
+_webhook_tasks: Set[asyncio.Task] = set()
+
+
+def _db() -> sqlite3.Connection:
+    """Open (once) the registry database, creating and seeding it if new."""
+    global _conn
+    if _conn is None:
+        if REGISTRY_DB_PATH != ":memory:":
+            os.makedirs(os.path.dirname(REGISTRY_DB_PATH) or ".", exist_ok=True)
+        conn = sqlite3.connect(REGISTRY_DB_PATH, check_same_thread=False, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        if conn.execute("SELECT COUNT(*) FROM model_versions").fetchone()[0] == 0:
+            for m in _SEED_MODELS:
+                conn.execute(
+                    "INSERT OR IGNORE INTO model_versions "
+                    "(name, version, stage, registered_at, updated_at, metrics) VALUES (?, ?, ?, ?, ?, ?)",
+                    (m["name"], m["version"], m["stage"], m["registered_at"], m["registered_at"],
+                     json.dumps(m["metrics"])),
+                )
+        for url, name in parse_webhooks(REGISTRY_WEBHOOKS):
+            conn.execute(
+                "INSERT INTO registry_subscribers (url, name) VALUES (?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET name = excluded.name",
+                (url, name),
+            )
+        _conn = conn
+    return _conn
+
+
+def parse_webhooks(spec: str) -> List[Tuple[str, Optional[str]]]:
+    """(url, model name or None) pairs from a REGISTRY_WEBHOOKS value."""
+    hooks = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, sep, url = item.partition("=")
+        if sep and "://" not in name:
+            hooks.append((url.strip(), name.strip() or None))
+        else:
+            hooks.append((item, None))
+    return hooks
+
+
+def _row_to_entry(row: sqlite3.Row) -> Dict[str, Any]:
+    entry = {
+        "name": row["name"],
+        "version": row["version"],
+        "stage": row["stage"],
+        "registered_at": row["registered_at"],
+        "metrics": json.loads(row["metrics"]),
+    }
+    if row["artifact_uri"]:
+        entry["artifact_uri"] = row["artifact_uri"]
+    if row["mlflow_version"]:
+        entry["mlflow_version"] = row["mlflow_version"]
+    return entry
+
+
+def _invalidate_production_cache() -> None:
+    # data_version only tracks other connections' commits, not our own
+    global _cache_data_version
+    _cache_data_version = -1
+
+
+def _refresh_production_cache() -> None:
+    """Reload the Production cache if the database changed since last time."""
+    global _cache_data_version
+    conn = _db()
+    data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+    if data_version == _cache_data_version:
+        return
+    rows = conn.execute(
+        "SELECT * FROM model_versions WHERE stage = 'Production' ORDER BY id"
+    ).fetchall()
+    _production_cache.clear()
+    for row in rows:
+        _production_cache[row["name"]] = _row_to_entry(row)  # latest id wins
+    _cache_data_version = data_version
+
 
 def _get_mlflow_client():
     """Get MLflow tracking client if server is configured."""
@@ -52,6 +192,7 @@ def register_model(
     version: str,
     metrics: Optional[Dict[str, float]] = None,
     stage: str = "Staging",
+    artifact_uri: Optional[str] = None,
 ) -> Dict[str, Any]:
     """Register a new model version.
 
@@ -60,9 +201,11 @@ def register_model(
         version: Semantic version string.
         metrics: Performance metrics dict.
         stage: 'Staging' or 'Production'.
+        artifact_uri: Where serving services load the model from.
 
     Returns:
-        Registration confirmation.
+        Registration confirmation ("exists" if the version is already
+        registered; the stored entry is left unchanged).
     """
     entry = {
         "name": name,
@@ -71,6 +214,8 @@ def register_model(
         "registered_at": datetime.now(timezone.utc).isoformat(),
         "metrics": metrics or {},
     }
+    if artifact_uri:
+        entry["artifact_uri"] = artifact_uri
 
     # Try MLflow first
     client = _get_mlflow_client()
@@ -86,8 +231,24 @@ def register_model(
             logger.warning(f"MLflow registration failed, using local: {e}")
 
     # Always record locally (append-only — never delete)
-    _local_registry.append(entry)
+    with _lock:
+        conn = _db()
+        existing = conn.execute(
+            "SELECT * FROM model_versions WHERE name = ? AND version = ?", (name, version)
+        ).fetchone()
+        if existing is not None:
+            return {"status": "exists", **_row_to_entry(existing)}
+        conn.execute(
+            "INSERT INTO model_versions (name, version, stage, registered_at, updated_at, metrics, "
+            "artifact_uri, mlflow_version) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (name, version, stage, entry["registered_at"], entry["registered_at"],
+             json.dumps(entry["metrics"]), artifact_uri,
+             str(entry["mlflow_version"]) if "mlflow_version" in entry else None),
+        )
+        _invalidate_production_cache()
     logger.info(f"Model registered: {name} v{version} [{stage}]")
+    if stage == "Production":
+        _notify({"event": "registered", **entry})
     return {"status": "registered", **entry}
 
 
@@ -104,19 +265,38 @@ def promote_model(name: str, version: str, to_stage: str = "Production") -> Dict
     Returns:
         Promotion result.
     """
-    promoted = False
-    for entry in _local_registry:
-        if entry["name"] == name:
-            if entry["version"] == version:
-                entry["stage"] = to_stage
-                promoted = True
-            elif entry["stage"] == "Production" and to_stage == "Production":
-                entry["stage"] = "Archived"
-
-    if not promoted:
-        return {"status": "error", "message": f"Model {name} v{version} not found"}
+    now = datetime.now(timezone.utc).isoformat()
+    with _lock:
+        conn = _db()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id FROM model_versions WHERE name = ? AND version = ?", (name, version)
+            ).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return {"status": "error", "message": f"Model {name} v{version} not found"}
+            if to_stage == "Production":
+                conn.execute(
+                    "UPDATE model_versions SET stage = 'Archived', updated_at = ? "
+                    "WHERE name = ? AND stage = 'Production' AND id != ?",
+                    (now, name, row["id"]),
+                )
+            conn.execute(
+                "UPDATE model_versions SET stage = ?, updated_at = ? WHERE id = ?",
+                (to_stage, now, row["id"]),
+            )
+            conn.execute("COMMIT")
+            _invalidate_production_cache()
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        entry = _row_to_entry(
+            conn.execute("SELECT * FROM model_versions WHERE id = ?", (row["id"],)).fetchone()
+        )
 
     logger.info(f"Promoted {name} v{version} → {to_stage}")
+    _notify({"event": "promoted", **entry})
     return {"status": "promoted", "name": name, "version": version, "stage": to_stage}
 
 
@@ -127,16 +307,130 @@ def list_models(name: Optional[str] = None) -> List[Dict[str, Any]]:
         name: Optional filter by model name.
 
     Returns:
-        List of model entries.
+        List of model entries, in registration order.
     """
-    if name:
-        return [m for m in _local_registry if m["name"] == name]
-    return _local_registry
+    with _lock:
+        conn = _db()
+        if name:
+            rows = conn.execute(
+                "SELECT * FROM model_versions WHERE name = ? ORDER BY id", (name,)
+            ).fetchall()
+        else:
+            rows = conn.execute("SELECT * FROM model_versions ORDER BY id").fetchall()
+    return [_row_to_entry(row) for row in rows]
 
 
 def get_production_model(name: str) -> Optional[Dict[str, Any]]:
-    """Get the current production model for a given name."""
-    for entry in reversed(_local_registry):
-        if entry["name"] == name and entry["stage"] == "Production":
-            return entry
-    return None
+    """Get the current production model for a given name (cached)."""
+    with _lock:
+        _refresh_production_cache()
+        return _production_cache.get(name)
+
+
+# ------------------------------------------------------------------
+# Change notifications
+# ------------------------------------------------------------------
+
+def add_listener(callback: Callable[[Dict[str, Any]], None]) -> None:
+    """Call `callback(event)` in-process on every stage change."""
+    _listeners.append(callback)
+
+
+def _url_host(url: str) -> Optional[str]:
+    try:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            return None
+        return parts.hostname
+    except ValueError:
+        return None
+
+
+def is_allowed_webhook(url: str) -> bool:
+    """True if `url` is http(s) and its host is a configured webhook host."""
+    host = _url_host(url) if isinstance(url, str) else None
+    if not host:
+        return False
+    configured = {_url_host(hook) for hook, _ in parse_webhooks(REGISTRY_WEBHOOKS)}
+    return host in configured or host in REGISTRY_SUBSCRIBE_HOSTS
+
+
+def subscribe(url: str, name: Optional[str] = None) -> Dict[str, Any]:
+    """Register a webhook for stage changes (of one model, or all with no name).
+
+    Raises:
+        ValueError: If the URL's host is not allowed (see is_allowed_webhook).
+    """
+    if not is_allowed_webhook(url):
+        raise ValueError("url must be http(s) on a host in REGISTRY_WEBHOOKS or REGISTRY_SUBSCRIBE_HOSTS")
+    with _lock:
+        _db().execute(
+            "INSERT INTO registry_subscribers (url, name) VALUES (?, ?) "
+            "ON CONFLICT (url) DO UPDATE SET name = excluded.name",
+            (url, name),
+        )
+    return {"status": "subscribed", "url": url, "name": name}
+
+
+def _subscribers(name: str) -> List[str]:
+    with _lock:
+        rows = _db().execute(
+            "SELECT url FROM registry_subscribers WHERE name IS NULL OR name = ?", (name,)
+        ).fetchall()
+    return [row["url"] for row in rows]
+
+
+async def _webhook_targets(url: str) -> List[Tuple[str, Dict[str, str]]]:
+    """(url, headers) per address of an http webhook's host, else the URL itself."""
+    parts = urlsplit(url)
+    if parts.scheme != "http" or not parts.hostname:
+        return [(url, {})]
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            parts.hostname, parts.port or 80, type=socket.SOCK_STREAM
+        )
+    except OSError:
+        return [(url, {})]
+    addresses = sorted({info[4][0] for info in infos})
+    if len(addresses) < 2:
+        return [(url, {})]
+    port = f":{parts.port}" if parts.port else ""
+    return [
+        (parts._replace(netloc=(f"[{a}]" if ":" in a else a) + port).geturl(), {"Host": parts.netloc})
+        for a in addresses
+    ]
+
+
+async def _post_webhook(url: str, event: Dict[str, Any]) -> None:
+    try:
+        import httpx
+
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            for target, headers in await _webhook_targets(url):
+                try:
+                    await client.post(target, json=event, headers=headers)
+                except Exception as e:
+                    logger.warning(f"Registry notification to {target} failed: {e}")
+    except Exception as e:
+        logger.warning(f"Registry notification to {url} failed: {e}")
+
+
+def _notify(event: Dict[str, Any]) -> None:
+    for callback in list(_listeners):
+        try:
+            callback(event)
+        except Exception as e:
+            logger.warning(f"Registry listener failed: {e}")
+
+    urls = _subscribers(event["name"])
+    if not urls:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        logger.warning("No event loop; registry webhooks not sent")
+        return
+    for url in urls:
+        task = loop.create_task(_post_webhook(url, event))
+        _webhook_tasks.add(task)
+        task.add_done_callback(_webhook_tasks.discard)
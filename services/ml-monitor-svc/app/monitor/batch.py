@@ -0,0 +1,149 @@
+"""Vectorized drift statistics over all features at once.
+
+Features are stacked into an (n_features, n_samples) matrix, one row per
+feature, padded with NaN where a feature has fewer values. Every step is
+one NumPy operation over all rows:
+
+  - np.sort along the rows gives every feature's sorted sample;
+  - quantile edges are gathered from the sorted rows by index;
+  - histogram counts come from a binary search run on all
+    (feature, edge) pairs simultaneously.
+
+At check time the per-feature sketch histograms are stacked the same
+way (zero-padded to the widest), and KS and PSI are computed for every
+feature in one pass (ks_counts_rows, psi_rows); drift.py serves both
+detect_drift and evaluate_horizons through it.
+"""
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.monitor.sketch import PSI_BUCKETS, SKETCH_BINS
+
+_PSI_EPS = 1e-6
+
+
+def stack_features(
+    features: Dict[str, Sequence[float]],
+    names: Optional[List[str]] = None,
+) -> Tuple[List[str], np.ndarray]:
+    """Stack per-feature value lists into a NaN-padded (F, rows) float64 matrix."""
+    names = list(features) if names is None else names
+    width = max((len(features[n]) for n in names), default=0)
+    X = np.full((len(names), width), np.nan)
+    for j, name in enumerate(names):
+        row = np.asarray(features[name], dtype=np.float64)
+        X[j, : row.size] = row
+    X[~np.isfinite(X)] = np.nan
+    return names, X
+
+
+def sort_rows(X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sort every row (NaN last) and count its finite values."""
+    return np.sort(X, axis=1), np.count_nonzero(~np.isnan(X), axis=1)
+
+
+def count_below(S: np.ndarray, n: np.ndarray, queries: np.ndarray, inclusive: bool = False) -> np.ndarray:
+    """Per row, how many of the n[j] finite values are < (or <=) each query.
+
+    Args:
+        S: (F, width) rows sorted ascending with NaN last.
+        n: (F,) finite values per row.
+        queries: (F, K) query points, one row per feature.
+
+    Returns:
+        (F, K) int64 counts, from a binary search over all rows at once.
+    """
+    f, k = queries.shape
+    rows = np.broadcast_to(np.arange(f)[:, None], (f, k))
+    lo = np.zeros((f, k), dtype=np.int64)
+    hi = np.broadcast_to(n.astype(np.int64)[:, None], (f, k)).copy()
+    last_col = max(S.shape[1] - 1, 0)
+    while True:
+        active = lo < hi
+        if not active.any():
+            return lo
+        mid = (lo + hi) >> 1
+        v = S[rows, np.minimum(mid, last_col)]
+        go_right = ((v <= queries) if inclusive else (v < queries)) & active
+        lo = np.where(go_right, mid + 1, lo)
+        hi = np.where(active & ~go_right, mid, hi)
+
+
+def quantile_edges(S: np.ndarray, n: np.ndarray, bins: int = SKETCH_BINS) -> np.ndarray:
+    """(F, bins + 1) percentile edges (linear interpolation, as np.quantile)."""
+    top = np.maximum(n - 1, 0)[:, None]
+    pos = np.linspace(0.0, 1.0, bins + 1)[None, :] * top
+    if S.shape[1] == 0:
+        return np.zeros_like(pos)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, top)
+    rows = np.arange(S.shape[0])[:, None]
+    edges = S[rows, lo] + (pos - lo) * (S[rows, hi] - S[rows, lo])
+    edges[n == 0] = 0.0
+    return edges
+
+
+def histogram_rows(S: np.ndarray, n: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """(F, E + 1) counts in FeatureSketch bin layout.
+
+    Bin 0 is below edges[0], bin i is [edges[i-1], edges[i]) and the last
+    bin is at or above edges[-1]. Rows may pad their edges with +inf.
+    """
+    below = count_below(S, n, edges, inclusive=False)
+    return np.diff(np.hstack([below, n[:, None]]), axis=1, prepend=0)
+
+
+def psi_rows(expected: np.ndarray, actual: np.ndarray, buckets: int = PSI_BUCKETS) -> np.ndarray:
+    """PSI per row over baseline-decile buckets (see sketch.psi_from_counts)."""
+    f = expected.shape[0]
+    n = expected.sum(axis=1)
+    m = actual.sum(axis=1)
+    before = (np.cumsum(expected, axis=1) - expected) / np.maximum(n, 1)[:, None]
+    groups = np.minimum((before * buckets).astype(np.int64), buckets - 1)
+    flat = (groups + np.arange(f)[:, None] * buckets).ravel()
+    e = np.bincount(flat, weights=expected.ravel(), minlength=f * buckets).reshape(f, buckets)
+    a = np.bincount(flat, weights=actual.ravel(), minlength=f * buckets).reshape(f, buckets)
+    e = e / np.maximum(n, 1)[:, None] + _PSI_EPS
+    a = a / np.maximum(m, 1)[:, None] + _PSI_EPS
+    psi = np.sum((a - e) * np.log(a / e), axis=1)
+    psi[(n == 0) | (m == 0)] = 0.0
+    return psi
+
+
+def ks_counts_rows(expected: np.ndarray, actual: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """KS statistic and asymptotic p-value per row of binned counts (see sketch.ks_from_counts)."""
+    from scipy.stats import kstwo
+
+    n = expected.sum(axis=1)
+    m = actual.sum(axis=1)
+    gap = (np.cumsum(expected, axis=1) / np.maximum(n, 1)[:, None]
+           - np.cumsum(actual, axis=1) / np.maximum(m, 1)[:, None])
+    d = np.max(np.abs(gap), axis=1, initial=0.0)
+    # Same asymptotic p-value as scipy's ks_2samp(method="asymp")
+    en = np.maximum(np.round(n * m / np.maximum(n + m, 1)), 1)
+    p = np.clip(kstwo.sf(d, en), 0.0, 1.0)
+    empty = (n == 0) | (m == 0)
+    d[empty] = 0.0
+    p[empty] = 1.0
+    return d, p
+
+
+def pad_edges(edge_list: List[np.ndarray]) -> np.ndarray:
+    """Stack per-feature edge arrays into (F, max_len), padding with +inf."""
+    width = max((e.size for e in edge_list), default=0)
+    out = np.full((len(edge_list), width), math.inf)
+    for j, e in enumerate(edge_list):
+        out[j, : e.size] = e
+    return out
+
+
+def stack_counts(count_list: List[np.ndarray]) -> np.ndarray:
+    """Stack per-feature histogram counts into (F, max_len), padding with 0."""
+    width = max((c.size for c in count_list), default=0)
+    out = np.zeros((len(count_list), width), dtype=np.int64)
+    for j, c in enumerate(count_list):
+        out[j, : c.size] = c
+    return out
@@ -4,13 +4,34 @@ PRD §Phase 5:
   - Detect feature distribution drift on vision + risk model inputs
   - Alert when drift exceeds threshold
   - Uses Kolmogorov-Smirnov test and Population Stability Index (PSI)
+
+Distributions are held as bounded-size sketches (see sketch.py), not raw
+arrays: the baseline fixes each feature's histogram edges, live traffic is
+folded into the recent sketches through observe(), and KS/PSI are
+computed from bin counts in O(bins), for all features at once (the
+sketch histograms are stacked into one matrix, see batch.py).
+
+Observations also land in per-horizon rings of time buckets (see
+windows.py), which evaluate_horizons() merges to check drift over the
+last hour, day or week.
 """
 
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
 from datetime import datetime, timezone
 
-import numpy as np
+from app.monitor.batch import (
+    histogram_rows,
+    ks_counts_rows,
+    pad_edges,
+    psi_rows,
+    quantile_edges,
+    sort_rows,
+    stack_counts,
+    stack_features,
+)
+from app.monitor.sketch import FeatureSketch
+from app.monitor.windows import DRIFT_HORIZONS, WindowSet
 
 logger = logging.getLogger(__name__)
 
@@ -18,21 +39,39 @@ logger = logging.getLogger(__name__)
 KS_THRESHOLD = 0.05   # p-value below this → drift detected
 PSI_THRESHOLD = 0.20  # PSI above this → significant drift
 
-# In-memory baseline distributions (populated on first call or via /baseline)
-_baseline: Dict[str, np.ndarray] = {}
-_recent: Dict[str, np.ndarray] = {}
-
+# Inputs of the risk-svc model (risk-svc app/model/predict.py FEATURE_COLUMNS)
+RISK_FEATURES = [
+    "blockchain_trust_score",
+    "years_active",
+    "violation_count",
+    "aeo_tier",
+    "recent_clean_inspections",
+    "vision_anomaly_flag",
+    "vision_confidence",
+    "vision_detection_count",
+    "vision_class_encoded",
+    "cargo_hs_risk_weight",
+    "cargo_declared_value_log",
+    "cargo_weight",
+    "cargo_volume",
+    "cargo_category_encoded",
+    "cargo_value_weight_ratio",
+    "route_origin_risk_index",
+    "route_transshipment_count",
+    "route_carrier_risk",
+    "route_port_risk",
+    "intel_ofac_match",
+    "intel_un_conflict_flag",
+    "intel_interpol_alert",
+    "intel_seasonal_index",
+    "intel_composite_score",
+    "trust_vision_interaction",
+]
 
-def _calculate_psi(expected: np.ndarray, actual: np.ndarray, buckets: int = 10) -> float:
-    """Calculate Population Stability Index between two distributions."""
-    eps = 1e-6
-    breakpoints = np.linspace(min(expected.min(), actual.min()),
-                              max(expected.max(), actual.max()),
-                              buckets + 1)
-    expected_counts = np.histogram(expected, bins=breakpoints)[0] / len(expected) + eps
-    actual_counts = np.histogram(actual, bins=breakpoints)[0] / len(actual) + eps
-    psi = np.sum((actual_counts - expected_counts) * np.log(actual_counts / expected_counts))
-    return float(psi)
+# Per-feature sketches (baseline via /drift/baseline, recent via /drift/observe)
+_baseline: Dict[str, FeatureSketch] = {}
+_recent: Dict[str, FeatureSketch] = {}
+_windows: Dict[str, WindowSet] = {}
 
 
 def set_baseline(features: Dict[str, List[float]]) -> Dict[str, Any]:
@@ -44,20 +83,103 @@ def set_baseline(features: Dict[str, List[float]]) -> Dict[str, Any]:
     Returns:
         Confirmation with statistics.
     """
-    global _baseline
+    # Edges and histograms for all features in one vectorized pass
+    names, X = stack_features(features)
+    S, n = sort_rows(X)
+    edges = quantile_edges(S, n)
+    counts = histogram_rows(S, n, edges)
+
     stats = {}
-    for name, values in features.items():
-        arr = np.array(values, dtype=np.float64)
-        _baseline[name] = arr
-        stats[name] = {"mean": float(arr.mean()), "std": float(arr.std()), "n": len(arr)}
+    for j, name in enumerate(names):
+        sketch = FeatureSketch.from_histogram(edges[j], counts[j], S[j, : n[j]])
+        _baseline[name] = sketch
+        # New edges: observations against the old baseline no longer apply
+        _recent[name] = sketch.empty_like()
+        _windows[name] = WindowSet(sketch)
+        stats[name] = {
+            "mean": sketch.mean,
+            "std": sketch.std,
+            "n": sketch.n,
+            "bins": int(sketch.counts.size),
+        }
     return {"status": "baseline_set", "features": stats}
 
 
 def set_recent(features: Dict[str, List[float]]) -> None:
-    """Set recent feature distributions for drift comparison."""
-    global _recent
+    """Replace the recent distributions with the given values."""
+    names, X = stack_features(features, [name for name in features if name in _baseline])
+    S, n = sort_rows(X)
+    counts = histogram_rows(S, n, pad_edges([_baseline[name].edges for name in names]))
+    for j, name in enumerate(names):
+        sketch = _baseline[name].empty_like()
+        sketch.update(S[j, : n[j]], counts=counts[j, : sketch.counts.size])
+        _recent[name] = sketch
+
+
+def observe(
+    features: Dict[str, Union[float, List[float]]],
+    now: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Fold live feature values into the recent sketches and time windows.
+
+    Args:
+        features: Dict mapping feature name → one value or a list of values.
+        now: Observation time (epoch seconds); defaults to the current time.
+
+    Returns:
+        Per-feature count of values observed so far, plus the names of
+        features skipped because they have no baseline.
+    """
+    observed, ignored = {}, []
     for name, values in features.items():
-        _recent[name] = np.array(values, dtype=np.float64)
+        sketch = _recent.get(name)
+        if sketch is None:
+            ignored.append(name)
+            continue
+        sketch.update(values)
+        _windows[name].update(values, now)
+        observed[name] = sketch.n
+    return {"status": "observed", "features": observed, "ignored": ignored}
+
+
+def _report(baseline: FeatureSketch, recent: FeatureSketch, ks_stat: float, ks_p: float, psi: float) -> Dict[str, Any]:
+    """KS + PSI report for one feature."""
+    ks_drift = bool(ks_p < KS_THRESHOLD)
+    psi_drift = bool(psi > PSI_THRESHOLD)
+
+    return {
+        "ks_statistic": round(float(ks_stat), 4),
+        "ks_p_value": round(float(ks_p), 4),
+        "ks_drift": ks_drift,
+        "psi": round(float(psi), 4),
+        "psi_drift": psi_drift,
+        "drift_detected": ks_drift or psi_drift,
+        "baseline_mean": round(baseline.mean, 4),
+        "recent_mean": round(recent.mean, 4),
+        "baseline_std": round(baseline.std, 4),
+        "recent_std": round(recent.std, 4),
+        "recent_n": recent.n,
+        "recent_quantiles": recent.summary(),
+    }
+
+
+def _feature_reports(recent_sketches: Dict[str, FeatureSketch]) -> Dict[str, Dict[str, Any]]:
+    """Reports for every feature with a baseline and recent data, computed in one batch."""
+    pairs = [
+        (name, baseline, recent_sketches[name])
+        for name, baseline in _baseline.items()
+        if name in recent_sketches and recent_sketches[name].n
+    ]
+    if not pairs:
+        return {}
+    expected = stack_counts([baseline.counts for _, baseline, _ in pairs])
+    actual = stack_counts([recent.counts for _, _, recent in pairs])
+    ks_stat, ks_p = ks_counts_rows(expected, actual)
+    psi = psi_rows(expected, actual)
+    return {
+        name: _report(baseline, recent, ks_stat[j], ks_p[j], psi[j])
+        for j, (name, baseline, recent) in enumerate(pairs)
+    }
 
 
 def detect_drift(
@@ -74,8 +196,6 @@ def detect_drift(
     Raises:
         ValueError: If no baseline has been set via set_baseline().
     """
-    global _recent
-
     # Require real baseline data — no synthetic fallback
     if not _baseline:
         return {
@@ -93,7 +213,7 @@ def detect_drift(
         set_recent(recent_features)
 
     # Require real recent data
-    if not _recent:
+    if not any(sketch.n for sketch in _recent.values()):
         return {
             "drift_detected": False,
             "error": "No recent data available. Submit recent feature distributions first.",
@@ -104,46 +224,55 @@ def detect_drift(
             "checked_at": datetime.now(timezone.utc).isoformat(),
         }
 
-    from scipy.stats import ks_2samp
+    feature_reports = _feature_reports(_recent)
+    any_drift = any(r["drift_detected"] for r in feature_reports.values())
 
-    feature_reports = {}
-    any_drift = False
+    return {
+        "drift_detected": any_drift,
+        "feature_reports": feature_reports,
+        "ks_threshold": KS_THRESHOLD,
+        "psi_threshold": PSI_THRESHOLD,
+        "alert": any_drift,
+        "checked_at": datetime.now(timezone.utc).isoformat(),
+    }
 
-    for name in _baseline:
-        if name not in _recent:
-            continue
 
-        baseline_arr = _baseline[name]
-        recent_arr = _recent[name]
-
-        # Kolmogorov-Smirnov test
-        ks_stat, ks_p = ks_2samp(baseline_arr, recent_arr)
-        ks_drift = bool(ks_p < KS_THRESHOLD)
-
-        # PSI
-        psi = _calculate_psi(baseline_arr, recent_arr)
-        psi_drift = bool(psi > PSI_THRESHOLD)
-
-        drift_detected = ks_drift or psi_drift
-        if drift_detected:
-            any_drift = True
-
-        feature_reports[name] = {
-            "ks_statistic": round(float(ks_stat), 4),
-            "ks_p_value": round(float(ks_p), 4),
-            "ks_drift": ks_drift,
-            "psi": round(float(psi), 4),
-            "psi_drift": psi_drift,
-            "drift_detected": drift_detected,
-            "baseline_mean": round(float(baseline_arr.mean()), 4),
-            "recent_mean": round(float(recent_arr.mean()), 4),
-            "baseline_std": round(float(baseline_arr.std()), 4),
-            "recent_std": round(float(recent_arr.std()), 4),
+def evaluate_horizons(
+    features: Optional[List[str]] = None,
+    now: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Check drift over every configured horizon by merging time buckets.
+
+    Args:
+        features: Features to check (default: all RISK_FEATURES).
+        now: Evaluation time (epoch seconds); defaults to the current time.
+
+    Returns:
+        Per-horizon drift reports plus the features that have no baseline
+        or no observations in a horizon.
+    """
+    features = RISK_FEATURES if features is None else features
+    horizons = {}
+    any_drift = False
+    for horizon in DRIFT_HORIZONS:
+        merged = {
+            name: _windows[name].merged(horizon, now) for name in features if name in _windows
+        }
+        reports = _feature_reports(merged)
+        drift = any(r["drift_detected"] for r in reports.values())
+        any_drift = any_drift or drift
+        horizons[horizon] = {
+            "drift_detected": drift,
+            "drifted_features": sorted(n for n, r in reports.items() if r["drift_detected"]),
+            "no_data": sorted(n for n in merged if n not in reports),
+            "feature_reports": reports,
         }
 
     return {
         "drift_detected": any_drift,
-        "feature_reports": feature_reports,
+        "horizons": horizons,
+        "features_checked": len(features),
+        "missing_baseline": [n for n in features if n not in _baseline],
         "ks_threshold": KS_THRESHOLD,
         "psi_threshold": PSI_THRESHOLD,
         "alert": any_drift,
@@ -0,0 +1,81 @@
+"""Scheduled drift evaluation.
+
+Every DRIFT_EVAL_INTERVAL_SEC the evaluator checks all risk features
+against their baselines, over the since-baseline window and every
+configured horizon, and caches the report. GET /drift serves the cached
+report, so a dashboard poll never re-runs the statistics.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Optional
+
+from app.monitor.drift import detect_drift, evaluate_horizons
+
+logger = logging.getLogger(__name__)
+
+DRIFT_EVAL_INTERVAL_SEC = float(os.getenv("DRIFT_EVAL_INTERVAL_SEC", "300"))
+
+_latest_report: Optional[Dict[str, Any]] = None
+_evaluator_task: Optional[asyncio.Task] = None
+
+
+def run_drift_evaluation(now: Optional[float] = None) -> Dict[str, Any]:
+    """Evaluate drift now and cache the report."""
+    global _latest_report
+    report = detect_drift()
+    windows = evaluate_horizons(now=now)
+    report["horizons"] = windows["horizons"]
+    report["features_checked"] = windows["features_checked"]
+    report["missing_baseline"] = windows["missing_baseline"]
+    report["drift_detected"] = report["drift_detected"] or windows["drift_detected"]
+    report["alert"] = report["drift_detected"]
+    _latest_report = report
+    return report
+
+
+def get_latest_report(refresh: bool = False) -> Dict[str, Any]:
+    """Return the cached report, evaluating first if there is none."""
+    if refresh or _latest_report is None:
+        return run_drift_evaluation()
+    return _latest_report
+
+
+def invalidate_report() -> None:
+    """Drop the cached report (e.g. after the baseline changes)."""
+    global _latest_report
+    _latest_report = None
+
+
+async def _evaluation_loop():
+    while True:
+        try:
+            report = run_drift_evaluation()
+            if report["drift_detected"]:
+                logger.warning(
+                    "Drift detected: "
+                    + ", ".join(
+                        f"{h}={r['drifted_features']}"
+                        for h, r in report["horizons"].items()
+                        if r["drift_detected"]
+                    )
+                )
+        except Exception as e:
+            logger.warning(f"Drift evaluation failed (non-fatal): {e}")
+        await asyncio.sleep(DRIFT_EVAL_INTERVAL_SEC)
+
+
+def start_drift_evaluator() -> None:
+    """Start the periodic evaluation loop (idempotent)."""
+    global _evaluator_task
+    if _evaluator_task is None or _evaluator_task.done():
+        _evaluator_task = asyncio.get_running_loop().create_task(_evaluation_loop())
+
+
+def stop_drift_evaluator() -> None:
+    """Cancel the periodic evaluation loop."""
+    global _evaluator_task
+    if _evaluator_task is not None:
+        _evaluator_task.cancel()
+        _evaluator_task = None
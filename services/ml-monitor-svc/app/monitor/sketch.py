@@ -0,0 +1,227 @@
+"""Bounded-memory feature sketches for drift detection.
+
+Each monitored feature keeps a FeatureSketch instead of its raw values:
+
+  - a fixed-bin histogram whose edges are taken from the baseline's
+    percentiles (discrete features get one bin per distinct value), used
+    for KS and PSI in O(bins);
+  - a QuantileSketch (log-bucketed, relative error ALPHA) for reporting
+    recent quantiles;
+  - running count / sum / sum of squares for mean and std.
+
+Sketches over the same edges can be merged, so windows can be combined
+without touching raw data.
+"""
+
+import math
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+SKETCH_BINS = 100      # histogram resolution (baseline percentiles)
+PSI_BUCKETS = 10       # PSI is computed over baseline deciles
+QUANTILE_ALPHA = 0.01  # relative accuracy of the quantile sketch
+QUANTILE_MAX_BINS = 512
+
+_PSI_EPS = 1e-6
+
+
+class QuantileSketch:
+    """Mergeable log-bucketed quantile sketch (DDSketch-style).
+
+    Values are mapped to buckets ceil(log_gamma(|x|)); quantiles are
+    returned with relative error QUANTILE_ALPHA. When a sign has more than
+    `max_bins` buckets the smallest-magnitude ones are collapsed, so memory
+    stays bounded.
+    """
+
+    __slots__ = ("alpha", "max_bins", "_gamma_log", "pos", "neg", "zeros", "count")
+
+    def __init__(self, alpha: float = QUANTILE_ALPHA, max_bins: int = QUANTILE_MAX_BINS):
+        self.alpha = alpha
+        self.max_bins = max_bins
+        self._gamma_log = math.log((1 + alpha) / (1 - alpha))
+        self.pos: Dict[int, int] = {}
+        self.neg: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+
+    def _add_side(self, store: Dict[int, int], magnitudes: np.ndarray) -> None:
+        idx = np.ceil(np.log(magnitudes) / self._gamma_log).astype(np.int64)
+        keys, counts = np.unique(idx, return_counts=True)
+        for k, c in zip(keys.tolist(), counts.tolist()):
+            store[k] = store.get(k, 0) + c
+        self._collapse(store)
+
+    def _collapse(self, store: Dict[int, int]) -> None:
+        if len(store) <= self.max_bins:
+            return
+        keys = sorted(store)
+        excess = keys[: len(keys) - self.max_bins + 1]
+        folded = sum(store.pop(k) for k in excess)
+        store[excess[-1]] = store.get(excess[-1], 0) + folded
+
+    def update(self, values: np.ndarray) -> None:
+        values = values[np.isfinite(values)]
+        if values.size == 0:
+            return
+        self.count += int(values.size)
+        pos = values[values > 0]
+        neg = values[values < 0]
+        self.zeros += int(values.size - pos.size - neg.size)
+        if pos.size:
+            self._add_side(self.pos, pos)
+        if neg.size:
+            self._add_side(self.neg, -neg)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        for mine, theirs in ((self.pos, other.pos), (self.neg, other.neg)):
+            for k, c in theirs.items():
+                mine[k] = mine.get(k, 0) + c
+            self._collapse(mine)
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def _value(self, key: int) -> float:
+        # Midpoint (in relative terms) of bucket (gamma^(k-1), gamma^k]
+        return 2 * math.exp(key * self._gamma_log) / (1 + math.exp(self._gamma_log))
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for k in sorted(self.neg, reverse=True):
+            seen += self.neg[k]
+            if seen > rank:
+                return -self._value(k)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for k in sorted(self.pos):
+            seen += self.pos[k]
+            if seen > rank:
+                return self._value(k)
+        return self._value(max(self.pos)) if self.pos else 0.0
+
+
+def baseline_edges(values: np.ndarray, bins: int = SKETCH_BINS) -> np.ndarray:
+    """Histogram edges at the baseline's percentiles (deduplicated)."""
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return np.array([0.0])
+    return np.unique(np.quantile(values, np.linspace(0.0, 1.0, bins + 1)))
+
+
+class FeatureSketch:
+    """Histogram + quantile sketch + moments for one feature.
+
+    Bin i counts values in [edges[i-1], edges[i]); bin 0 is everything
+    below edges[0] and the last bin everything at or above edges[-1].
+    """
+
+    __slots__ = ("edges", "counts", "n", "total", "total_sq", "quantiles")
+
+    def __init__(self, edges: np.ndarray):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.counts = np.zeros(self.edges.size + 1, dtype=np.int64)
+        self.n = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.quantiles = QuantileSketch()
+
+    @classmethod
+    def from_baseline(cls, values: Iterable[float], bins: int = SKETCH_BINS) -> "FeatureSketch":
+        arr = np.asarray(values, dtype=np.float64)
+        sketch = cls(baseline_edges(arr, bins))
+        sketch.update(arr)
+        return sketch
+
+    @classmethod
+    def from_histogram(cls, edges: np.ndarray, counts: np.ndarray, values) -> "FeatureSketch":
+        """Build a baseline sketch from precomputed (possibly repeated) edges.
+
+        Repeated edges only delimit empty bins, so they are dropped together
+        with those bins (see batch.histogram_rows for the layout).
+        """
+        keep = np.ones(edges.size, dtype=bool)
+        keep[1:] = edges[1:] != edges[:-1]
+        sketch = cls(edges[keep])
+        sketch.update(values, counts=counts[np.concatenate(([True], keep[1:], [True]))])
+        return sketch
+
+    def empty_like(self) -> "FeatureSketch":
+        return FeatureSketch(self.edges)
+
+    def update(self, values, counts: Optional[np.ndarray] = None) -> None:
+        """Add values; `counts` may carry their histogram if already computed."""
+        arr = np.atleast_1d(np.asarray(values, dtype=np.float64))
+        arr = arr[np.isfinite(arr)]
+        if arr.size == 0:
+            return
+        if counts is None:
+            counts = np.bincount(
+                np.searchsorted(self.edges, arr, side="right"), minlength=self.counts.size
+            )
+        self.counts += counts
+        self.n += int(arr.size)
+        self.total += float(arr.sum())
+        self.total_sq += float(np.dot(arr, arr))
+        self.quantiles.update(arr)
+
+    def merge(self, other: "FeatureSketch") -> None:
+        if other.edges.shape != self.edges.shape or not np.array_equal(other.edges, self.edges):
+            raise ValueError("Cannot merge sketches with different bin edges")
+        self.counts += other.counts
+        self.n += other.n
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.quantiles.merge(other.quantiles)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.n if self.n else 0.0
+
+    @property
+    def std(self) -> float:
+        if not self.n:
+            return 0.0
+        return math.sqrt(max(self.total_sq / self.n - self.mean ** 2, 0.0))
+
+    def summary(self, qs: Iterable[float] = (0.5, 0.9, 0.99)) -> Dict[str, Optional[float]]:
+        return {f"p{int(q * 100)}": self.quantiles.quantile(q) for q in qs}
+
+
+def ks_from_counts(expected: np.ndarray, actual: np.ndarray):
+    """Two-sample KS statistic and asymptotic p-value from binned counts.
+
+    The statistic is the largest CDF gap at the bin edges, which is exact
+    for features with one bin per distinct value and within one bin's
+    width otherwise.
+    """
+    from scipy.stats import kstwo
+
+    n, m = int(expected.sum()), int(actual.sum())
+    if n == 0 or m == 0:
+        return 0.0, 1.0
+    d = float(np.max(np.abs(np.cumsum(expected) / n - np.cumsum(actual) / m)))
+    # Same asymptotic p-value as scipy's ks_2samp(method="asymp")
+    return d, float(kstwo.sf(d, round(n * m / (n + m))))
+
+
+def psi_groups(baseline_counts: np.ndarray, buckets: int = PSI_BUCKETS) -> np.ndarray:
+    """Map each histogram bin to a PSI bucket by baseline cumulative mass."""
+    total = max(int(baseline_counts.sum()), 1)
+    before = (np.cumsum(baseline_counts) - baseline_counts) / total
+    return np.minimum((before * buckets).astype(np.int64), buckets - 1)
+
+
+def psi_from_counts(expected: np.ndarray, actual: np.ndarray, buckets: int = PSI_BUCKETS) -> float:
+    """Population Stability Index over baseline-decile buckets."""
+    n, m = expected.sum(), actual.sum()
+    if n == 0 or m == 0:
+        return 0.0
+    groups = psi_groups(expected, buckets)
+    e = np.bincount(groups, weights=expected, minlength=buckets) / n + _PSI_EPS
+    a = np.bincount(groups, weights=actual, minlength=buckets) / m + _PSI_EPS
+    return float(np.sum((a - e) * np.log(a / e)))
@@ -0,0 +1,87 @@
+"""Time-bucketed drift windows.
+
+Each horizon is a ring of FeatureSketch buckets of fixed duration; a
+bucket is recycled when the clock moves past it. Drift over a horizon is
+answered by merging the ring's live buckets, so no raw values are kept
+and a check costs O(buckets x bins) whatever the traffic volume.
+
+The window covered by a horizon is its full ring: the current (partial)
+bucket plus the previous n-1 complete ones.
+"""
+
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.monitor.sketch import FeatureSketch
+
+
+def _parse_horizons(spec: str) -> Dict[str, Tuple[int, int]]:
+    """Parse "1h=300x12,24h=3600x24" into {name: (bucket_sec, n_buckets)}."""
+    horizons = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, layout = part.split("=")
+        bucket_sec, n_buckets = layout.split("x")
+        horizons[name] = (int(bucket_sec), int(n_buckets))
+    return horizons
+
+
+# horizon -> (bucket width in seconds, number of buckets)
+DRIFT_HORIZONS = _parse_horizons(
+    os.getenv("DRIFT_HORIZONS", "1h=300x12,24h=3600x24,7d=21600x28")
+)
+
+
+class SketchRing:
+    """Ring of per-interval sketches sharing the baseline's bin edges."""
+
+    __slots__ = ("template", "bucket_sec", "n_buckets", "_buckets", "_stamps")
+
+    def __init__(self, template: FeatureSketch, bucket_sec: int, n_buckets: int):
+        self.template = template
+        self.bucket_sec = bucket_sec
+        self.n_buckets = n_buckets
+        # Buckets are allocated on first use
+        self._buckets: List[Optional[FeatureSketch]] = [None] * n_buckets
+        self._stamps: List[int] = [-1] * n_buckets
+
+    def _epoch(self, now: Optional[float]) -> int:
+        return int((time.time() if now is None else now) // self.bucket_sec)
+
+    def update(self, values, now: Optional[float] = None) -> None:
+        epoch = self._epoch(now)
+        slot = epoch % self.n_buckets
+        bucket = self._buckets[slot]
+        if bucket is None or self._stamps[slot] != epoch:
+            bucket = self._buckets[slot] = self.template.empty_like()
+            self._stamps[slot] = epoch
+        bucket.update(values)
+
+    def merged(self, now: Optional[float] = None) -> FeatureSketch:
+        """Merge every bucket still inside the horizon."""
+        oldest = self._epoch(now) - self.n_buckets + 1
+        out = self.template.empty_like()
+        for bucket, stamp in zip(self._buckets, self._stamps):
+            if bucket is not None and stamp >= oldest:
+                out.merge(bucket)
+        return out
+
+
+class WindowSet:
+    """One SketchRing per horizon for a single feature."""
+
+    __slots__ = ("rings",)
+
+    def __init__(self, template: FeatureSketch, horizons: Dict[str, Tuple[int, int]] = None):
+        horizons = DRIFT_HORIZONS if horizons is None else horizons
+        self.rings = {
+            name: SketchRing(template, bucket_sec, n_buckets)
+            for name, (bucket_sec, n_buckets) in horizons.items()
+        }
+
+    def update(self, values, now: Optional[float] = None) -> None:
+        for ring in self.rings.values():
+            ring.update(values, now)
+
+    def merged(self, horizon: str, now: Optional[float] = None) -> FeatureSketch:
+        return self.rings[horizon].merged(now)
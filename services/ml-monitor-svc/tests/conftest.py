@@ -3,3 +3,7 @@ import os
 
 # Add the parent directory to Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Keep the model registry out of the working tree
+import tempfile
+os.environ.setdefault("REGISTRY_DB_PATH", os.path.join(tempfile.mkdtemp(), "registry.db"))
@@ -0,0 +1,122 @@
+import numpy as np
+from scipy.stats import ks_2samp
+from starlette.testclient import TestClient
+
+from app.main import app
+from app.monitor import drift
+from app.monitor.sketch import FeatureSketch, QuantileSketch, ks_from_counts
+
+client = TestClient(app)
+
+
+def test_sketch_ks_matches_raw_samples():
+    rng = np.random.default_rng(0)
+    baseline = rng.normal(0, 1, 20000)
+    recent = rng.normal(0.1, 1, 20000)
+
+    b = FeatureSketch.from_baseline(baseline)
+    r = b.empty_like()
+    for chunk in np.array_split(recent, 50):
+        r.update(chunk)
+
+    d, p = ks_from_counts(b.counts, r.counts)
+    exact = ks_2samp(baseline, recent)
+    assert abs(d - exact.statistic) < 0.01
+    assert p < 0.05
+    assert r.counts.size == b.counts.size <= 102
+    assert abs(r.mean - recent.mean()) < 1e-9
+
+
+def test_quantile_sketch_relative_error_and_merge():
+    rng = np.random.default_rng(1)
+    values = rng.lognormal(3, 1, 50000)
+    left, right = QuantileSketch(), QuantileSketch()
+    left.update(values[:25000])
+    right.update(values[25000:])
+    left.merge(right)
+    for q in (0.5, 0.9, 0.99):
+        assert abs(left.quantile(q) / np.quantile(values, q) - 1) < 0.03
+
+
+def test_observe_endpoint_detects_shift():
+    rng = np.random.default_rng(2)
+    client.post("/drift/baseline", json={"features": {"cargo_weight": rng.normal(100, 10, 5000).tolist()}})
+
+    for _ in range(10):
+        r = client.post("/drift/observe", json={"features": {"cargo_weight": rng.normal(130, 10, 200).tolist(), "unknown": 1}})
+    assert r.json()["features"] == {"cargo_weight": 2000}
+    assert r.json()["ignored"] == ["unknown"]
+
+    report = client.get("/drift").json()
+    feature = report["feature_reports"]["cargo_weight"]
+    assert report["drift_detected"] is True
+    assert feature["psi_drift"] is True
+    assert feature["recent_n"] == 2000
+    assert abs(feature["recent_mean"] - 130) < 1.5
+    drift._baseline.clear()
+    drift._recent.clear()
+    drift._windows.clear()
+
+
+def test_horizons_merge_time_buckets():
+    from app.monitor.evaluator import run_drift_evaluation
+
+    rng = np.random.default_rng(3)
+    drift.set_baseline({"vision_confidence": rng.uniform(0, 1, 5000).tolist()})
+    now = 1_700_000_000.0
+    # Two days ago the feature shifted; the last hour looks like the baseline
+    drift.observe({"vision_confidence": rng.uniform(0.6, 1, 3000).tolist()}, now=now - 2 * 86400)
+    drift.observe({"vision_confidence": rng.uniform(0, 1, 3000).tolist()}, now=now - 60)
+
+    report = run_drift_evaluation(now=now)
+    horizons = report["horizons"]
+    assert horizons["1h"]["drift_detected"] is False
+    assert horizons["1h"]["feature_reports"]["vision_confidence"]["recent_n"] == 3000
+    assert horizons["24h"]["feature_reports"]["vision_confidence"]["recent_n"] == 3000
+    assert horizons["7d"]["drifted_features"] == ["vision_confidence"]
+    assert horizons["7d"]["feature_reports"]["vision_confidence"]["recent_n"] == 6000
+    assert report["features_checked"] == 25
+    assert "cargo_weight" in report["missing_baseline"]
+    drift._baseline.clear()
+    drift._recent.clear()
+    drift._windows.clear()
+
+
+def test_batch_matches_per_feature_statistics():
+    from app.monitor.batch import histogram_rows, quantile_edges, sort_rows, stack_features
+    from app.monitor.sketch import psi_from_counts
+
+    rng = np.random.default_rng(4)
+    baseline = {
+        "cargo_weight": rng.normal(100, 10, 4000),
+        "aeo_tier": rng.integers(0, 4, 3000).astype(float),
+        "vision_confidence": rng.uniform(0, 1, 2500),
+    }
+    recent = {
+        "cargo_weight": rng.normal(103, 10, 3500),
+        "aeo_tier": rng.integers(0, 3, 2000).astype(float),
+        "vision_confidence": rng.uniform(0, 1, 1000),
+    }
+
+    # detect_drift scores all features in one batch over the stacked sketches
+    drift.set_baseline(baseline)
+    report = drift.detect_drift(recent)["feature_reports"]
+    for name in baseline:
+        b, r = drift._baseline[name], drift._recent[name]
+        ks_stat, ks_p = ks_from_counts(b.counts, r.counts)
+        assert report[name]["ks_statistic"] == round(ks_stat, 4)
+        assert report[name]["ks_p_value"] == round(ks_p, 4)
+        assert report[name]["psi"] == round(psi_from_counts(b.counts, r.counts), 4)
+        assert abs(ks_stat - ks_2samp(baseline[name], recent[name]).statistic) < 0.02
+    drift._baseline.clear()
+    drift._recent.clear()
+    drift._windows.clear()
+
+    names, X = stack_features(baseline)
+    S, n = sort_rows(X)
+    edges = quantile_edges(S, n)
+    counts = histogram_rows(S, n, edges)
+    for j, name in enumerate(names):
+        assert np.allclose(edges[j], np.quantile(baseline[name], np.linspace(0, 1, 101)))
+        expected = np.bincount(np.searchsorted(edges[j], baseline[name], side="right"), minlength=102)
+        assert np.array_equal(counts[j], expected)
@@ -1,3 +1,4 @@
+import numpy as np
 from starlette.testclient import TestClient
 
 from app.main import app
@@ -23,3 +24,79 @@ def test_ab_report():
     assert response.status_code == 200
     body = response.json()
     assert "winner" in body
+
+
+def test_ab_counters_and_history(monkeypatch):
+    from app.ab_test import ab_test
+
+    monkeypatch.setattr(ab_test, "AB_HISTORY_BUCKET_SEC", 60)
+    monkeypatch.setattr(ab_test, "AB_HISTORY_BUCKETS", 3)
+    client.post("/ab/start", json={"model_a": "v1", "model_b": "v2", "traffic_split": 50})
+
+    t0 = 6000.0
+    for i in range(40):
+        ab_test.record_result("a", "GREEN", "GREEN" if i % 4 else "RED", now=t0)
+        ab_test.record_result("b", "GREEN", "GREEN", now=t0 + 60)
+    ab_test.record_result("a", "YELLOW", now=t0 + 60)
+    ab_test.record_result("b", "RED", "RED", now=t0 + 240)  # first two buckets expire
+
+    body = client.get("/ab?history=true").json()
+    a, b = body["model_a"], body["model_b"]
+    assert (a["total_predictions"], a["evaluated"], a["correct"]) == (41, 40, 30)
+    assert a["confusion"]["RED"]["GREEN"] == 10
+    assert (b["evaluated"], b["correct"], b["confusion"]["RED"]["RED"]) == (41, 41, 1)
+    # 40 samples per arm are not yet conclusive for the sequential test
+    assert body["recommendation"] == "continue" and body["sequential"]["p_value"] > 0.05
+    assert [h["model_b"]["evaluated"] for h in body["history"]] == [1]
+
+
+def _first_rejection(p_a, p_b, runs, steps, share_b, seed):
+    """Simulate A/B tests checked after every result; step of first p < alpha."""
+    import numpy as np
+
+    from app.ab_test.sequential import AB_SEQ_ALPHA, AB_SEQ_MIN_SAMPLES, msprt_log_lr
+
+    rng = np.random.default_rng(seed)
+    to_b = rng.random((runs, steps)) < share_b
+    correct = rng.random((runs, steps)) < np.where(to_b, p_b, p_a)
+    n_b = np.cumsum(to_b, axis=1)
+    n_a = np.arange(1, steps + 1) - n_b
+    c_b = np.cumsum(correct & to_b, axis=1)
+    c_a = np.cumsum(correct & ~to_b, axis=1)
+    log_lr = msprt_log_lr(n_a, c_a, n_b, c_b)
+    looks = (n_a >= AB_SEQ_MIN_SAMPLES) & (n_b >= AB_SEQ_MIN_SAMPLES)
+    crossed = looks & (log_lr >= np.log(1 / AB_SEQ_ALPHA))
+    return np.where(crossed.any(axis=1), crossed.argmax(axis=1), -1)
+
+
+def test_sequential_test_controls_false_positives_under_continuous_peeking():
+    # A/A: same accuracy in both arms, checked after every single result
+    for share_b in (0.5, 0.1):
+        stops = _first_rejection(0.9, 0.9, runs=400, steps=4000, share_b=share_b, seed=7)
+        assert (stops >= 0).mean() <= 0.05
+
+    # A clearly better challenger is still found, well before the horizon
+    stops = _first_rejection(0.85, 0.92, runs=200, steps=4000, share_b=0.5, seed=8)
+    assert (stops >= 0).mean() > 0.9
+    assert np.median(stops[stops >= 0]) < 2000
+
+
+def test_sequential_decision_is_fixed_at_the_crossing_look():
+    from app.ab_test import ab_test
+
+    client.post("/ab/start", json={"model_a": "v1", "model_b": "v2", "traffic_split": 50})
+    for i in range(300):
+        ab_test.record_result("a", "GREEN", "GREEN" if i % 4 else "RED")
+        ab_test.record_result("b", "GREEN", "GREEN")
+    decided = client.get("/ab").json()
+    assert decided["recommendation"] == "promote_model_b"
+    look = decided["sequential"]["decided_at_look"]
+    assert look is not None
+
+    # B then makes enough mistakes to fall behind A on raw accuracy
+    for _ in range(400):
+        ab_test.record_result("b", "GREEN", "RED")
+    body = client.get("/ab").json()
+    assert body["model_b"]["accuracy"] < body["model_a"]["accuracy"]
+    assert body["recommendation"] == "promote_model_b" and body["promote"] is True
+    assert body["sequential"]["decided_at_look"] == look
@@ -0,0 +1,101 @@
+import asyncio
+import socket
+import sqlite3
+
+import pytest
+
+from app.mlflow import registry
+
+
+@pytest.fixture
+def fresh_registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "REGISTRY_DB_PATH", str(tmp_path / "registry.db"))
+    monkeypatch.setattr(registry, "REGISTRY_WEBHOOKS", "risk-xgboost=http://risk-svc:8000/model/reload")
+    monkeypatch.setattr(registry, "_conn", None)
+    monkeypatch.setattr(registry, "_listeners", [])
+    registry._invalidate_production_cache()
+    yield registry
+    registry._conn.close()
+    monkeypatch.setattr(registry, "_conn", None)
+    registry._invalidate_production_cache()
+
+
+def test_registry_persists_promotes_and_notifies(fresh_registry, monkeypatch):
+    events, posted = [], []
+    fresh_registry.add_listener(events.append)
+
+    async def _fake_post(url, event):
+        posted.append((url, event["version"]))
+
+    monkeypatch.setattr(fresh_registry, "_post_webhook", _fake_post)
+
+    assert fresh_registry.get_production_model("risk-xgboost")["version"] == "v1.0.0"
+    fresh_registry.register_model("risk-xgboost", "v1.1.0", {"accuracy": 0.95}, artifact_uri="/models/v1.1.0.json")
+    assert fresh_registry.register_model("risk-xgboost", "v1.1.0")["status"] == "exists"
+
+    async def _promote():
+        result = fresh_registry.promote_model("risk-xgboost", "v1.1.0")
+        await asyncio.gather(*fresh_registry._webhook_tasks)
+        return result
+
+    assert asyncio.run(_promote())["status"] == "promoted"
+    fresh_registry.register_model("vision-yolov8", "v1.1.0", stage="Production")  # not subscribed
+    assert fresh_registry.get_production_model("risk-xgboost")["artifact_uri"] == "/models/v1.1.0.json"
+    assert [(e["name"], e["version"]) for e in events] == [("risk-xgboost", "v1.1.0"), ("vision-yolov8", "v1.1.0")]
+    assert posted == [("http://risk-svc:8000/model/reload", "v1.1.0")]
+
+    # A second process (connection) sees the promotion after reopening,
+    # and an external commit refreshes this process's production cache
+    other = sqlite3.connect(fresh_registry.REGISTRY_DB_PATH)
+    stages = dict(other.execute("SELECT version, stage FROM model_versions WHERE name = 'risk-xgboost'"))
+    assert stages == {"v1.0.0": "Archived", "v1.1.0": "Production"}
+    other.execute("UPDATE model_versions SET stage = 'Production' WHERE name = 'vision-yolov8'")
+    other.execute("INSERT INTO model_versions (name, version, stage, registered_at, updated_at) "
+                  "VALUES ('vision-yolov8', 'v2.0.0', 'Production', 'x', 'x')")
+    other.commit()
+    other.close()
+    assert fresh_registry.get_production_model("vision-yolov8")["version"] == "v2.0.0"
+
+    indexes = {row[1] for row in fresh_registry._db().execute("PRAGMA index_list(model_versions)")}
+    assert "idx_model_versions_name_stage" in indexes
+
+
+def test_webhook_config_and_replica_fanout(monkeypatch):
+    assert registry.parse_webhooks(" risk-xgboost=http://risk-svc:8000/model/reload, http://audit/hook?x=1 ") == [
+        ("http://risk-svc:8000/model/reload", "risk-xgboost"),
+        ("http://audit/hook?x=1", None),
+    ]
+
+    def fake_getaddrinfo(host, port, *args, **kwargs):
+        ips = {"risk-pods": ["10.0.0.2", "10.0.0.1"], "risk-svc": ["10.9.0.1"]}[host]
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (ip, port)) for ip in ips]
+
+    monkeypatch.setattr(socket, "getaddrinfo", fake_getaddrinfo)
+    fanout = asyncio.run(registry._webhook_targets("http://risk-pods:8000/model/reload"))
+    assert fanout == [
+        ("http://10.0.0.1:8000/model/reload", {"Host": "risk-pods:8000"}),
+        ("http://10.0.0.2:8000/model/reload", {"Host": "risk-pods:8000"}),
+    ]
+    single = "http://risk-svc:8000/model/reload"
+    assert asyncio.run(registry._webhook_targets(single)) == [(single, {})]
+
+
+def test_subscribe_rejects_unconfigured_hosts(fresh_registry, monkeypatch):
+    from starlette.testclient import TestClient
+
+    from app.main import app
+
+    client = TestClient(app)
+    for url in ("http://169.254.169.254/latest/meta-data", "file:///etc/passwd", "http://risk-svc.evil.com/x"):
+        r = client.post("/registry/subscribe", json={"url": url})
+        assert r.status_code == 400, url
+
+    r = client.post("/registry/subscribe", json={"url": "https://risk-svc:8443/model/reload", "name": "risk-xgboost"})
+    assert r.status_code == 200
+    monkeypatch.setattr(fresh_registry, "REGISTRY_SUBSCRIBE_HOSTS", {"audit.internal"})
+    assert client.post("/registry/subscribe", json={"url": "http://audit.internal/hook"}).status_code == 200
+    assert sorted(fresh_registry._subscribers("risk-xgboost")) == [
+        "http://audit.internal/hook",
+        "http://risk-svc:8000/model/reload",
+        "https://risk-svc:8443/model/reload",
+    ]
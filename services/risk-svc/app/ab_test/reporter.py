@@ -0,0 +1,100 @@
+"""Batched, asynchronous A/B outcome reporting to ml-monitor-svc.
+
+/score only appends (arm, predicted lane) to an in-memory buffer; a
+background task posts the buffer to ml-monitor-svc's /ab/record every
+AB_FLUSH_INTERVAL_SEC, or sooner once AB_FLUSH_BATCH results are waiting.
+The buffer is bounded (AB_BUFFER_MAX): if ml-monitor-svc is unreachable
+for long, the oldest results are dropped rather than slowing scoring.
+"""
+
+import asyncio
+import logging
+import os
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ML_MONITOR_URL = os.getenv("ML_MONITOR_URL", "http://ml-monitor-svc:8000")
+AB_FLUSH_INTERVAL_SEC = float(os.getenv("AB_FLUSH_INTERVAL_SEC", "5"))
+AB_FLUSH_BATCH = int(os.getenv("AB_FLUSH_BATCH", "500"))
+AB_BUFFER_MAX = int(os.getenv("AB_BUFFER_MAX", "50000"))
+
+_buffer: Deque[Dict[str, Any]] = deque(maxlen=AB_BUFFER_MAX)
+_wakeup: Optional[asyncio.Event] = None
+_reporter_task: Optional[asyncio.Task] = None
+
+
+def record_outcome(arm: str, predicted_lane: str, actual_lane: Optional[str] = None) -> None:
+    """Queue one result for the next batch (never blocks, never raises)."""
+    _buffer.append({"model": arm, "predicted": predicted_lane, "actual": actual_lane})
+    if _wakeup is not None and len(_buffer) >= AB_FLUSH_BATCH:
+        _wakeup.set()
+
+
+def _drain(limit: int) -> List[Dict[str, Any]]:
+    batch = []
+    while _buffer and len(batch) < limit:
+        batch.append(_buffer.popleft())
+    return batch
+
+
+async def _post_batch(client, batch: List[Dict[str, Any]]) -> bool:
+    try:
+        resp = await client.post(f"{ML_MONITOR_URL}/ab/record", json={"results": batch})
+        return resp.status_code == 200
+    except Exception as e:
+        logger.warning(f"Failed to report A/B outcomes: {e}")
+        return False
+
+
+async def flush_outcomes(client) -> int:
+    """Send everything buffered, AB_FLUSH_BATCH results per request.
+
+    A failed batch is put back at the front of the buffer and the flush
+    stops until the next cycle. Returns the number of results sent.
+    """
+    sent = 0
+    while _buffer:
+        batch = _drain(AB_FLUSH_BATCH)
+        if not await _post_batch(client, batch):
+            _buffer.extendleft(reversed(batch))
+            break
+        sent += len(batch)
+    return sent
+
+
+async def _reporter_loop():
+    import httpx
+
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(_wakeup.wait(), AB_FLUSH_INTERVAL_SEC)
+                except asyncio.TimeoutError:
+                    pass
+                _wakeup.clear()
+                await flush_outcomes(client)
+        finally:
+            await flush_outcomes(client)
+
+
+def start_outcome_reporter() -> None:
+    """Start the background flush task (idempotent)."""
+    global _reporter_task, _wakeup
+    if _reporter_task is None or _reporter_task.done():
+        _wakeup = asyncio.Event()
+        _reporter_task = asyncio.get_running_loop().create_task(_reporter_loop())
+
+
+async def stop_outcome_reporter() -> None:
+    """Stop the flush task after a final flush."""
+    global _reporter_task
+    if _reporter_task is not None:
+        _reporter_task.cancel()
+        try:
+            await _reporter_task
+        except asyncio.CancelledError:
+            pass
+        _reporter_task = None
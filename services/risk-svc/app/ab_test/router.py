@@ -0,0 +1,130 @@
+"""In-process A/B routing between the champion and challenger risk models.
+
+Both models stay loaded in memory. Each request is routed by hashing its
+clearance (or container) id into one of 10,000 slots: slots below the
+challenger's share go to the challenger. The same id always lands on the
+same model, in every worker, for as long as the split is unchanged.
+Requests without an id are scored by the champion.
+
+Configured from the environment at startup (AB_CHALLENGER_MODEL_PATH,
+AB_TRAFFIC_SPLIT) or at runtime through POST /ab.
+"""
+
+import hashlib
+import logging
+import os
+from typing import Any, Dict, Optional, Tuple
+
+from app.model.predict import load_model, model_holder, predict_with_model, warm_up
+
+logger = logging.getLogger(__name__)
+
+AB_CHALLENGER_VERSION = os.getenv("AB_CHALLENGER_VERSION", "")
+AB_CHALLENGER_MODEL_PATH = os.getenv("AB_CHALLENGER_MODEL_PATH", "")
+AB_TRAFFIC_SPLIT = float(os.getenv("AB_TRAFFIC_SPLIT", "10"))  # % to challenger
+
+_SLOTS = 10_000
+
+
+class ModelArm:
+    """One loaded model and the version it reports."""
+
+    __slots__ = ("arm", "version", "model")
+
+    def __init__(self, arm: str, version: str, model):
+        self.arm = arm
+        self.version = version
+        self.model = model
+
+
+def route_slot(key: str) -> int:
+    """Stable slot in [0, 10000) for a routing key (same in every process)."""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % _SLOTS
+
+
+class ABRouter:
+    """Champion/challenger pair with a deterministic traffic split."""
+
+    def __init__(self):
+        # (champion version label or None, challenger or None, challenger
+        # slots); swapped as a whole. The champion model itself is always
+        # the serving model in predict.model_holder.
+        self._state: Tuple[Optional[str], Optional[ModelArm], int] = (None, None, 0)
+
+    @property
+    def active(self) -> bool:
+        return self._state[1] is not None
+
+    def _champion(self) -> ModelArm:
+        current = model_holder.get()
+        return ModelArm("a", self._state[0] or current.version, current.model)
+
+    def configure(
+        self,
+        challenger_path: Optional[str] = None,
+        challenger_version: str = "",
+        traffic_split: float = AB_TRAFFIC_SPLIT,
+        champion_version: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Load a challenger (or clear it with no path) and set the split.
+
+        Raises:
+            ValueError: If the split is outside 0-100 or the challenger
+                model cannot be loaded.
+        """
+        if not 0 <= traffic_split <= 100:
+            raise ValueError("traffic_split must be between 0 and 100")
+        champion_version = champion_version or self._state[0]
+
+        challenger = None
+        if challenger_path:
+            model = load_model(challenger_path)
+            if model is None:
+                raise ValueError(f"Cannot load challenger model from {challenger_path}")
+            warm_up(model)
+            challenger = ModelArm("b", challenger_version or os.path.basename(challenger_path), model)
+
+        self._state = (champion_version, challenger, round(traffic_split * _SLOTS / 100))
+        logger.info(
+            f"A/B routing: {self._champion().version} vs "
+            f"{challenger.version if challenger else '-'} ({traffic_split}% challenger)"
+        )
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        _, challenger, slots = self._state
+        return {
+            "active": challenger is not None,
+            "champion": self._champion().version,
+            "challenger": challenger.version if challenger else None,
+            "traffic_split": slots * 100 / _SLOTS if challenger else 0.0,
+        }
+
+    def route(self, key: Optional[str]) -> ModelArm:
+        champion = self._champion()
+        _, challenger, slots = self._state
+        if challenger is None or not key:
+            return champion
+        return challenger if route_slot(key) < slots else champion
+
+    def score(self, features: Dict, key: Optional[str] = None, explain: bool = False) -> Tuple[ModelArm, Dict]:
+        arm = self.route(key)
+        result = predict_with_model(arm.model, features, explain)
+        result["model_version"] = arm.version
+        if self.active:
+            result["ab_arm"] = arm.arm
+        return arm, result
+
+
+router = ABRouter()
+
+
+def configure_from_env() -> None:
+    """Load the challenger named by AB_CHALLENGER_MODEL_PATH, if any."""
+    if not AB_CHALLENGER_MODEL_PATH:
+        return
+    try:
+        router.configure(AB_CHALLENGER_MODEL_PATH, AB_CHALLENGER_VERSION, AB_TRAFFIC_SPLIT)
+    except ValueError as e:
+        logger.warning(f"A/B challenger not loaded: {e}")
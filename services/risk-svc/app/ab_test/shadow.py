@@ -0,0 +1,173 @@
+"""Shadow scoring: run a candidate model on live traffic without using it.
+
+When a shadow model is set, a sampled share of /score requests
+(SHADOW_SAMPLE_RATE) is scored again by the shadow model in a background
+task that runs after the response has been sent, so decisions and
+latency are untouched. Only aggregates are kept:
+
+  - lane agreement with the served model and a served→shadow lane matrix;
+  - a histogram of risk_score deltas (shadow − served) in
+    SHADOW_DELTA_BIN-point bins over [-100, 100].
+
+At most SHADOW_MAX_PENDING shadow scores may be running at a time;
+beyond that, sampled requests are skipped and counted as dropped. The
+slot is taken and released by the background task itself, so a task
+that never runs (the client disconnected) holds nothing.
+"""
+
+import logging
+import os
+import random
+import threading
+from typing import Any, Dict, Optional
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from app.ab_test.router import ModelArm
+from app.model.predict import LANE_MAP, load_model, predict_with_model, warm_up
+
+logger = logging.getLogger(__name__)
+
+SHADOW_MODEL_PATH = os.getenv("SHADOW_MODEL_PATH", "")
+SHADOW_MODEL_VERSION = os.getenv("SHADOW_MODEL_VERSION", "")
+SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", "1.0"))
+SHADOW_MAX_PENDING = int(os.getenv("SHADOW_MAX_PENDING", "32"))
+SHADOW_DELTA_BIN = 5.0
+
+_DELTA_EDGES = np.arange(-100.0, 100.0 + SHADOW_DELTA_BIN, SHADOW_DELTA_BIN)
+_LANES = list(LANE_MAP.values())
+
+
+class ShadowScorer:
+    """Optional shadow model plus its comparison counters."""
+
+    def __init__(self):
+        self.arm: Optional[ModelArm] = None
+        self.sample_rate = SHADOW_SAMPLE_RATE
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._reset_counters()
+
+    def _reset_counters(self) -> None:
+        self.seen = 0
+        self.sampled = 0
+        self.dropped = 0
+        self.scored = 0
+        self.agreed = 0
+        self.lanes = {served: {shadow: 0 for shadow in _LANES} for served in _LANES}
+        self.delta_counts = np.zeros(_DELTA_EDGES.size - 1, dtype=np.int64)
+        self.delta_sum = 0.0
+        self.delta_abs_sum = 0.0
+
+    @property
+    def active(self) -> bool:
+        return self.arm is not None
+
+    def configure(
+        self,
+        model_path: Optional[str] = None,
+        version: str = "",
+        sample_rate: float = SHADOW_SAMPLE_RATE,
+    ) -> Dict[str, Any]:
+        """Set (or clear, with no path) the shadow model; counters restart.
+
+        Raises:
+            ValueError: If the rate is outside 0-1 or the model cannot be loaded.
+        """
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        arm = None
+        if model_path:
+            model = load_model(model_path)
+            if model is None:
+                raise ValueError(f"Cannot load shadow model from {model_path}")
+            warm_up(model)
+            arm = ModelArm("shadow", version or os.path.basename(model_path), model)
+        with self._lock:
+            self.arm = arm
+            self.sample_rate = sample_rate
+            self._reset_counters()
+        return self.report()
+
+    def should_shadow(self) -> bool:
+        """Decide, on the request path, whether this request is sampled."""
+        if self.arm is None:
+            return False
+        with self._lock:
+            self.seen += 1
+            if random.random() >= self.sample_rate:
+                return False
+            self.sampled += 1
+            return True
+
+    async def score(self, features: Dict, served: Dict) -> None:
+        """Response background task: shadow-score in the threadpool if a slot is free."""
+        with self._lock:
+            if self._pending >= SHADOW_MAX_PENDING:
+                self.dropped += 1
+                return
+            self._pending += 1
+        try:
+            await run_in_threadpool(self._score, features, served)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _score(self, features: Dict, served: Dict) -> None:
+        """Score `features` with the shadow model and fold in the comparison."""
+        arm = self.arm
+        try:
+            if arm is None:
+                return
+            result = predict_with_model(arm.model, features)
+        except Exception as e:
+            logger.warning(f"Shadow scoring failed: {e}")
+            return
+
+        delta = result["risk_score"] - served["risk_score"]
+        bin_idx = min(max(int(np.searchsorted(_DELTA_EDGES, delta, side="right")) - 1, 0), self.delta_counts.size - 1)
+        with self._lock:
+            if arm is not self.arm:
+                return  # model swapped while scoring
+            self.scored += 1
+            self.agreed += result["lane"] == served["lane"]
+            row = self.lanes.setdefault(served["lane"], {})
+            row[result["lane"]] = row.get(result["lane"], 0) + 1
+            self.delta_counts[bin_idx] += 1
+            self.delta_sum += delta
+            self.delta_abs_sum += abs(delta)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            n = self.scored
+            return {
+                "active": self.arm is not None,
+                "version": self.arm.version if self.arm else None,
+                "sample_rate": self.sample_rate,
+                "requests_seen": self.seen,
+                "sampled": self.sampled,
+                "dropped": self.dropped,
+                "scored": n,
+                "lane_agreement": round(self.agreed / n, 4) if n else None,
+                "lane_matrix": {served: dict(row) for served, row in self.lanes.items()},
+                "score_delta": {
+                    "mean": round(self.delta_sum / n, 4) if n else None,
+                    "mean_abs": round(self.delta_abs_sum / n, 4) if n else None,
+                    "bin_edges": _DELTA_EDGES.tolist(),
+                    "counts": self.delta_counts.tolist(),
+                },
+            }
+
+
+shadow = ShadowScorer()
+
+
+def configure_shadow_from_env() -> None:
+    """Load the shadow model named by SHADOW_MODEL_PATH, if any."""
+    if not SHADOW_MODEL_PATH:
+        return
+    try:
+        shadow.configure(SHADOW_MODEL_PATH, SHADOW_MODEL_VERSION, SHADOW_SAMPLE_RATE)
+    except ValueError as e:
+        logger.warning(f"Shadow model not loaded: {e}")
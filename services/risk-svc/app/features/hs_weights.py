@@ -0,0 +1,171 @@
+"""HS code risk weights, hot-reloaded from tariff-sync-svc.
+
+A code's weight comes from the most specific known entry covering it
+(tariff line → subheading → heading → chapter, see shared/hs_index.py),
+so "847130", "8471.30.10" and "8471.30" all resolve to the "8471.30"
+weight, and a chapter-level entry covers every code under it.
+
+The live weights are one immutable, versioned WeightTable. An update
+never touches it: the new table is built next to it, validated, and
+installed with a single reference assignment, so a scoring request sees
+either the old table or the new one, never a mix. Assembly reports the
+version it used (batches pin one table for all their rows).
+Updates either merge into the current table or replace it outright, so
+codes CBIC has dropped disappear.
+
+tariff-sync-svc pushes deltas: changed codes, removed codes, the content
+hash of the tariff they were computed from (kept as the table's source)
+and the hash they were computed against. A delta whose base is not the
+live table's source (risk-svc restarted, or a push was lost) is refused
+with WeightsConflict, and the sender falls back to a full replace.
+"""
+
+import logging
+import math
+import os
+import sys
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Dict, Iterable, Mapping, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "..", "shared"))
+try:
+    from hs_index import HSIndex, normalize_hs_code
+    _HAS_HS_INDEX = True
+except ImportError:  # image built from the service directory alone
+    _HAS_HS_INDEX = False
+
+logger = logging.getLogger(__name__)
+
+HS_WEIGHT_MAX = float(os.getenv("HS_WEIGHT_MAX", "10.0"))
+
+# Default HS code risk weights (until tariff-sync-svc populates them)
+HS_RISK_WEIGHTS: Mapping[str, float] = MappingProxyType({
+    "8471.30": 1.2,  # Electronics
+    "7108.12": 1.8,  # Gold
+    "8542.31": 1.4,  # ICs
+    "3004.90": 1.5,  # Pharmaceuticals
+    "9306.30": 2.5,  # Ammunition
+    "2933.39": 2.0,  # Chemical precursors
+})
+
+
+class WeightsConflict(ValueError):
+    """A delta update computed against a table other than the live one."""
+
+
+class WeightTable:
+    """One immutable version of the HS weights plus its prefix index."""
+
+    __slots__ = ("version", "weights", "index", "source", "updated_at")
+
+    def __init__(self, weights: Dict[str, float], version: int, source: Optional[str] = None):
+        self.version = version
+        self.weights: Mapping[str, float] = MappingProxyType(dict(weights))
+        self.index = HSIndex(self.weights) if _HAS_HS_INDEX else None
+        self.source = source
+        self.updated_at = datetime.now(timezone.utc).isoformat()
+
+    def weight(self, hs_code) -> float:
+        if self.index is None:
+            return self.weights.get(str(hs_code)[:7], 1.0)
+        return self.index.get(hs_code, 1.0)
+
+    def info(self) -> Dict:
+        return {
+            "version": self.version,
+            "size": len(self.weights),
+            "source": self.source,
+            "updated_at": self.updated_at,
+        }
+
+
+_table = WeightTable(HS_RISK_WEIGHTS, version=1)
+# Table pinned by the assembly in progress (see pin_weights)
+_pinned: ContextVar[Optional[WeightTable]] = ContextVar("hs_weights_pinned", default=None)
+# Serialises writers; readers never lock
+_update_lock = threading.Lock()
+
+
+def current_weights() -> WeightTable:
+    return _table
+
+
+def pin_weights():
+    """Pin the current table for this context; returns (table, token for unpin)."""
+    table = _table
+    return table, _pinned.set(table)
+
+
+def unpin_weights(token) -> None:
+    _pinned.reset(token)
+
+
+def hs_risk_weight(hs_code) -> float:
+    """Risk weight of the most specific known prefix of an HS code (1.0 if none)."""
+    return (_pinned.get() or _table).weight(hs_code)
+
+
+def validate_weights(weights) -> Dict[str, float]:
+    """Check an incoming weight map; raises ValueError listing the bad entries."""
+    if not isinstance(weights, dict):
+        raise ValueError("weights must be an object of HS code → weight")
+    problems = []
+    for code, weight in weights.items():
+        digits = normalize_hs_code(code) if _HAS_HS_INDEX else str(code)
+        if not isinstance(code, str) or not 2 <= len(digits) <= 10:
+            problems.append(f"{code!r}: not an HS code")
+        elif isinstance(weight, bool) or not isinstance(weight, (int, float)):
+            problems.append(f"{code!r}: weight must be a number")
+        elif not (math.isfinite(weight) and 0.0 <= weight <= HS_WEIGHT_MAX):
+            problems.append(f"{code!r}: weight {weight} outside [0, {HS_WEIGHT_MAX}]")
+    if problems:
+        shown = "; ".join(problems[:10])
+        more = f" (+{len(problems) - 10} more)" if len(problems) > 10 else ""
+        raise ValueError(f"Invalid HS weights: {shown}{more}")
+    return {code: float(weight) for code, weight in weights.items()}
+
+
+def update_hs_risk_weights(
+    new_weights: Dict[str, float],
+    replace: bool = False,
+    removed: Iterable[str] = (),
+    base_source: Optional[str] = None,
+    source: Optional[str] = None,
+) -> WeightTable:
+    """Hot-reload HS code risk weights from tariff-sync-svc.
+
+    Called when tariff-sync-svc detects an update from CBIC API. Merges
+    new_weights into the current table and drops the removed codes, or
+    with replace=True makes new_weights the whole table. A merge with a
+    base_source raises WeightsConflict unless the live table was built
+    from that source. Raises ValueError (nothing changes) if validation
+    fails.
+    """
+    global _table
+    weights = validate_weights(new_weights)
+    removed = [removed] if isinstance(removed, str) else list(removed)
+    if not all(isinstance(code, str) for code in removed):
+        raise ValueError("removed must be a list of HS codes")
+    if replace and not weights:
+        raise ValueError("Refusing to replace the HS weights with an empty table")
+    with _update_lock:
+        if not replace and base_source is not None and base_source != _table.source:
+            raise WeightsConflict(
+                f"Delta is based on {base_source!r}, live table is {_table.source!r}"
+            )
+        base = {} if replace else dict(_table.weights)
+        for code in removed:
+            base.pop(code, None)
+        base.update(weights)
+        table = WeightTable(base, _table.version + 1, source=source)
+        _table = table
+    mode = "Replaced" if replace else "Updated"
+    dropped = f", {len(removed)} removed" if removed else ""
+    logger.info(
+        f"{mode} {len(weights)} HS risk weights{dropped} "
+        f"(version {table.version}, {len(table.weights)} codes)"
+    )
+    return table
@@ -0,0 +1,434 @@
+"""Risk feature schema — every model feature defined once.
+
+Each Feature has a name, a dtype and a derivation written as a small
+expression over the raw scoring payload:
+
+    Num / Text / Raw(key, default)  payload value, default when absent
+    Encode(key, mapping, missing)   categorical code (0 if unmapped)
+    Truthy(x)                       1 / 0
+    Given(key, fallback)            the payload value unless absent/None
+    Lookup(fn, x)                   a table lookup (HS weight, sanctions)
+    Max, Log, + - * /, Ref(name)    arithmetic, earlier features
+
+FEATURES is compiled at import into two straight-line functions:
+
+  - a scalar one over one payload dict (the /score path), returning a
+    tuple in FEATURE_COLUMNS order;
+  - a vectorized one over a table of payloads (NumPy/pandas columns;
+    lookups run once per distinct value), used for batch scoring and
+    to build the training set.
+
+Both come from the same expressions and give bit-identical values, so
+serving and training cannot drift apart. A null cell in a table counts
+as an absent key.
+"""
+
+import math
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from app.features.hs_weights import hs_risk_weight
+from app.features.ofac import check_interpol_alert, check_ofac_match, check_un_sanctions
+from app.features.origin_risk import get_origin_risk_index
+
+VISION_CLASS_MAP = {
+    "none": 0,
+    "weapon": 1,
+    "narcotic": 2,
+    "undeclared_goods": 3,
+    "density_anomaly": 4,
+}
+
+CARGO_CATEGORY_MAP = {
+    "unknown": 0,
+    "electronics": 1,
+    "textiles": 2,
+    "chemicals": 3,
+    "metals": 4,
+    "food": 5,
+    "machinery": 6,
+    "pharmaceuticals": 7,
+}
+
+
+# ------------------------------------------------------------------
+# Expressions: each renders itself as scalar and as vectorized source
+# ------------------------------------------------------------------
+
+class _Compiler:
+    """Names bound into the generated code (refs, lookup tables, temps)."""
+
+    def __init__(self):
+        self.namespace: Dict[str, object] = {"math": math, "np": np}
+        self.refs: Dict[str, str] = {}
+        self._temps = 0
+
+    def bind(self, obj) -> str:
+        name = f"_b{len(self.namespace)}"
+        self.namespace[name] = obj
+        return name
+
+    def temp(self) -> str:
+        self._temps += 1
+        return f"_t{self._temps}"
+
+
+class Expr:
+    yields_int = False
+
+    def scalar(self, ctx: _Compiler) -> str:
+        raise NotImplementedError
+
+    def vector(self, ctx: _Compiler) -> str:
+        raise NotImplementedError
+
+    def __add__(self, other):
+        return BinOp("+", self, other)
+
+    def __radd__(self, other):
+        return BinOp("+", other, self)
+
+    def __sub__(self, other):
+        return BinOp("-", self, other)
+
+    def __rsub__(self, other):
+        return BinOp("-", other, self)
+
+    def __mul__(self, other):
+        return BinOp("*", self, other)
+
+    def __rmul__(self, other):
+        return BinOp("*", other, self)
+
+    def __truediv__(self, other):
+        return BinOp("/", self, other)
+
+
+def _expr(value) -> Expr:
+    return value if isinstance(value, Expr) else Const(value)
+
+
+class Const(Expr):
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self, ctx):
+        return repr(self.value)
+
+    vector = scalar
+
+
+class BinOp(Expr):
+    def __init__(self, op: str, left, right):
+        self.op, self.left, self.right = op, _expr(left), _expr(right)
+
+    def scalar(self, ctx):
+        return f"({self.left.scalar(ctx)} {self.op} {self.right.scalar(ctx)})"
+
+    def vector(self, ctx):
+        return f"({self.left.vector(ctx)} {self.op} {self.right.vector(ctx)})"
+
+
+class Num(Expr):
+    """Numeric payload value."""
+
+    def __init__(self, key: str, default):
+        self.key, self.default = key, default
+
+    def scalar(self, ctx):
+        return f"p.get({self.key!r}, {self.default!r})"
+
+    def vector(self, ctx):
+        return f"c.number({self.key!r}, {self.default!r})"
+
+
+class Text(Num):
+    """String payload value."""
+
+    def vector(self, ctx):
+        return f"c.text({self.key!r}, {self.default!r})"
+
+
+class Raw(Num):
+    """Payload value of any type (only used through Truthy)."""
+
+    def __init__(self, key: str, default=None):
+        super().__init__(key, default)
+
+    def vector(self, ctx):
+        return f"c.raw({self.key!r})"
+
+
+class Truthy(Expr):
+    yields_int = True
+
+    def __init__(self, x: Expr):
+        self.x = x
+
+    def scalar(self, ctx):
+        return f"(1 if {self.x.scalar(ctx)} else 0)"
+
+    def vector(self, ctx):
+        return f"c.truthy({self.x.vector(ctx)})"
+
+
+class Encode(Expr):
+    yields_int = True
+
+    def __init__(self, key: str, mapping: Dict[str, int], missing: str):
+        self.key, self.mapping, self.missing = key, mapping, missing
+
+    def scalar(self, ctx):
+        return f"{ctx.bind(self.mapping)}.get(p.get({self.key!r}, {self.missing!r}), 0)"
+
+    def vector(self, ctx):
+        return f"c.encode({self.key!r}, {ctx.bind(self.mapping)}, {self.missing!r})"
+
+
+class Given(Expr):
+    """The payload value at `key` unless absent or None, else `fallback`."""
+
+    def __init__(self, key: str, fallback):
+        self.key, self.fallback = key, _expr(fallback)
+
+    def scalar(self, ctx):
+        t = ctx.temp()
+        return f"({t} if ({t} := p.get({self.key!r})) is not None else {self.fallback.scalar(ctx)})"
+
+    def vector(self, ctx):
+        return f"c.given({self.key!r}, {self.fallback.vector(ctx)})"
+
+
+class Lookup(Expr):
+    def __init__(self, fn: Callable, x: Expr):
+        self.fn, self.x = fn, x
+
+    def scalar(self, ctx):
+        return f"{ctx.bind(self.fn)}({self.x.scalar(ctx)})"
+
+    def vector(self, ctx):
+        return f"c.lookup({ctx.bind(self.fn)}, {self.x.vector(ctx)})"
+
+
+class Max(Expr):
+    def __init__(self, a, b):
+        self.a, self.b = _expr(a), _expr(b)
+
+    def scalar(self, ctx):
+        return f"max({self.a.scalar(ctx)}, {self.b.scalar(ctx)})"
+
+    def vector(self, ctx):
+        return f"np.maximum({self.a.vector(ctx)}, {self.b.vector(ctx)})"
+
+
+class Log(Expr):
+    def __init__(self, x):
+        self.x = _expr(x)
+
+    def scalar(self, ctx):
+        return f"math.log({self.x.scalar(ctx)})"
+
+    def vector(self, ctx):
+        return f"c.log({self.x.vector(ctx)})"
+
+
+class Ref(Expr):
+    """An earlier feature's value."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def scalar(self, ctx):
+        return ctx.refs[self.name]
+
+    vector = scalar
+
+
+class Feature(NamedTuple):
+    name: str
+    dtype: type  # int or float
+    derive: Expr
+
+
+# ------------------------------------------------------------------
+# Lookups (falsy keys skip the lookup, as an absent key does)
+# ------------------------------------------------------------------
+
+def _origin_risk(country: str) -> float:
+    return get_origin_risk_index(country).get("risk_index", 1.0) if country else 1.0
+
+
+def _screen(check: Callable[[str], bool]) -> Callable[[str], bool]:
+    return lambda key: bool(key) and bool(check(key))
+
+
+_ofac = _screen(check_ofac_match)
+_un_sanctions = _screen(check_un_sanctions)
+_interpol = _screen(check_interpol_alert)
+
+_declared_value = Max(Num("cargo_declared_value", 1.0), 1.0)
+
+# Feature groups (PRD §5.3.1), in model column order
+FEATURES: List[Feature] = [
+    # Blockchain trust (40% weight)
+    Feature("blockchain_trust_score", float, Num("blockchain_trust_score", 50.0)),
+    Feature("years_active", int, Num("years_active", 0)),
+    Feature("violation_count", int, Num("violation_count", 0)),
+    Feature("aeo_tier", int, Num("aeo_tier", 0)),
+    Feature("recent_clean_inspections", int, Num("recent_clean_inspections", 0)),
+    # Vision AI output (30% weight)
+    Feature("vision_anomaly_flag", int, Truthy(Raw("vision_anomaly_flag", False))),
+    Feature("vision_confidence", float, Num("vision_confidence", 0.0)),
+    Feature("vision_detection_count", int, Num("vision_detection_count", 0)),
+    Feature("vision_class_encoded", int, Encode("vision_class", VISION_CLASS_MAP, "none")),
+    # Cargo details (15% weight)
+    Feature("cargo_hs_risk_weight", float, Lookup(hs_risk_weight, Text("cargo_hs_code", "0000.00"))),
+    Feature("cargo_declared_value_log", float, Log(_declared_value)),
+    Feature("cargo_weight", float, Num("cargo_weight", 0.0)),
+    Feature("cargo_volume", float, Num("cargo_volume", 0.0)),
+    Feature("cargo_category_encoded", int, Encode("cargo_category", CARGO_CATEGORY_MAP, "unknown")),
+    Feature("cargo_value_weight_ratio", float, _declared_value / Max(Ref("cargo_weight"), 1.0)),
+    # Route risk (10% weight)
+    Feature(
+        "route_origin_risk_index", float,
+        Given("route_origin_risk_index", Lookup(_origin_risk, Text("origin_country", ""))),
+    ),
+    Feature("route_transshipment_count", int, Num("route_transshipment_count", 0)),
+    Feature("route_carrier_risk", float, Given("route_carrier_risk", Num("route_carrier_history", 0))),
+    Feature("route_port_risk", float, Num("route_port_risk", 1.0)),
+    # External intel (5% weight)
+    Feature("intel_ofac_match", int, Truthy(Given("intel_ofac_match", Lookup(_ofac, Text("importer_name", ""))))),
+    Feature(
+        "intel_un_conflict_flag", int,
+        Truthy(Given("intel_un_conflict_flag", Lookup(_un_sanctions, Text("origin_country", "")))),
+    ),
+    Feature(
+        "intel_interpol_alert", int,
+        Truthy(Given("intel_interpol_alert", Lookup(_interpol, Text("importer_name", "")))),
+    ),
+    Feature("intel_seasonal_index", float, Num("intel_seasonal_index", 1.0)),
+    Feature(
+        "intel_composite_score", float,
+        Ref("intel_ofac_match") * 50 + Ref("intel_un_conflict_flag") * 30
+        + Ref("intel_interpol_alert") * 20 + Ref("intel_seasonal_index"),
+    ),
+    # Interaction
+    Feature(
+        "trust_vision_interaction", float,
+        (100 - Ref("blockchain_trust_score")) * Ref("vision_confidence"),
+    ),
+]
+
+FEATURE_COLUMNS: List[str] = [f.name for f in FEATURES]
+FEATURE_DTYPES: Dict[str, type] = {f.name: f.dtype for f in FEATURES}
+
+
+# ------------------------------------------------------------------
+# Vectorized evaluation context
+# ------------------------------------------------------------------
+
+class Columns:
+    """Column accessors the vectorized code runs against.
+
+    With keep_existing, feature columns already in the table (e.g. a
+    training CSV with precomputed features) are used as they are, and
+    only their null cells are derived.
+    """
+
+    def __init__(self, df, keep_existing: bool = False):
+        import pandas as pd
+
+        self.pd = pd
+        self.df = df
+        self.n = len(df)
+        self.keep_existing = keep_existing
+
+    def raw(self, key: str):
+        if key in self.df.columns:
+            return self.df[key]
+        return self.pd.Series(None, index=self.df.index, dtype=object)
+
+    def number(self, key: str, default) -> np.ndarray:
+        return self.pd.to_numeric(self.raw(key)).astype(np.float64).fillna(default).to_numpy()
+
+    def text(self, key: str, default: str) -> np.ndarray:
+        col = self.raw(key)
+        return col.astype(object).where(col.notna(), default).to_numpy()
+
+    def truthy(self, x) -> np.ndarray:
+        present = None
+        if isinstance(x, self.pd.Series):
+            present = x.notna().to_numpy()
+            x = x.to_numpy(dtype=object) if x.dtype == object else x.fillna(0).to_numpy()
+        if x.dtype != object:
+            return (x != 0).astype(np.int64)
+        out = np.zeros(x.size, dtype=np.int64)
+        keep = slice(None) if present is None else present
+        out[keep] = [1 if v else 0 for v in x[keep]]
+        return out
+
+    def encode(self, key: str, mapping: Dict[str, int], missing: str) -> np.ndarray:
+        col = self.raw(key)
+        return col.where(col.notna(), missing).map(mapping).fillna(0).to_numpy(np.int64)
+
+    def given(self, key: str, fallback: np.ndarray) -> np.ndarray:
+        col = self.raw(key)
+        present = col.notna().to_numpy()
+        if not present.any():
+            return fallback
+        values = col.to_numpy(dtype=object) if col.dtype == object else col.to_numpy()
+        return np.where(present, values, fallback)
+
+    def lookup(self, fn: Callable, x: np.ndarray) -> np.ndarray:
+        codes, uniques = self.pd.factorize(x)
+        return np.array([fn(u) for u in uniques], dtype=np.float64)[codes]
+
+    def log(self, x: np.ndarray) -> np.ndarray:
+        # math.log, not np.log: the SIMD kernel can differ from libm in the last ulp
+        return np.fromiter(map(math.log, x), np.float64, x.size)
+
+    def prefer(self, name: str, dtype: type, derive: Callable[[], np.ndarray]) -> np.ndarray:
+        if self.keep_existing and name in self.df.columns:
+            values = self.pd.to_numeric(self.df[name]).astype(np.float64).to_numpy()
+            missing = np.isnan(values)
+            if missing.any():
+                values = np.where(missing, self.cast(derive(), float), values)
+            return self.cast(values, dtype)
+        return self.cast(derive(), dtype)
+
+    def cast(self, x, dtype: type) -> np.ndarray:
+        x = np.asarray(x, dtype=np.float64 if dtype is float or x.dtype == object else None)
+        if dtype is int and x.dtype.kind == "f":
+            x = np.trunc(x)
+        x = x.astype(np.int64 if dtype is int else np.float64, copy=False)
+        return np.broadcast_to(x, (self.n,)) if x.ndim == 0 else x
+
+
+# ------------------------------------------------------------------
+# Code generation
+# ------------------------------------------------------------------
+
+def _compile(features: List[Feature]) -> Tuple[Callable, Callable, str, str]:
+    ctx = _Compiler()
+    scalar_lines, vector_lines = [], []
+    for i, feature in enumerate(features):
+        var = f"f{i}"
+        scalar = feature.derive.scalar(ctx)
+        if not feature.derive.yields_int or feature.dtype is not int:
+            scalar = f"{feature.dtype.__name__}({scalar})"
+        scalar_lines.append(f"    {var} = {scalar}  # {feature.name}")
+        vector_lines.append(
+            f"    {var} = c.prefer({feature.name!r}, {feature.dtype.__name__}, "
+            f"lambda: {feature.derive.vector(ctx)})"
+        )
+        ctx.refs[feature.name] = var
+    result = "    return (" + ", ".join(ctx.refs.values()) + ",)"
+    scalar_src = "\n".join(["def assemble_scalar(p):", *scalar_lines, result])
+    vector_src = "\n".join(["def assemble_vector(c):", *vector_lines, result])
+    exec(compile(scalar_src + "\n\n" + vector_src, "<feature-schema>", "exec"), ctx.namespace)
+    return ctx.namespace["assemble_scalar"], ctx.namespace["assemble_vector"], scalar_src, vector_src
+
+
+# assemble_scalar(payload) -> tuple; assemble_vector(Columns) -> tuple of arrays
+assemble_scalar, assemble_vector, SCALAR_SOURCE, VECTOR_SOURCE = _compile(FEATURES)
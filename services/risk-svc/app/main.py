@@ -2,6 +2,8 @@
 
 import logging
 from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 from starlette.routing import Route
@@ -11,37 +13,156 @@ import sys, os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
 try:
     from metrics import get_metrics_route, setup_metrics as _setup_metrics
+    from tracing import span
     _HAS_METRICS = True
 except ImportError:
+    from contextlib import nullcontext as span
     _HAS_METRICS = False
 
-from app.features.assemble import assemble_features, update_hs_risk_weights
-from app.model.predict import predict_risk
-from app.model.train import train_model
+from app.features.assemble import assemble_row
+from app.features.hs_weights import WeightsConflict, current_weights, update_hs_risk_weights
+from app.model.predict import MODEL_PATH, model_holder, resolve_model_path
+from app.ab_test.reporter import record_outcome, start_outcome_reporter, stop_outcome_reporter
+from app.ab_test.router import configure_from_env, router
+from app.ab_test.shadow import configure_shadow_from_env, shadow
+from app.retrain.jobs import JobLimitError, cancel_job, get_job, submit_training_job
 from app.model.evaluate import evaluate_model
-from app.retrain.scheduler import should_retrain, run_retrain_job, detect_adversarial_spike
+from app.retrain.scheduler import submit_retrain_job, detect_adversarial_spike
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Registry name of the model this service serves; other models' events are ignored
+RISK_MODEL_NAME = os.getenv("RISK_MODEL_NAME", "risk-xgboost")
+
 
 async def health(request):
-    return JSONResponse({"status": "ok", "service": "risk-svc"})
+    return JSONResponse({
+        "status": "ok",
+        "service": "risk-svc",
+        "model": model_holder.info(),
+        "hs_weights": current_weights().info(),
+    })
+
+
+async def model_reload(request: Request):
+    """POST /model/reload — load, warm up and hot-swap a model file.
+
+    Also the target for ml-monitor-svc registry notifications: events for
+    other models or stages other than Production are ignored. Only files
+    under MODEL_DIR or MODEL_ARTIFACT_ROOTS are loaded, and a version must
+    come with the path (or artifact_uri) it names; with neither, the
+    model at MODEL_PATH is reloaded.
+    """
+    payload = await request.json() if request.headers.get("content-length", "0") != "0" else {}
+    if payload.get("stage", "Production") != "Production" or payload.get("name", RISK_MODEL_NAME) != RISK_MODEL_NAME:
+        return JSONResponse({"status": "ignored", "model": model_holder.info()})
+    path = payload.get("path") or payload.get("artifact_uri")
+    version = payload.get("version")
+    if not path and version:
+        return JSONResponse(
+            {"error": f"Version {version} has no path or artifact_uri to load", "model": model_holder.info()},
+            status_code=400,
+        )
+    try:
+        path = resolve_model_path(path or MODEL_PATH)
+        await run_in_threadpool(model_holder.swap, path, version)
+    except ValueError as e:
+        return JSONResponse({"error": str(e), "model": model_holder.info()}, status_code=400)
+    return JSONResponse({"status": "swapped", "model": model_holder.info()})
 
 
 async def score(request: Request):
-    """POST /score — compute risk lane decision."""
+    """POST /score — compute risk lane decision.
+
+    Routed to the champion or challenger model by clearance/container id
+    when an A/B test is configured; the response carries model_version.
+    A sampled share of requests is re-scored by the shadow model, if one
+    is set, after the response has been sent. With "explain": true (or
+    ?explain=true) the response adds this prediction's feature
+    contributions.
+    """
     payload = await request.json()
-    features = assemble_features(payload)
-    result = predict_risk(features)
+    key = payload.get("clearance_id") or payload.get("container_id") or request.headers.get("x-trace-id")
+    with span("assemble"):
+        features = assemble_row(payload)
+    with span("predict"):
+        explain = bool(payload.get("explain")) or request.query_params.get("explain", "").lower() in ("1", "true")
+        arm, result = router.score(features, key, explain)
+    result["hs_weights_version"] = features.weights_version
+    if router.active:
+        record_outcome(arm.arm, result["lane"])
+    background = None
+    if shadow.should_shadow():
+        background = BackgroundTask(shadow.score, features, dict(result))
+    return JSONResponse(result, background=background)
+
+
+async def ab_status(request):
+    """GET /ab — current champion/challenger routing."""
+    return JSONResponse(router.status())
+
+
+async def ab_configure(request: Request):
+    """POST /ab — load a challenger model and set its traffic share."""
+    payload = await request.json()
+    try:
+        challenger_path = payload.get("challenger_path")
+        result = router.configure(
+            challenger_path=resolve_model_path(challenger_path) if challenger_path else None,
+            challenger_version=payload.get("challenger_version", ""),
+            traffic_split=float(payload.get("traffic_split", 10)),
+            champion_version=payload.get("champion_version"),
+        )
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return JSONResponse(result)
+
+
+async def shadow_report(request):
+    """GET /shadow — shadow vs served model agreement and score deltas."""
+    return JSONResponse(shadow.report())
+
+
+async def shadow_configure(request: Request):
+    """POST /shadow — set (or clear) the shadow model and sampling rate."""
+    payload = await request.json()
+    try:
+        model_path = payload.get("model_path")
+        result = shadow.configure(
+            model_path=resolve_model_path(model_path) if model_path else None,
+            version=payload.get("version", ""),
+            sample_rate=float(payload.get("sample_rate", 1.0)),
+        )
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
     return JSONResponse(result)
 
 
 async def train(request: Request):
-    """POST /train — trigger XGBoost model training."""
+    """POST /train — start XGBoost training in a background process (202 + job id)."""
     payload = await request.json() if request.headers.get("content-length", "0") != "0" else {}
-    result = train_model(payload)
-    return JSONResponse(result)
+    try:
+        job = submit_training_job(payload)
+    except JobLimitError as e:
+        return JSONResponse({"error": str(e)}, status_code=409)
+    return JSONResponse(job.to_dict(), status_code=202)
+
+
+async def train_status(request: Request):
+    """GET /train/{job_id} — training job status, progress and result."""
+    job = get_job(request.path_params["job_id"])
+    if job is None:
+        return JSONResponse({"error": "Unknown job"}, status_code=404)
+    return JSONResponse(job.to_dict())
+
+
+async def train_cancel(request: Request):
+    """DELETE /train/{job_id} — cancel a running training job."""
+    job = cancel_job(request.path_params["job_id"])
+    if job is None:
+        return JSONResponse({"error": "Unknown job"}, status_code=404)
+    return JSONResponse(job.to_dict())
 
 
 async def evaluate(request: Request):
@@ -51,12 +172,15 @@ async def evaluate(request: Request):
 
 
 async def retrain(request: Request):
-    """POST /retrain — trigger self-healing retrain if threshold met."""
+    """POST /retrain — start a background self-healing retrain if threshold met."""
     payload = await request.json() if request.headers.get("content-length", "0") != "0" else {}
     queue_count = payload.get("queue_count", 50)
     force = payload.get("force", False)
-    result = run_retrain_job(queue_count=queue_count, force=force)
-    return JSONResponse(result)
+    try:
+        result = submit_retrain_job(queue_count=queue_count, force=force)
+    except JobLimitError as e:
+        return JSONResponse({"error": str(e)}, status_code=409)
+    return JSONResponse(result, status_code=202 if result["status"] == "started" else 200)
 
 
 async def spike_check(request: Request):
@@ -70,26 +194,73 @@ async def spike_check(request: Request):
 
 
 async def update_weights(request: Request):
-    """POST /weights — hot-reload HS code risk weights from tariff-sync-svc."""
+    """POST /weights — hot-reload HS code risk weights from tariff-sync-svc.
+
+    Merges into the current table and drops the "removed" codes; with
+    "replace": true the posted weights become the whole table. Invalid
+    weights are rejected (400) as a whole. A delta carrying a "base_hash"
+    other than the live table's source is rejected with 409, telling the
+    sender to push the full table.
+    """
     payload = await request.json()
-    update_hs_risk_weights(payload.get("weights", {}))
-    return JSONResponse({"status": "updated", "count": len(payload.get("weights", {}))})
+    weights = payload.get("weights", {})
+    removed = payload.get("removed", [])
+    replace = bool(payload.get("replace", False))
+    try:
+        table = update_hs_risk_weights(
+            weights,
+            replace=replace,
+            removed=removed,
+            base_source=payload.get("base_hash"),
+            source=payload.get("source_hash"),
+        )
+    except WeightsConflict as e:
+        return JSONResponse({"error": str(e), "hs_weights": current_weights().info()}, status_code=409)
+    except ValueError as e:
+        return JSONResponse({"error": str(e), "hs_weights": current_weights().info()}, status_code=400)
+    return JSONResponse({
+        "status": "replaced" if replace else "updated",
+        "count": len(weights),
+        "hs_weights": table.info(),
+    })
+
+
+async def weights_status(request):
+    """GET /weights — version and size of the live HS weight table."""
+    return JSONResponse(current_weights().info())
 
 
 _routes = [
     Route("/health", health, methods=["GET"]),
     Route("/score", score, methods=["POST"]),
+    Route("/model/reload", model_reload, methods=["POST"]),
+    Route("/ab", ab_status, methods=["GET"]),
+    Route("/ab", ab_configure, methods=["POST"]),
+    Route("/shadow", shadow_report, methods=["GET"]),
+    Route("/shadow", shadow_configure, methods=["POST"]),
     Route("/train", train, methods=["POST"]),
+    Route("/train/{job_id}", train_status, methods=["GET"]),
+    Route("/train/{job_id}", train_cancel, methods=["DELETE"]),
     Route("/evaluate", evaluate, methods=["GET"]),
     Route("/retrain", retrain, methods=["POST"]),
     Route("/spike", spike_check, methods=["POST"]),
     Route("/weights", update_weights, methods=["POST"]),
+    Route("/weights", weights_status, methods=["GET"]),
 ]
 
 if _HAS_METRICS:
     _routes.append(get_metrics_route())
 
-app = Starlette(routes=_routes)
+
+async def _startup():
+    # Load and warm the serving model before traffic, off the event loop
+    await run_in_threadpool(model_holder.get)
+    configure_from_env()
+    configure_shadow_from_env()
+    start_outcome_reporter()
+
+
+app = Starlette(routes=_routes, on_startup=[_startup], on_shutdown=[stop_outcome_reporter])
 
 if _HAS_METRICS:
     _setup_metrics(app, service_name="risk-svc")
@@ -0,0 +1,192 @@
+"""Pure-NumPy evaluator for the XGBoost risk model.
+
+Exports the booster JSON (xgboost_risk_model.json) into flat node arrays
+and scores with NumPy only, so a worker started with MODEL_BACKEND=numpy
+never imports xgboost (faster start-up, less memory per worker).
+
+Layout (all trees concatenated; child indices are absolute):
+
+    feature[i]       split feature index (-1 for leaves)
+    threshold[i]     go left when x < threshold (float32, as xgboost)
+    left[i], right[i]
+    default_left[i]  direction for missing (NaN) values
+    value[i]         leaf value (0 for inner nodes)
+    roots[t]         root node of tree t;  tree_class[t]  its output class
+
+Evaluation walks every (row, tree) pair one level per step, for all rows
+and trees at once; leaves point to themselves, so max_depth steps finish
+every path. Margins are summed per class, base_score is added and
+softmax applied, matching XGBClassifier.predict_proba for multi:softprob.
+
+Export once with:
+    python -m app.model.compiled data/models/xgboost_risk_model.json
+which writes the .npz next to the JSON; load_model() prefers it.
+"""
+
+import argparse
+import json
+import os
+from typing import Dict, Optional
+
+import numpy as np
+
+_ARRAYS = ("feature", "threshold", "left", "right", "default_left", "value", "gain", "roots", "tree_class")
+
+
+def _tree_depth(left: np.ndarray, right: np.ndarray) -> int:
+    depth, frontier = 0, [0]
+    while True:
+        frontier = [c for n in frontier for c in (left[n], right[n]) if c >= 0]
+        if not frontier:
+            return depth
+        depth += 1
+
+
+def arrays_from_booster_json(model_json: Dict) -> Dict[str, np.ndarray]:
+    """Flatten a parsed booster JSON into node arrays plus metadata.
+
+    Raises:
+        ValueError: For objectives or split types the evaluator does not handle.
+    """
+    learner = model_json["learner"]
+    objective = learner["objective"]["name"]
+    if objective != "multi:softprob":
+        raise ValueError(f"Unsupported objective {objective!r}")
+    booster = learner["gradient_booster"]
+    if booster.get("name") != "gbtree":
+        raise ValueError(f"Unsupported booster {booster.get('name')!r}")
+    trees = booster["model"]["trees"]
+
+    parts = {name: [] for name in ("feature", "threshold", "left", "right", "default_left", "value", "gain")}
+    roots, depth, offset = [], 0, 0
+    for tree in trees:
+        if any(tree["split_type"]):
+            raise ValueError("Categorical splits are not supported")
+        left = np.asarray(tree["left_children"], dtype=np.int64)
+        right = np.asarray(tree["right_children"], dtype=np.int64)
+        leaf = left < 0
+        nodes = np.arange(left.size)
+        conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+
+        parts["feature"].append(np.where(leaf, -1, tree["split_indices"]))
+        parts["threshold"].append(np.where(leaf, np.float32(0), conditions))
+        # Leaves point at themselves so extra steps keep them in place
+        parts["left"].append(np.where(leaf, nodes, left) + offset)
+        parts["right"].append(np.where(leaf, nodes, right) + offset)
+        parts["default_left"].append(np.asarray(tree["default_left"], dtype=bool))
+        parts["value"].append(np.where(leaf, conditions, np.float32(0)))
+        parts["gain"].append(np.where(leaf, 0.0, tree["loss_changes"]))
+        roots.append(offset)
+        depth = max(depth, _tree_depth(left, right))
+        offset += left.size
+
+    params = learner["learner_model_param"]
+    out = {name: np.concatenate(chunks) if chunks else np.zeros(0) for name, chunks in parts.items()}
+    out["feature"] = out["feature"].astype(np.int32)
+    out["threshold"] = out["threshold"].astype(np.float32)
+    out["left"] = out["left"].astype(np.int32)
+    out["right"] = out["right"].astype(np.int32)
+    out["value"] = out["value"].astype(np.float32)
+    out["roots"] = np.asarray(roots, dtype=np.int32)
+    out["tree_class"] = np.asarray(booster["model"]["tree_info"], dtype=np.int32)
+    out["meta"] = np.array([
+        int(params["num_class"]), int(params["num_feature"]), depth,
+    ], dtype=np.int64)
+    out["base_score"] = np.array([float(params["base_score"])])
+    return out
+
+
+class CompiledForest:
+    """Batched NumPy evaluator over exported node arrays.
+
+    Mirrors the parts of XGBClassifier that predict.py uses:
+    predict_proba and feature_importances_ (average gain, normalised).
+    """
+
+    # Reported as "model_used" by predict.py
+    backend = "numpy"
+
+    def __init__(self, arrays: Dict[str, np.ndarray], source_path: Optional[str] = None):
+        # The file actually read (.npz or model JSON), for hashing by the holder
+        self.source_path = source_path
+        for name in _ARRAYS:
+            setattr(self, name, arrays[name])
+        self.n_classes, self.n_features, self.depth = (int(v) for v in arrays["meta"])
+        self.base_score = float(arrays["base_score"][0])
+        # (trees, classes) one-hot: margins = leaf values @ class_matrix
+        self._class_matrix = np.zeros((self.roots.size, self.n_classes))
+        self._class_matrix[np.arange(self.roots.size), self.tree_class] = 1.0
+        self.feature_importances_ = self._importances()
+
+    @classmethod
+    def from_json(cls, path: str) -> "CompiledForest":
+        with open(path) as f:
+            return cls(arrays_from_booster_json(json.load(f)), source_path=path)
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledForest":
+        with np.load(path) as data:
+            return cls({name: data[name] for name in data.files}, source_path=path)
+
+    def save(self, path: str) -> None:
+        arrays = {name: getattr(self, name) for name in _ARRAYS}
+        arrays["meta"] = np.array([self.n_classes, self.n_features, self.depth], dtype=np.int64)
+        arrays["base_score"] = np.array([self.base_score])
+        np.savez(path, **arrays)
+
+    def _importances(self) -> np.ndarray:
+        split = self.feature >= 0
+        counts = np.bincount(self.feature[split], minlength=self.n_features)
+        gains = np.bincount(self.feature[split], weights=self.gain[split], minlength=self.n_features)
+        average = np.divide(gains, counts, out=np.zeros(self.n_features), where=counts > 0)
+        total = average.sum()
+        return (average / total if total > 0 else average).astype(np.float32)
+
+    def predict_margin(self, X: np.ndarray) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], self.roots.size)).copy()
+        for _ in range(self.depth):
+            feature = self.feature[node]
+            x = X[rows, np.maximum(feature, 0)]
+            go_left = np.where(np.isnan(x), self.default_left[node], x < self.threshold[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.value[node].astype(np.float64) @ self._class_matrix + self.base_score
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        margin = self.predict_margin(X)
+        margin -= margin.max(axis=1, keepdims=True)
+        expm = np.exp(margin)
+        return expm / expm.sum(axis=1, keepdims=True)
+
+
+def compiled_path(json_path: str) -> str:
+    return os.path.splitext(json_path)[0] + ".npz"
+
+
+def load_compiled(json_path: str) -> Optional[CompiledForest]:
+    """The exported .npz if it is at least as new as the JSON, else parse the JSON."""
+    npz = compiled_path(json_path)
+    if os.path.exists(npz) and (
+        not os.path.exists(json_path) or os.path.getmtime(npz) >= os.path.getmtime(json_path)
+    ):
+        return CompiledForest.load(npz)
+    if os.path.exists(json_path):
+        return CompiledForest.from_json(json_path)
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export an XGBoost risk model JSON to NumPy arrays")
+    parser.add_argument("model_json")
+    parser.add_argument("output", nargs="?", help="defaults to the JSON path with .npz")
+    args = parser.parse_args(argv)
+
+    forest = CompiledForest.from_json(args.model_json)
+    out = args.output or compiled_path(args.model_json)
+    forest.save(out)
+    print(f"{forest.roots.size} trees, {forest.feature.size} nodes, depth {forest.depth} → {out}")
+
+
+if __name__ == "__main__":
+    main()
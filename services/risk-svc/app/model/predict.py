@@ -1,74 +1,266 @@
-"""XGBoost risk scoring — load trained model, predict lane, return feature importances."""
+"""XGBoost risk scoring — load trained model, predict lane, return feature importances.
 
+The serving model lives in `model_holder`, which holds one immutable
+LoadedModel (model, version, file hash). A new model is loaded and warmed
+up completely before a single reference assignment makes it current, so
+requests never see a half-loaded model and never wait on disk I/O after
+startup. A request reads the reference once and keeps using that
+LoadedModel, which stays alive until its last in-flight request is done.
+"""
+
+import hashlib
 import os
 import logging
-from typing import Dict, List
+import threading
+import weakref
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
 
 import numpy as np
 
+from app.features.assemble import FeatureRow
+from app.features.schema import FEATURE_COLUMNS
+
 logger = logging.getLogger(__name__)
 
 MODEL_DIR = os.getenv("MODEL_DIR", "data/models")
 MODEL_PATH = os.path.join(MODEL_DIR, "xgboost_risk_model.json")
-
-# Lazy-loaded model singleton
-_model = None
-_model_loaded = False
-
-FEATURE_COLUMNS = [
-    "blockchain_trust_score",
-    "years_active",
-    "violation_count",
-    "aeo_tier",
-    "recent_clean_inspections",
-    "vision_anomaly_flag",
-    "vision_confidence",
-    "vision_detection_count",
-    "vision_class_encoded",
-    "cargo_hs_risk_weight",
-    "cargo_declared_value_log",
-    "cargo_weight",
-    "cargo_volume",
-    "cargo_category_encoded",
-    "cargo_value_weight_ratio",
-    "route_origin_risk_index",
-    "route_transshipment_count",
-    "route_carrier_risk",
-    "route_port_risk",
-    "intel_ofac_match",
-    "intel_un_conflict_flag",
-    "intel_interpol_alert",
-    "intel_seasonal_index",
-    "intel_composite_score",
-    "trust_vision_interaction",
-]
+MODEL_VERSION = os.getenv("MODEL_VERSION", "v1.0.0")
+# Directories a model named in a request may be loaded from: MODEL_DIR
+# plus the registry's artifact store(s), comma-separated
+MODEL_ROOTS = [MODEL_DIR] + [r.strip() for r in os.getenv("MODEL_ARTIFACT_ROOTS", "").split(",") if r.strip()]
+TOP_FEATURES_K = int(os.getenv("TOP_FEATURES_K", "7"))
+# Threads per single-row prediction; more only adds fork/join overhead
+PREDICT_THREADS = int(os.getenv("PREDICT_THREADS", "1"))
+# "numpy" serves with app/model/compiled.py and never imports xgboost
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "xgboost")
 
 LANE_MAP = {0: "GREEN", 1: "YELLOW", 2: "RED"}
 
+# model → its top-k importance list, computed once when the model is loaded
+_top_features: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+# model → its single-row predict function (Booster.inplace_predict pinned to
+# PREDICT_THREADS, or the compiled forest's predict_proba)
+_predictors: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+# One preallocated (1, n_features) float32 row per thread
+_rows = threading.local()
+
+
+def rank_importances(model, k: int = TOP_FEATURES_K) -> List[Dict]:
+    """Top-k global feature importances of a model, rounded for the API."""
+    pairs = sorted(
+        zip(FEATURE_COLUMNS, model.feature_importances_.tolist()), key=lambda x: x[1], reverse=True
+    )
+    return [{"name": n, "importance": round(v, 4)} for n, v in pairs[:k]]
+
+
+def _prepare_predictor(model):
+    from app.model.compiled import CompiledForest
+
+    if isinstance(model, CompiledForest):
+        predictor = model.predict_proba
+    else:
+        booster = model.get_booster()
+        booster.set_param({"nthread": PREDICT_THREADS})
+        predictor = booster.inplace_predict
+    _predictors[model] = predictor
+    return predictor
+
+
+def _row_buffer() -> np.ndarray:
+    row = getattr(_rows, "row", None)
+    if row is None:
+        row = _rows.row = np.zeros((1, len(FEATURE_COLUMNS)), dtype=np.float32)
+    return row
+
+
+def _as_row(features: Dict) -> np.ndarray:
+    """(1, n_features) float32 view of the features, copying only for dicts."""
+    if isinstance(features, FeatureRow):
+        return features.values.reshape(1, -1)
+    row = _row_buffer()
+    row[0] = [features.get(col, 0.0) for col in FEATURE_COLUMNS]
+    return row
+
+
+def predict_proba_inplace(model, features: Dict) -> np.ndarray:
+    """Class probabilities for one row via Booster.inplace_predict.
+
+    Skips the sklearn wrapper's validation and per-call DMatrix: the
+    booster reads the FeatureRow's vector directly (a dict is first
+    written into this thread's preallocated float32 row).
+    """
+    predictor = _predictors.get(model)
+    if predictor is None:
+        predictor = _prepare_predictor(model)
+    return predictor(_as_row(features))[0]
+
+
+def top_features(model) -> List[Dict]:
+    """Cached importance ranking (ranked now if the model was built elsewhere).
+
+    Returns a copy, so callers may modify their response freely.
+    """
+    top = _top_features.get(model)
+    if top is None:
+        top = _top_features[model] = rank_importances(model)
+    return [dict(f) for f in top]
+
 
-def _load_model():
-    """Load XGBoost model from disk (once)."""
-    global _model, _model_loaded
-    if _model_loaded:
-        return _model
+def load_model(path: str, backend: Optional[str] = None):
+    """Load an XGBoost model file; None if missing or unreadable.
 
-    if os.path.exists(MODEL_PATH):
+    With backend (default MODEL_BACKEND) "numpy" the model is served by
+    the pure-NumPy evaluator, from the exported .npz when it is current.
+    """
+    backend = backend or MODEL_BACKEND
+    if backend == "numpy":
+        from app.model.compiled import compiled_path, load_compiled
+
+        if os.path.exists(path) or os.path.exists(compiled_path(path)):
+            try:
+                model = load_compiled(path)
+            except Exception as e:
+                logger.warning(f"Failed to load compiled model: {e}")
+            else:
+                _top_features[model] = rank_importances(model)
+                _prepare_predictor(model)
+                logger.info(f"Compiled NumPy model loaded from {path}")
+                return model
+        return None
+
+    if os.path.exists(path):
         try:
             import xgboost as xgb
 
-            _model = xgb.XGBClassifier()
-            _model.load_model(MODEL_PATH)
-            _model_loaded = True
-            logger.info(f"XGBoost model loaded from {MODEL_PATH}")
-            return _model
+            model = xgb.XGBClassifier()
+            model.load_model(path)
+            _top_features[model] = rank_importances(model)
+            _prepare_predictor(model)
+            logger.info(f"XGBoost model loaded from {path}")
+            return model
         except Exception as e:
             logger.warning(f"Failed to load XGBoost model: {e}")
-
-    _model = None
-    _model_loaded = True  # avoid repeated attempts
     return None
 
 
+def resolve_model_path(path: str) -> str:
+    """Local file for a requested model path or file:// artifact URI.
+
+    Raises:
+        ValueError: If it is not a local file under one of MODEL_ROOTS.
+    """
+    if not isinstance(path, str) or not path:
+        raise ValueError("Model path must be a non-empty string")
+    if path.startswith("file://"):
+        path = urlsplit(path).path
+    elif "://" in path or path.startswith("runs:/"):
+        raise ValueError(f"Unsupported model URI {path!r}: only local files can be loaded")
+    real = os.path.realpath(path)
+    for root in MODEL_ROOTS:
+        root = os.path.realpath(root)
+        if os.path.commonpath([real, root]) == root:
+            return real
+    raise ValueError(f"Model path {path} is outside the model directories")
+
+
+def _model_used(model) -> str:
+    """Name of the evaluator serving a model ("xgboost" or "numpy")."""
+    return getattr(model, "backend", "xgboost")
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def warm_up(model) -> None:
+    """Run a few predictions so lazy booster/thread-pool setup happens now."""
+    for _ in range(3):
+        predict_proba_inplace(model, {})
+
+
+class LoadedModel:
+    """An immutable, ready-to-serve model snapshot (model None → fallback)."""
+
+    __slots__ = ("model", "version", "path", "sha256", "loaded_at")
+
+    def __init__(self, model, version: str, path: Optional[str] = None, sha256: Optional[str] = None):
+        self.model = model
+        self.version = version
+        self.path = path
+        self.sha256 = sha256
+        self.loaded_at = datetime.now(timezone.utc).isoformat()
+
+    def info(self) -> Dict:
+        return {
+            "version": self.version,
+            "sha256": self.sha256,
+            "path": self.path,
+            "loaded_at": self.loaded_at,
+            "model_used": _model_used(self.model) if self.model is not None else "fallback_weighted_sum",
+        }
+
+
+class ModelHolder:
+    """Versioned holder for the serving model with atomic hot-swap."""
+
+    def __init__(self):
+        self._current: Optional[LoadedModel] = None
+        self._swap_lock = threading.Lock()  # serialises loads, not reads
+
+    @property
+    def loaded(self) -> bool:
+        return self._current is not None
+
+    def get(self) -> LoadedModel:
+        """The current model; loads MODEL_PATH on first use if startup didn't."""
+        current = self._current
+        if current is None:
+            with self._swap_lock:
+                if self._current is None:
+                    self._current = self._build(MODEL_PATH, MODEL_VERSION, required=False)
+                current = self._current
+        return current
+
+    def _build(self, path: str, version: str, required: bool) -> LoadedModel:
+        model = load_model(path)
+        if model is None:
+            if required:
+                raise ValueError(f"Cannot load model from {path}")
+            return LoadedModel(None, "fallback")
+        warm_up(model)
+        # A numpy-backend deployment may ship only the exported .npz
+        source = getattr(model, "source_path", None) or path
+        return LoadedModel(model, version, source, _file_sha256(source))
+
+    def swap(self, path: str = MODEL_PATH, version: Optional[str] = None) -> LoadedModel:
+        """Load, warm up and atomically install a model; call off the request path.
+
+        Raises:
+            ValueError: If the model cannot be loaded (the current one stays).
+        """
+        with self._swap_lock:
+            new = self._build(path, version or MODEL_VERSION, required=True)
+            old, self._current = self._current, new
+        logger.info(
+            f"Serving model {new.version} ({new.sha256[:12]}), replaced "
+            f"{old.version if old else 'nothing'}"
+        )
+        return new
+
+    def info(self) -> Dict:
+        current = self._current
+        return current.info() if current is not None else {"version": None, "model_used": "not_loaded"}
+
+
+model_holder = ModelHolder()
+
+
 def _fallback_predict(features: Dict) -> Dict:
     """Weighted-sum fallback when no trained XGBoost model is available."""
     trust_weight = 0.40
@@ -119,38 +311,63 @@ def _fallback_predict(features: Dict) -> Dict:
     }
 
 
+# Static feature importances for fallback mode
+_STATIC_TOP_FEATURES = [
+    {"name": "blockchain_trust_score", "importance": 0.40},
+    {"name": "vision_confidence", "importance": 0.18},
+    {"name": "cargo_declared_value_log", "importance": 0.12},
+    {"name": "route_origin_risk_index", "importance": 0.10},
+    {"name": "intel_ofac_match", "importance": 0.05},
+]
+
+
 def _static_top_features() -> List[Dict]:
     """Static feature importances for fallback mode."""
-    return [
-        {"name": "blockchain_trust_score", "importance": 0.40},
-        {"name": "vision_confidence", "importance": 0.18},
-        {"name": "cargo_declared_value_log", "importance": 0.12},
-        {"name": "route_origin_risk_index", "importance": 0.10},
-        {"name": "intel_ofac_match", "importance": 0.05},
-    ]
+    return [dict(f) for f in _STATIC_TOP_FEATURES]
 
 
-def predict_risk(features: Dict) -> Dict:
+def predict_risk(features: Dict, explain: bool = False) -> Dict:
     """Score a shipment using XGBoost (or fallback).
 
     Args:
         features: Assembled feature dictionary from assemble.py.
+        explain: Also return this prediction's per-feature contributions.
 
     Returns:
         Dictionary with lane, risk_score, top_features, and model info.
     """
-    model = _load_model()
+    return predict_with_model(model_holder.get().model, features, explain)
+
+
+def explain_prediction(model, feature_vector: np.ndarray, pred_class: int, k: int = TOP_FEATURES_K) -> Optional[Dict]:
+    """SHAP contributions (booster pred_contribs) toward the predicted lane.
 
+    Returns the k features with the largest absolute contribution, in
+    log-odds units, plus the bias term, or None for the NumPy backend.
+    """
+    if not hasattr(model, "get_booster"):
+        return None
+    import xgboost as xgb
+
+    contribs = model.get_booster().predict(xgb.DMatrix(feature_vector), pred_contribs=True)
+    row = contribs[0, pred_class] if contribs.ndim == 3 else contribs[0]
+    order = np.argsort(-np.abs(row[:-1]))[:k]
+    return {
+        "lane": LANE_MAP[pred_class],
+        "bias": round(float(row[-1]), 4),
+        "contributions": [
+            {"name": FEATURE_COLUMNS[i], "contribution": round(float(row[i]), 4)} for i in order
+        ],
+    }
+
+
+def predict_with_model(model, features: Dict, explain: bool = False) -> Dict:
+    """Score with a specific loaded model (None → weighted-sum fallback)."""
     if model is None:
         return _fallback_predict(features)
 
-    # Build feature vector in correct column order
-    feature_vector = np.array(
-        [[features.get(col, 0.0) for col in FEATURE_COLUMNS]], dtype=np.float32
-    )
-
-    # Predict probabilities
-    probs = model.predict_proba(feature_vector)[0]  # [P(GREEN), P(YELLOW), P(RED)]
+    # Predict probabilities (feature vector built in FEATURE_COLUMNS order)
+    probs = predict_proba_inplace(model, features)  # [P(GREEN), P(YELLOW), P(RED)]
     pred_class = int(np.argmax(probs))
     lane = LANE_MAP[pred_class]
 
@@ -158,21 +375,19 @@ def predict_risk(features: Dict) -> Dict:
     risk_score = float(probs[1] * 40 + probs[2] * 100)
     risk_score = max(0, min(100, risk_score))
 
-    # Feature importances from trained model
-    importances = model.feature_importances_
-    imp_pairs = sorted(
-        zip(FEATURE_COLUMNS, importances.tolist()), key=lambda x: x[1], reverse=True
-    )
-    top = [{"name": n, "importance": round(v, 4)} for n, v in imp_pairs[:7]]
-
-    return {
+    result = {
         "lane": lane,
         "risk_score": round(risk_score, 2),
-        "top_features": top,
+        "top_features": top_features(model),
         "probabilities": {
             "GREEN": round(float(probs[0]), 4),
             "YELLOW": round(float(probs[1]), 4),
             "RED": round(float(probs[2]), 4),
         },
-        "model_used": "xgboost",
+        "model_used": _model_used(model),
     }
+    if explain:
+        explanation = explain_prediction(model, _as_row(features), pred_class)
+        if explanation is not None:
+            result["explanation"] = explanation
+    return result
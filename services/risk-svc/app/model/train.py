@@ -7,7 +7,7 @@ logs metrics / artefacts to MLflow, and persists the best model.
 import os
 import json
 import logging
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Optional
 
 import numpy as np
 import pandas as pd
@@ -23,59 +23,14 @@ from sklearn.metrics import (
 )
 import joblib
 
+from app.features.assemble import assemble_features_frame
+from app.features.schema import FEATURE_COLUMNS
+
 logger = logging.getLogger(__name__)
 
 MODEL_DIR = os.getenv("MODEL_DIR", "data/models")
 os.makedirs(MODEL_DIR, exist_ok=True)
 
-# Feature columns aligned with assemble.py
-FEATURE_COLUMNS = [
-    "blockchain_trust_score",
-    "years_active",
-    "violation_count",
-    "aeo_tier",
-    "recent_clean_inspections",
-    "vision_anomaly_flag",
-    "vision_confidence",
-    "vision_detection_count",
-    "vision_class_encoded",
-    "cargo_hs_risk_weight",
-    "cargo_declared_value_log",
-    "cargo_weight",
-    "cargo_volume",
-    "cargo_category_encoded",
-    "cargo_value_weight_ratio",
-    "route_origin_risk_index",
-    "route_transshipment_count",
-    "route_carrier_risk",
-    "route_port_risk",
-    "intel_ofac_match",
-    "intel_un_conflict_flag",
-    "intel_interpol_alert",
-    "intel_seasonal_index",
-    "intel_composite_score",
-    "trust_vision_interaction",
-]
-
-VISION_CLASS_MAP = {
-    "none": 0,
-    "weapon": 1,
-    "narcotic": 2,
-    "undeclared_goods": 3,
-    "density_anomaly": 4,
-}
-
-CARGO_CATEGORY_MAP = {
-    "unknown": 0,
-    "electronics": 1,
-    "textiles": 2,
-    "chemicals": 3,
-    "metals": 4,
-    "food": 5,
-    "machinery": 6,
-    "pharmaceuticals": 7,
-}
-
 
 def _load_training_data(data_path: str = None) -> pd.DataFrame:
     """Load real training data from open-source datasets.
@@ -103,29 +58,9 @@ def _load_training_data(data_path: str = None) -> pd.DataFrame:
             logger.info(f"Loading training data from {path}")
             df = pd.read_csv(path)
 
-            # Encode categorical columns if present
-            if "vision_class" in df.columns:
-                df["vision_class_encoded"] = df["vision_class"].map(VISION_CLASS_MAP).fillna(0).astype(int)
-            if "cargo_category" in df.columns:
-                df["cargo_category_encoded"] = df["cargo_category"].map(CARGO_CATEGORY_MAP).fillna(0).astype(int)
-
-            # Derive computed features if missing
-            if "cargo_declared_value_log" not in df.columns and "cargo_declared_value" in df.columns:
-                import math
-                df["cargo_declared_value_log"] = df["cargo_declared_value"].clip(lower=1).apply(math.log)
-            if "cargo_value_weight_ratio" not in df.columns:
-                df["cargo_value_weight_ratio"] = df.get("cargo_declared_value", 1) / df.get("cargo_weight", 1).clip(lower=1)
-            if "intel_composite_score" not in df.columns:
-                df["intel_composite_score"] = (
-                    df.get("intel_ofac_match", 0) * 50
-                    + df.get("intel_un_conflict_flag", 0) * 30
-                    + df.get("intel_interpol_alert", 0) * 20
-                    + df.get("intel_seasonal_index", 1.0)
-                )
-            if "trust_vision_interaction" not in df.columns:
-                df["trust_vision_interaction"] = (
-                    (100 - df.get("blockchain_trust_score", 50)) * df.get("vision_confidence", 0)
-                )
+            # Same derivations as serving (schema.py); precomputed feature
+            # columns in the CSV are kept
+            features = assemble_features_frame(df, keep_existing=True)
 
             # Map label column
             if "lane_code" in df.columns and "label" not in df.columns:
@@ -134,11 +69,7 @@ def _load_training_data(data_path: str = None) -> pd.DataFrame:
                 lane_map = {"GREEN": 0, "YELLOW": 1, "RED": 2}
                 df["label"] = df["lane"].map(lane_map).fillna(1).astype(int)
 
-            # Ensure all feature columns exist with defaults
-            for col in FEATURE_COLUMNS:
-                if col not in df.columns:
-                    df[col] = 0.0
-
+            df = features.assign(label=df["label"])
             logger.info(f"Loaded {len(df)} training samples from {path}")
             return df
 
@@ -149,16 +80,23 @@ def _load_training_data(data_path: str = None) -> pd.DataFrame:
     )
 
 
-def train_model(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+def train_model(
+    config: Optional[Dict[str, Any]] = None,
+    progress: Optional[Callable[[str, float], None]] = None,
+) -> Dict[str, Any]:
     """Train an XGBoost risk classification model.
 
     Args:
-        config: Optional hyperparameter overrides.
+        config: Optional hyperparameter overrides ("n_jobs" caps XGBoost threads).
+        progress: Optional callback(stage, fraction done) between steps.
 
     Returns:
         Dictionary with training results and metrics.
     """
     config = config or {}
+    progress = progress or (lambda stage, fraction: None)
+
+    progress("loading_data", 0.0)
 
     logger.info("Loading training data from open-source datasets...")
     df = _load_training_data(
@@ -189,10 +127,13 @@ def train_model(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         "random_state": 42,
         "use_label_encoder": False,
     }
+    if config.get("n_jobs"):
+        params["n_jobs"] = int(config["n_jobs"])
 
     logger.info(f"Training XGBoost with params: {params}")
     model = xgb.XGBClassifier(**params)
 
+    progress("fitting", 0.1)
     model.fit(
         X_train,
         y_train,
@@ -201,6 +142,7 @@ def train_model(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     )
 
     # Evaluate
+    progress("evaluating", 0.4)
     y_pred = model.predict(X_test)
     y_prob = model.predict_proba(X_test)
 
@@ -216,6 +158,7 @@ def train_model(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         auc = 0.0
 
     # Cross-validation
+    progress("cross_validating", 0.5)
     cv_scores = cross_val_score(
         xgb.XGBClassifier(**params),
         X,
@@ -229,6 +172,7 @@ def train_model(config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     sorted_imp = sorted(importances.items(), key=lambda x: x[1], reverse=True)
 
     # Save model
+    progress("saving", 0.9)
     model_path = os.path.join(MODEL_DIR, "xgboost_risk_model.json")
     model.save_model(model_path)
     joblib.dump(model, os.path.join(MODEL_DIR, "xgboost_risk_model.pkl"))
@@ -0,0 +1,183 @@
+"""Background training jobs for the risk model.
+
+Training runs in a separate, spawned process so /score never waits on
+XGBoost fitting or cross-validation. Each job gets an id; the child
+reports (stage, fraction) progress over a queue, which a watcher thread
+in the service folds into the job record served by GET /train/{job_id}.
+A job can be cancelled (the child is terminated).
+
+Resource limits for the child:
+  - TRAIN_CPU_THREADS caps OpenMP/BLAS threads and XGBoost's n_jobs;
+  - TRAIN_NICE lowers its scheduling priority below the serving workers.
+Only TRAIN_MAX_CONCURRENT jobs may run at once (default 1).
+"""
+
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+TRAIN_CPU_THREADS = int(os.getenv("TRAIN_CPU_THREADS", "1"))
+TRAIN_NICE = int(os.getenv("TRAIN_NICE", "10"))
+TRAIN_MAX_CONCURRENT = int(os.getenv("TRAIN_MAX_CONCURRENT", "1"))
+TRAIN_JOB_HISTORY = 50  # finished jobs kept for GET /train/{job_id}
+
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+_ACTIVE = ("queued", "running")
+
+_ctx = mp.get_context("spawn")  # never fork a process that has an event loop
+_jobs: Dict[str, "TrainingJob"] = {}
+_jobs_lock = threading.Lock()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _run_in_child(config: Dict[str, Any], events, threads: int, nice: int) -> None:
+    """Child process entry point: limit resources, train, report back."""
+    for var in _THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    if nice:
+        try:
+            os.nice(nice)
+        except OSError:
+            pass
+    try:
+        from app.model.train import train_model
+
+        result = train_model(
+            {**config, "n_jobs": threads},
+            progress=lambda stage, fraction: events.put(("progress", stage, fraction)),
+        )
+        events.put(("result", result))
+    except Exception as e:
+        events.put(("error", f"{type(e).__name__}: {e}"))
+
+
+class TrainingJob:
+    """State of one training run, updated by its watcher thread."""
+
+    def __init__(self, kind: str, config: Dict[str, Any], on_success: Optional[Callable[[Dict], None]]):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.config = config
+        self.status = "queued"
+        self.stage = "queued"
+        self.progress = 0.0
+        self.created_at = _now()
+        self.finished_at: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self._on_success = on_success
+        self._events = _ctx.Queue()
+        self._process = None
+
+    def start(self) -> None:
+        self._process = _ctx.Process(
+            target=_run_in_child,
+            args=(self.config, self._events, TRAIN_CPU_THREADS, TRAIN_NICE),
+            name=f"train-{self.job_id}",
+            daemon=True,
+        )
+        self._process.start()
+        self.status = "running"
+        threading.Thread(target=self._watch, name=f"train-watch-{self.job_id}", daemon=True).start()
+
+    def _finish(self, status: str) -> None:
+        if self.status in _ACTIVE:
+            self.status = status
+            self.finished_at = _now()
+
+    def _watch(self) -> None:
+        while self.status in _ACTIVE:
+            try:
+                event = self._events.get(timeout=0.5)
+            except queue.Empty:
+                if not self._process.is_alive():
+                    self._process.join()
+                    self.error = self.error or f"training process exited with code {self._process.exitcode}"
+                    self._finish("failed")
+                continue
+            if event[0] == "progress":
+                self.stage, self.progress = event[1], float(event[2])
+            elif event[0] == "result":
+                self.result, self.stage, self.progress = event[1], "done", 1.0
+                if self._on_success is not None and self.status == "running":
+                    try:
+                        self._on_success(self.result)
+                    except Exception as e:
+                        logger.warning(f"Post-training hook failed for job {self.job_id}: {e}")
+                self._finish("succeeded")
+            else:
+                self.error = event[1]
+                self._finish("failed")
+        if self._process is not None:
+            self._process.join(timeout=5)
+
+    def cancel(self) -> bool:
+        if self.status not in _ACTIVE:
+            return False
+        self._finish("cancelled")
+        if self._process is not None and self._process.is_alive():
+            self._process.terminate()
+        return True
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobLimitError(RuntimeError):
+    """Raised when TRAIN_MAX_CONCURRENT jobs are already running."""
+
+
+def submit_training_job(
+    config: Optional[Dict[str, Any]] = None,
+    kind: str = "train",
+    on_success: Optional[Callable[[Dict], None]] = None,
+) -> TrainingJob:
+    """Start training in a child process and return its job.
+
+    Raises:
+        JobLimitError: If the concurrent job limit is reached.
+    """
+    with _jobs_lock:
+        running = [job for job in _jobs.values() if job.status in _ACTIVE]
+        if len(running) >= TRAIN_MAX_CONCURRENT:
+            raise JobLimitError(f"training already in progress: {running[0].job_id}")
+        finished = [job_id for job_id, job in _jobs.items() if job.status not in _ACTIVE]
+        for job_id in finished[: max(len(finished) - TRAIN_JOB_HISTORY + 1, 0)]:
+            del _jobs[job_id]
+        job = TrainingJob(kind, dict(config or {}), on_success)
+        _jobs[job.job_id] = job
+        job.start()
+    logger.info(f"Training job {job.job_id} ({kind}) started")
+    return job
+
+
+def get_job(job_id: str) -> Optional[TrainingJob]:
+    return _jobs.get(job_id)
+
+
+def cancel_job(job_id: str) -> Optional[TrainingJob]:
+    """Cancel a job; returns it (or None if unknown)."""
+    job = _jobs.get(job_id)
+    if job is not None and job.cancel():
+        logger.info(f"Training job {job_id} cancelled")
+    return job
@@ -71,6 +71,45 @@ def detect_adversarial_spike(
     }
 
 
+def _skip_retrain(queue_count: Optional[int], force: bool) -> Optional[Dict[str, Any]]:
+    if not force and queue_count is not None and queue_count < RETRAIN_THRESHOLD:
+        return {
+            "status": "skipped",
+            "reason": f"Queue count {queue_count} < threshold {RETRAIN_THRESHOLD}",
+        }
+    return None
+
+
+def _retrain_config() -> Dict[str, Any]:
+    return {"n_samples": 6000, "seed": int(datetime.now().timestamp()) % 10000}
+
+
+def reload_serving_model(results: Optional[Dict[str, Any]] = None) -> None:
+    """Load, warm up and hot-swap the freshly saved model (off the request path)."""
+    from app.model.predict import MODEL_PATH, model_holder
+
+    results = results or {}
+    version = f"retrain-{datetime.now(timezone.utc):%Y%m%d%H%M%S}"
+    model_holder.swap(results.get("model_path", MODEL_PATH), version)
+
+
+def submit_retrain_job(queue_count: Optional[int] = None, force: bool = False) -> Dict[str, Any]:
+    """Start a retrain in a background process if conditions are met.
+
+    Returns:
+        The skip reason, or the job record (poll GET /train/{job_id}).
+    """
+    skipped = _skip_retrain(queue_count, force)
+    if skipped:
+        return skipped
+
+    from app.retrain.jobs import submit_training_job
+
+    logger.info("Starting scheduled retrain job in the background...")
+    job = submit_training_job(_retrain_config(), kind="retrain", on_success=reload_serving_model)
+    return {"status": "started", **job.to_dict()}
+
+
 def run_retrain_job(
     queue_count: Optional[int] = None,
     force: bool = False,
@@ -84,7 +123,8 @@ def run_retrain_job(
       4. Log new model to MLflow
       5. Deploy to 10% traffic split (A/B)
 
-    For now, this performs an in-process retrain.
+    For now, this performs an in-process retrain; the service uses
+    submit_retrain_job, which runs the same steps in a child process.
 
     Args:
         queue_count: Override queue count check. If None, defaults to threshold.
@@ -93,23 +133,16 @@ def run_retrain_job(
     Returns:
         Dict with retrain results.
     """
-    if not force and queue_count is not None and queue_count < RETRAIN_THRESHOLD:
-        return {
-            "status": "skipped",
-            "reason": f"Queue count {queue_count} < threshold {RETRAIN_THRESHOLD}",
-        }
+    skipped = _skip_retrain(queue_count, force)
+    if skipped:
+        return skipped
 
     try:
         from app.model.train import train_model
 
         logger.info("Starting scheduled retrain job...")
-        results = train_model({"n_samples": 6000, "seed": int(datetime.now().timestamp()) % 10000})
-
-        # Reload the model in predict.py
-        from app.model import predict as predict_mod
-
-        predict_mod._model_loaded = False
-        predict_mod._model = None
+        results = train_model(_retrain_config())
+        reload_serving_model(results)
 
         logger.info(f"Retrain complete: accuracy={results.get('accuracy')}")
         return {
@@ -3,3 +3,13 @@ import os
 
 # Add the parent directory to Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _allow_tmp_models(tmp_path, monkeypatch):
+    """Let tests load model files from their tmp_path (see resolve_model_path)."""
+    from app.model import predict
+
+    monkeypatch.setattr(predict, "MODEL_ROOTS", predict.MODEL_ROOTS + [str(tmp_path)])
@@ -0,0 +1,96 @@
+import random
+
+import numpy as np
+
+
+def _random_payload(rng: random.Random) -> dict:
+    """A scoring payload with random keys omitted and mixed value types."""
+    choices = {
+        "blockchain_trust_score": lambda: rng.choice([rng.uniform(0, 100), rng.randint(0, 100)]),
+        "years_active": lambda: rng.choice([rng.randint(0, 40), rng.uniform(-2, 40)]),
+        "violation_count": lambda: rng.randint(0, 9),
+        "aeo_tier": lambda: rng.randint(0, 3),
+        "recent_clean_inspections": lambda: rng.randint(0, 30),
+        "vision_anomaly_flag": lambda: rng.choice([True, False, 0, 1]),
+        "vision_confidence": lambda: rng.random(),
+        "vision_detection_count": lambda: rng.randint(0, 5),
+        "vision_class": lambda: rng.choice(["none", "weapon", "narcotic", "density_anomaly", "ufo"]),
+        "cargo_hs_code": lambda: rng.choice(["8471.30.10", "9306.30", "3004.90.99", "12", "0000.00", "7108.12"]),
+        "cargo_declared_value": lambda: rng.choice([rng.lognormvariate(10, 4), rng.uniform(-5, 1), 0]),
+        "cargo_weight": lambda: rng.choice([rng.uniform(0, 5e4), 0.5]),
+        "cargo_volume": lambda: rng.uniform(0, 80),
+        "cargo_category": lambda: rng.choice(["electronics", "metals", "pharmaceuticals", "toys"]),
+        "origin_country": lambda: rng.choice(["", "IR", "India", "KP", "Atlantis", "SY"]),
+        "route_origin_risk_index": lambda: rng.choice([None, rng.uniform(0, 10)]),
+        "route_transshipment_count": lambda: rng.randint(0, 4),
+        "route_carrier_risk": lambda: rng.uniform(0, 5),
+        "route_carrier_history": lambda: rng.randint(0, 5),
+        "route_port_risk": lambda: rng.uniform(0, 3),
+        "importer_name": lambda: rng.choice(["", "Acme Traders", "Hezbollah Front Ltd", "Gulf Metals"]),
+        "intel_ofac_match": lambda: rng.choice([None, True, False]),
+        "intel_un_conflict_flag": lambda: rng.choice([None, True, False]),
+        "intel_interpol_alert": lambda: rng.choice([None, True, False]),
+        "intel_seasonal_index": lambda: rng.uniform(0.5, 2),
+    }
+    return {key: make() for key, make in choices.items() if rng.random() < 0.7}
+
+
+def test_frame_assembly_matches_scalar_path():
+    import pandas as pd
+
+    from app.features.assemble import FEATURE_COLUMNS, assemble_features, assemble_features_frame
+
+    rng = random.Random(0)
+    for trial in range(20):
+        payloads = [_random_payload(rng) for _ in range(rng.randint(1, 150))]
+        frame = assemble_features_frame(pd.DataFrame(payloads))
+        assert list(frame.columns) == FEATURE_COLUMNS
+        expected = [assemble_features(p) for p in payloads]
+        for col in FEATURE_COLUMNS:
+            want = np.array([row[col] for row in expected])
+            assert np.array_equal(frame[col].to_numpy(), want), (trial, col)
+            assert frame[col].dtype == want.dtype, (trial, col)
+
+
+def test_frame_assembly_handles_missing_columns():
+    import pandas as pd
+
+    from app.features.assemble import assemble_features, assemble_features_frame
+
+    frame = assemble_features_frame(pd.DataFrame(index=range(3)))
+    assert frame.iloc[0].to_dict() == assemble_features({})
+
+
+def test_training_data_uses_serving_derivations(tmp_path):
+    import pandas as pd
+
+    from app.features.assemble import FEATURE_COLUMNS, assemble_features
+    from app.model.train import _load_training_data
+
+    rng = random.Random(1)
+    keys = ["blockchain_trust_score", "vision_confidence", "vision_class", "cargo_hs_code",
+            "cargo_declared_value", "cargo_weight", "cargo_category", "origin_country", "importer_name"]
+    payloads = [{k: v for k, v in _random_payload(rng).items() if k in keys} for _ in range(200)]
+    raw = pd.DataFrame(payloads)
+    raw["lane"] = [rng.choice(["GREEN", "YELLOW", "RED"]) for _ in payloads]
+    raw["aeo_tier"] = 2  # a precomputed feature column is kept as is
+    path = tmp_path / "raw.csv"
+    raw.to_csv(path, index=False)
+
+    df = _load_training_data(str(path))
+    assert list(df.columns) == FEATURE_COLUMNS + ["label"]
+    loaded = pd.read_csv(path)
+    for i in range(len(df)):
+        payload = {k: v for k, v in loaded.iloc[i].to_dict().items() if pd.notna(v) and k != "lane"}
+        assert df.iloc[i][FEATURE_COLUMNS].tolist() == list(assemble_features(payload).values())
+
+
+def test_hs_weight_resolves_any_format_to_most_specific_prefix(monkeypatch):
+    from app.features import hs_weights
+    from app.features.assemble import assemble_features
+
+    monkeypatch.setattr(hs_weights, "_table", hs_weights._table)
+    hs_weights.update_hs_risk_weights({"93": 2.2})
+
+    for code, weight in [("847130", 1.2), ("8471.30.10", 1.2), ("9306.21", 2.2), ("9306.30.00", 2.5), ("1006", 1.0)]:
+        assert assemble_features({"cargo_hs_code": code})["cargo_hs_risk_weight"] == weight
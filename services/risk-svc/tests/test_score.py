@@ -25,3 +25,355 @@ def test_score_returns_schema():
     assert "lane" in body
     assert "risk_score" in body
     assert "top_features" in body
+
+
+def _save_small_model(path) -> str:
+    import numpy as np
+    import xgboost as xgb
+
+    from app.model.predict import FEATURE_COLUMNS
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, len(FEATURE_COLUMNS)))
+    model = xgb.XGBClassifier(n_estimators=5, max_depth=2)
+    model.fit(X, np.arange(300) % 3)
+    model.save_model(str(path))
+    return str(path)
+
+
+def test_ab_routing_is_deterministic_and_batched(tmp_path):
+    import asyncio
+
+    from app.ab_test import reporter
+
+    path = _save_small_model(tmp_path / "challenger.json")
+
+    response = client.post("/ab", json={"challenger_path": path, "challenger_version": "v2", "traffic_split": 30})
+    assert response.json()["active"] is True
+    try:
+        reporter._buffer.clear()
+        versions = {}
+        for i in range(200):
+            body = client.post("/score", json={"clearance_id": f"CLR-{i}"}).json()
+            again = client.post("/score", json={"clearance_id": f"CLR-{i}"}).json()
+            assert body["model_version"] == again["model_version"]
+            versions[i] = body["model_version"]
+        share = sum(v == "v2" for v in versions.values()) / len(versions)
+        assert 0.2 < share < 0.4
+        assert len(reporter._buffer) == 400
+
+        class _Client:
+            def __init__(self):
+                self.batches = []
+
+            async def post(self, url, json):
+                self.batches.append(json["results"])
+                return type("R", (), {"status_code": 200})()
+
+        fake = _Client()
+        assert asyncio.run(reporter.flush_outcomes(fake)) == 400
+        assert sum(r["model"] == "b" for batch in fake.batches for r in batch) == 2 * share * 200
+        assert not reporter._buffer
+    finally:
+        client.post("/ab", json={"traffic_split": 0})
+
+
+def test_shadow_scores_sampled_requests_after_response(tmp_path):
+    path = _save_small_model(tmp_path / "shadow.json")
+    client.post("/shadow", json={"model_path": path, "version": "v2-shadow", "sample_rate": 1.0})
+    try:
+        for i in range(20):
+            body = client.post("/score", json={"clearance_id": f"CLR-{i}"}).json()
+            assert body["model_version"] != "v2-shadow"
+        report = client.get("/shadow").json()
+        assert report["scored"] == report["requests_seen"] == 20
+        assert sum(report["score_delta"]["counts"]) == 20
+        assert sum(sum(row.values()) for row in report["lane_matrix"].values()) == 20
+
+        client.post("/shadow", json={"model_path": path, "sample_rate": 0.0})
+        client.post("/score", json={"clearance_id": "CLR-x"})
+        report = client.get("/shadow").json()
+        assert (report["requests_seen"], report["scored"]) == (1, 0)
+
+        outside = client.post("/shadow", json={"model_path": "/etc/passwd"})
+        assert outside.status_code == 400 and client.get("/shadow").json()["active"]
+    finally:
+        client.post("/shadow", json={})
+
+
+def test_shadow_slots_are_held_only_while_scoring(monkeypatch):
+    import asyncio
+
+    from app.ab_test import shadow as shadow_module
+
+    scorer = shadow_module.ShadowScorer()
+    scorer.arm = shadow_module.ModelArm("shadow", "v-s", None)
+    monkeypatch.setattr(shadow_module, "SHADOW_MAX_PENDING", 1)
+    served = {"lane": "GREEN", "risk_score": 10.0}
+
+    # Sampled requests whose background task never ran take no slot
+    assert all(scorer.should_shadow() for _ in range(5))
+
+    async def two_at_once():
+        await asyncio.gather(scorer.score({}, served), scorer.score({}, served))
+
+    asyncio.run(two_at_once())
+    assert (scorer.scored, scorer.dropped, scorer._pending) == (1, 1, 0)
+    asyncio.run(scorer.score({}, served))
+    assert scorer.scored == 2
+
+
+def _write_training_csv(path, rows=600) -> str:
+    import numpy as np
+    import pandas as pd
+
+    from app.model.predict import FEATURE_COLUMNS
+
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(rng.normal(size=(rows, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+    df["label"] = np.arange(rows) % 3
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def _wait_for_job(job_id, timeout=120.0):
+    import time
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        body = client.get(f"/train/{job_id}").json()
+        if body["status"] not in ("queued", "running"):
+            return body
+        time.sleep(0.2)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_training_runs_as_background_job(tmp_path, monkeypatch):
+    monkeypatch.setenv("MODEL_DIR", str(tmp_path))  # inherited by the training process
+    data_path = _write_training_csv(tmp_path / "train.csv")
+
+    response = client.post("/train", json={"data_path": data_path, "n_estimators": 10})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert client.post("/train", json={"data_path": data_path}).status_code == 409
+    assert client.post("/score", json={"blockchain_trust_score": 70}).status_code == 200
+
+    body = _wait_for_job(job_id)
+    assert body["status"] == "succeeded", body["error"]
+    assert body["progress"] == 1.0
+    assert body["result"]["model_path"].startswith(str(tmp_path))
+
+    job_id = client.post("/train", json={"data_path": data_path, "n_estimators": 2000}).json()["job_id"]
+    assert client.delete(f"/train/{job_id}").json()["status"] == "cancelled"
+    assert _wait_for_job(job_id)["status"] == "cancelled"
+    assert client.get("/train/unknown").status_code == 404
+
+
+def test_model_hot_swap_is_atomic_and_reported(tmp_path):
+    import threading
+
+    from app.model.predict import model_holder
+
+    path = _save_small_model(tmp_path / "next.json")
+    before = client.get("/health").json()["model"]
+
+    versions, stop = set(), threading.Event()
+
+    def _score_until_stopped():
+        while not stop.is_set():
+            versions.add(client.post("/score", json={"blockchain_trust_score": 70}).json()["model_version"])
+
+    worker = threading.Thread(target=_score_until_stopped)
+    worker.start()
+    try:
+        response = client.post("/model/reload", json={"path": path, "version": "v9"})
+        assert response.status_code == 200
+        for _ in range(5):
+            versions.add(client.post("/score", json={}).json()["model_version"])
+    finally:
+        stop.set()
+        worker.join()
+        previous = model_holder._current
+    assert versions <= {before["version"], "v9"} and "v9" in versions
+
+    health = client.get("/health").json()["model"]
+    assert health["version"] == "v9" and health["model_used"] == "xgboost"
+    assert len(health["sha256"]) == 64
+
+    # A broken file is rejected and the serving model stays in place
+    (tmp_path / "broken.json").write_text("{")
+    assert client.post("/model/reload", json={"path": str(tmp_path / "broken.json")}).status_code == 400
+    # So are files outside the model directories, and versions without a file
+    assert client.post("/model/reload", json={"path": "/etc/passwd", "version": "v10"}).status_code == 400
+    assert client.post("/model/reload", json={"artifact_uri": "s3://models/v10.json"}).status_code == 400
+    assert client.post("/model/reload", json={"event": "promoted", "version": "v10"}).status_code == 400
+    ignored = client.post("/model/reload", json={"name": "vision-yolov8", "version": "v2", "artifact_uri": path})
+    assert ignored.json()["status"] == "ignored"
+    assert model_holder._current is previous
+    model_holder._current = None
+
+
+def test_importances_cached_and_explanations_on_request(tmp_path):
+    import numpy as np
+    import xgboost as xgb
+
+    from app.model.predict import FEATURE_COLUMNS, load_model, model_holder, predict_with_model
+
+    path = _save_small_model(tmp_path / "explain.json")
+    model = load_model(path)
+    features = {col: float(i % 5) for i, col in enumerate(FEATURE_COLUMNS)}
+
+    plain = predict_with_model(model, features)
+    assert "explanation" not in plain
+    again = predict_with_model(model, features)["top_features"]
+    assert again == plain["top_features"] and again is not plain["top_features"]
+    again[0]["importance"] = -1.0
+    again.append({"name": "x", "importance": 0.0})
+    assert predict_with_model(model, features)["top_features"] == plain["top_features"]
+    assert [f["importance"] for f in plain["top_features"]] == sorted(
+        (f["importance"] for f in plain["top_features"]), reverse=True
+    )
+
+    explained = predict_with_model(model, features, explain=True)["explanation"]
+    row = np.array([[features[col] for col in FEATURE_COLUMNS]], dtype=np.float32)
+    margin = model.get_booster().predict(xgb.DMatrix(row), output_margin=True)[0]
+    contribs = model.get_booster().predict(xgb.DMatrix(row), pred_contribs=True)[0]
+    pred_class = ["GREEN", "YELLOW", "RED"].index(explained["lane"])
+    assert np.isclose(contribs[pred_class].sum(), margin[pred_class], atol=1e-4)
+    top = [c["name"] for c in explained["contributions"]]
+    assert top[0] == FEATURE_COLUMNS[int(np.argmax(np.abs(contribs[pred_class][:-1])))]
+
+    client.post("/model/reload", json={"path": path, "version": "v-explain"})
+    try:
+        assert "explanation" in client.post("/score?explain=true", json={}).json()
+        assert "explanation" not in client.post("/score", json={}).json()
+    finally:
+        model_holder._current = None
+
+
+def test_inplace_prediction_matches_sklearn_wrapper(tmp_path):
+    import numpy as np
+
+    from app.model.predict import FEATURE_COLUMNS, load_model, predict_proba_inplace
+
+    model = load_model(_save_small_model(tmp_path / "inplace.json"))
+    rng = np.random.default_rng(5)
+    for _ in range(20):
+        values = rng.normal(size=len(FEATURE_COLUMNS))
+        features = dict(zip(FEATURE_COLUMNS, values.tolist()))
+        expected = model.predict_proba(values.astype(np.float32)[None, :])[0]
+        assert np.allclose(predict_proba_inplace(model, features), expected, atol=1e-7)
+
+
+def test_compiled_forest_matches_booster(tmp_path, monkeypatch):
+    import os
+
+    import numpy as np
+    import xgboost as xgb
+
+    from app.model.compiled import CompiledForest, compiled_path, main
+    from app.model import predict as predict_module
+    from app.model.predict import (
+        FEATURE_COLUMNS,
+        ModelHolder,
+        load_model,
+        predict_proba_inplace,
+        predict_with_model,
+        top_features,
+    )
+
+    rng = np.random.default_rng(6)
+    X = rng.normal(size=(600, len(FEATURE_COLUMNS))).astype(np.float32)
+    X[rng.random(X.shape) < 0.1] = np.nan
+    y = (np.nan_to_num(X[:, 0]) > 0.3).astype(int) + (np.nan_to_num(X[:, 3]) > 0.5)
+    booster_model = xgb.XGBClassifier(n_estimators=60, max_depth=5)
+    booster_model.fit(X, y)
+    path = str(tmp_path / "forest.json")
+    booster_model.save_model(path)
+
+    forest = CompiledForest.from_json(path)
+    assert np.abs(forest.predict_proba(X) - booster_model.predict_proba(X)).max() < 1e-6
+    assert np.allclose(forest.feature_importances_, booster_model.feature_importances_, atol=1e-6)
+
+    main([path])
+    compiled = load_model(path, backend="numpy")
+    assert isinstance(compiled, CompiledForest)
+    assert np.array_equal(compiled.predict_proba(X), forest.predict_proba(X))
+    assert top_features(compiled) == top_features(load_model(path))
+
+    features = dict(zip(FEATURE_COLUMNS, X[1].tolist()))
+    expected = booster_model.predict_proba(X[1:2])[0]
+    assert np.abs(predict_proba_inplace(compiled, features) - expected).max() < 1e-6
+    assert compiled_path(path).endswith(".npz")
+
+    # A numpy deployment may ship only the exported arrays
+    os.remove(path)
+    monkeypatch.setattr(predict_module, "MODEL_BACKEND", "numpy")
+    served = ModelHolder().swap(path, version="v-npz")
+    assert served.path == compiled_path(path) and served.info()["model_used"] == "numpy"
+    assert predict_with_model(served.model, features)["model_used"] == "numpy"
+
+
+def test_feature_row_scores_like_the_dict_path(tmp_path):
+    import numpy as np
+
+    from app.features.assemble import FEATURE_COLUMNS, assemble_features, assemble_row, assemble_rows
+    from app.model.predict import load_model, predict_with_model
+
+    model = load_model(_save_small_model(tmp_path / "rows.json"))
+    payloads = [
+        {"blockchain_trust_score": 20.0, "vision_confidence": 0.9, "cargo_declared_value": 5e5, "years_active": 3},
+        {"blockchain_trust_score": 95.0, "cargo_hs_code": "9306.30.00", "route_origin_risk_index": 7.5},
+    ]
+    batch = assemble_rows(payloads)
+    for i, payload in enumerate(payloads):
+        row = assemble_row(payload)
+        as_dict = assemble_features(payload)
+        assert list(row) == FEATURE_COLUMNS and np.array_equal(batch[i], row.values)
+        assert row.as_dict() == {k: float(np.float32(v)) for k, v in as_dict.items()}
+        assert predict_with_model(model, row) == predict_with_model(model, as_dict)
+        assert predict_with_model(None, row) == predict_with_model(None, as_dict)
+
+
+def test_hs_weight_reload_is_versioned_validated_and_replaceable(monkeypatch):
+    from app.features import hs_weights
+
+    monkeypatch.setattr(hs_weights, "_table", hs_weights._table)
+    before = client.get("/weights").json()
+    payload = {"cargo_hs_code": "9306.30.00", "blockchain_trust_score": 60.0}
+    assert client.post("/score", json=payload).json()["hs_weights_version"] == before["version"]
+
+    merged = client.post("/weights", json={"weights": {"8703.23": 1.3}}).json()["hs_weights"]
+    assert (merged["version"], merged["size"]) == (before["version"] + 1, before["size"] + 1)
+
+    bad = client.post("/weights", json={"weights": {"8703.23": -1, "x": 1.0}, "replace": True})
+    assert bad.status_code == 400 and "8703.23" in bad.json()["error"]
+    assert client.get("/weights").json()["version"] == before["version"] + 1
+
+    old_table = hs_weights.current_weights()
+    replaced = client.post("/weights", json={"weights": {"93": 2.2}, "replace": True}).json()
+    assert replaced["status"] == "replaced" and replaced["hs_weights"]["size"] == 1
+    assert hs_weights.hs_risk_weight("9306.30.00") == 2.2
+    assert hs_weights.hs_risk_weight("8471.30") == 1.0
+    assert old_table.weight("8471.30") == 1.2  # earlier snapshots are untouched
+    body = client.post("/score", json=payload).json()
+    assert body["hs_weights_version"] == before["version"] + 2
+
+
+def test_hs_weight_deltas_apply_only_to_their_base(monkeypatch):
+    from app.features import hs_weights
+
+    monkeypatch.setattr(hs_weights, "_table", hs_weights._table)
+    full = client.post("/weights", json={
+        "weights": {"8471.30": 1.2, "9306.30": 2.5, "2402.20": 1.6}, "replace": True, "source_hash": "a",
+    }).json()["hs_weights"]
+    assert full["source"] == "a"
+
+    delta = {"weights": {"9306.30": 2.7}, "removed": ["2402.20"], "base_hash": "a", "source_hash": "b"}
+    applied = client.post("/weights", json=delta).json()["hs_weights"]
+    assert (applied["version"], applied["size"], applied["source"]) == (full["version"] + 1, 2, "b")
+    assert hs_weights.hs_risk_weight("9306.30") == 2.7
+    assert hs_weights.hs_risk_weight("2402.20") == 1.0
+
+    stale = client.post("/weights", json=delta)  # computed against "a", live table is "b"
+    assert stale.status_code == 409 and stale.json()["hs_weights"]["version"] == applied["version"]
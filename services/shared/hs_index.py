@@ -0,0 +1,96 @@
+"""
+HS code prefix index, shared by risk-svc and tariff-sync-svc.
+
+HS codes arrive in many formats ("8471.30", "847130", "8471 30 10",
+"8471.30.10"); all are normalised to their digits. A code is resolved to
+the most specific entry that is a prefix of it, walking down the
+nomenclature:
+
+    chapter (2 digits) → heading (4) → subheading (6) → tariff line (8+)
+
+so "8471.30.10" finds a tariff-line entry if there is one, else the
+"8471.30" subheading, else the "8471" heading, else the "84" chapter.
+
+Entries are grouped by digit count, and a lookup probes one dict per
+distinct key length present, longest first, on prefixes of the code.
+That is at most a handful of O(1) probes (O(code length) overall),
+whatever the size of the table; the full ~12k-line tariff costs the
+same per lookup as the six seed weights.
+
+Usage:
+    from hs_index import HSIndex
+
+    index = HSIndex({"8471.30": 1.2, "84": 1.1})
+    index.get("8471.30.10")     # 1.2 (subheading)
+    index.get("8443.32", 1.0)   # 1.1 (chapter)
+    index.resolve("847130")     # ("847130", 1.2)
+"""
+
+import re
+from typing import Dict, Generic, Iterable, Mapping, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+LEVELS = {2: "chapter", 4: "heading", 6: "subheading"}  # 8+ digits: tariff line
+
+_NON_DIGITS = re.compile(r"\D")
+
+
+def normalize_hs_code(code) -> str:
+    """Digits of an HS code ("8471.30.10" → "84713010")."""
+    s = code if type(code) is str else str(code)
+    plain = s.replace(".", "")
+    return plain if plain.isdigit() else _NON_DIGITS.sub("", s)
+
+
+def hs_level(digits: str) -> str:
+    """Nomenclature level of a normalised code or prefix."""
+    return LEVELS.get(len(digits), "tariff_line" if len(digits) > 6 else "partial")
+
+
+class HSIndex(Generic[V]):
+    """Immutable most-specific-prefix index over HS codes."""
+
+    __slots__ = ("_by_length", "_levels", "_size")
+
+    def __init__(self, entries: Mapping[str, V] = None):
+        by_length: Dict[int, Dict[str, V]] = {}
+        for code, value in (entries or {}).items():
+            digits = normalize_hs_code(code)
+            if digits:
+                by_length.setdefault(len(digits), {})[digits] = value
+        self._by_length = by_length
+        # (key length, entries) from the most specific level down
+        self._levels = [(length, by_length[length]) for length in sorted(by_length, reverse=True)]
+        self._size = sum(len(level) for level in by_length.values())
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, code) -> bool:
+        digits = normalize_hs_code(code)
+        return digits in self._by_length.get(len(digits), ())
+
+    def resolve(self, code) -> Optional[Tuple[str, V]]:
+        """(matched prefix, value) for the most specific entry covering code."""
+        digits = normalize_hs_code(code)
+        for length, entries in self._levels:
+            value = entries.get(digits[:length], _MISSING)
+            if value is not _MISSING:
+                return digits[:length], value
+        return None
+
+    def get(self, code, default: V = None) -> V:
+        digits = normalize_hs_code(code)
+        for length, entries in self._levels:
+            value = entries.get(digits[:length], _MISSING)
+            if value is not _MISSING:
+                return value
+        return default
+
+    def items(self) -> Iterable[Tuple[str, V]]:
+        for _, entries in self._levels:
+            yield from entries.items()
+
+
+_MISSING = object()
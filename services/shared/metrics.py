@@ -5,12 +5,32 @@ Drop-in module: import and call `setup_metrics(app)` to add a /metrics endpoint
 that Prometheus can scrape. Automatically tracks request counts, latencies,
 and exposes custom gauges per service.
 
+Per-route series are labelled by route template (e.g. "/clearance/{clearance_id}/result"),
+method and status class, and latencies go into fixed-bucket histograms so
+p95/p99 can be computed with histogram_quantile(). The middleware is a
+plain ASGI wrapper: per request it does one bisect into the bucket bounds
+and a handful of integer increments on preallocated series.
+
+Multiple workers: set METRICS_MULTIPROC_DIR and every counter, histogram
+and gauge is also written to a memory-mapped file with one slot per
+worker (see metrics_multiprocess.py); /metrics then reports the sum over
+all workers, whichever worker serves the scrape. Counts from workers
+that have died are kept; their gauges are dropped.
+
+Pipeline stages timed with tracing.span() are exported as
+<svc>_stage_duration_seconds{stage=...} histograms.
+
 Usage:
     from app.metrics import setup_metrics
     setup_metrics(app, service_name="api-gateway")
 """
 
+import atexit
+import os
 import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
 from starlette.requests import Request
 from starlette.responses import Response
 from starlette.routing import Route
@@ -22,10 +42,47 @@ _metrics = {
     "requests_error": 0,
     "latency_sum": 0.0,
     "latency_count": 0,
+    "in_flight": 0,
 }
 
 _custom_gauges = {}
 
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+METRICS_MAX_WORKERS = int(os.getenv("METRICS_MAX_WORKERS", "32"))
+METRICS_SLOT_ENTRIES = int(os.getenv("METRICS_SLOT_ENTRIES", "2048"))
+
+# Shared mmap store when running in multiprocess mode, else None
+_store = None
+_TOTAL_KEYS = ("requests_total", "requests_success", "requests_error", "latency_sum", "latency_count")
+_total_idx: Tuple[int, List[int]] = (-1, [])
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implicit
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+UNMATCHED_ROUTE = "__unmatched__"
+_STATUS_CLASSES = ("0xx", "1xx", "2xx", "3xx", "4xx", "5xx")
+
+
+class _Series:
+    """Histogram + counter for one (route, method, status class)."""
+
+    __slots__ = ("buckets", "sum", "count", "shared", "shared_gen")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # last slot = +Inf
+        self.sum = 0.0
+        self.count = 0
+        # Indices of this series' buckets, sum and count in the shared store
+        self.shared: List[int] = []
+        self.shared_gen = -1
+
+
+# route -> method -> status class -> _Series
+_series: Dict[str, Dict[str, Dict[str, _Series]]] = {}
+
+# pipeline stage (see tracing.py) -> _Series
+_stage_series: Dict[str, _Series] = {}
+
 
 def inc(metric_name: str, value: int = 1):
     """Increment a counter metric."""
@@ -35,6 +92,179 @@ def inc(metric_name: str, value: int = 1):
 def set_gauge(name: str, value: float):
     """Set a gauge metric."""
     _custom_gauges[name] = value
+    if _store is not None:
+        _store.set_value(f"g|custom|{name}", value)
+
+
+def observe_request(route: str, method: str, status_code: int, elapsed: float) -> None:
+    """Record one finished request into its per-route histogram."""
+    by_method = _series.get(route)
+    if by_method is None:
+        by_method = _series[route] = {}
+    by_status = by_method.get(method)
+    if by_status is None:
+        by_status = by_method[method] = {}
+    status_class = _STATUS_CLASSES[status_code // 100] if 0 <= status_code < 600 else "5xx"
+    series = by_status.get(status_class)
+    if series is None:
+        series = by_status[status_class] = _Series()
+
+    bucket = bisect_left(LATENCY_BUCKETS, elapsed)
+    series.buckets[bucket] += 1
+    series.sum += elapsed
+    series.count += 1
+
+    _metrics["requests_total"] += 1
+    if status_code < 400:
+        _metrics["requests_success"] += 1
+    else:
+        _metrics["requests_error"] += 1
+    _metrics["latency_sum"] += elapsed
+    _metrics["latency_count"] += 1
+
+    if _store is not None:
+        _observe_shared(_store, route, method, status_class, series, bucket, status_code, elapsed)
+
+
+def observe_stage(stage: str, elapsed: float) -> None:
+    """Record the duration of one pipeline stage (see tracing.span)."""
+    series = _stage_series.get(stage)
+    if series is None:
+        series = _stage_series[stage] = _Series()
+    bucket = bisect_left(LATENCY_BUCKETS, elapsed)
+    series.buckets[bucket] += 1
+    series.sum += elapsed
+    series.count += 1
+
+    if _store is not None:
+        _add_shared_series(_store, f"s|{stage}|", series, bucket, elapsed)
+
+
+# ── Multiprocess mode ──
+
+def _add_shared_series(store, prefix, series, bucket, elapsed) -> int:
+    gen = store.ensure_slot()
+    if series.shared_gen != gen:
+        series.shared = [store.index(f"{prefix}{i}") for i in range(len(series.buckets))]
+        series.shared += [store.index(prefix + "sum"), store.index(prefix + "count")]
+        series.shared_gen = gen
+    idx = series.shared
+    store.add(idx[bucket], 1)
+    store.add(idx[-2], elapsed)
+    store.add(idx[-1], 1)
+    return gen
+
+
+def _observe_shared(store, route, method, status_class, series, bucket, status_code, elapsed):
+    global _total_idx
+    gen = _add_shared_series(store, f"h|{route}|{method}|{status_class}|", series, bucket, elapsed)
+    if _total_idx[0] != gen:
+        _total_idx = (gen, [store.index(f"c|{k}") for k in _TOTAL_KEYS])
+
+    total, success, error, lat_sum, lat_count = _total_idx[1]
+    store.add(total, 1)
+    store.add(success if status_code < 400 else error, 1)
+    store.add(lat_sum, elapsed)
+    store.add(lat_count, 1)
+
+
+def enable_multiprocess(directory: str, service_name: str,
+                        max_workers: int = METRICS_MAX_WORKERS,
+                        slot_entries: int = METRICS_SLOT_ENTRIES):
+    """Switch this process to the shared mmap store under `directory`."""
+    global _store
+    from metrics_multiprocess import MmapMetricsStore
+
+    path = os.path.join(directory, f"{service_name}.metrics")
+    if _store is None or _store.path != path:
+        _store = MmapMetricsStore(path, max_workers=max_workers, slot_entries=slot_entries)
+        atexit.register(_store.release_gauges)
+    return _store
+
+
+def _fill_series(s: _Series, field: str, value: float) -> None:
+    if field == "sum":
+        s.sum = value
+    elif field == "count":
+        s.count = int(value)
+    else:
+        s.buckets[int(field)] = int(value)
+
+
+def _collect_shared(store):
+    """Rebuild totals, per-route and per-stage series and live gauges from all worker slots."""
+    totals, live_gauges = store.collect()
+    metrics = {k: int(totals.get(f"c|{k}", 0)) for k in _TOTAL_KEYS}
+    metrics["latency_sum"] = totals.get("c|latency_sum", 0.0)
+    metrics["in_flight"] = int(sum(g.get("g|in_flight", 0) for _, g in live_gauges))
+
+    series: Dict[str, Dict[str, Dict[str, _Series]]] = {}
+    stages: Dict[str, _Series] = {}
+    for key, value in totals.items():
+        if key.startswith("h|"):
+            head, method, status_class, field = key.rsplit("|", 3)
+            by_status = series.setdefault(head[2:], {}).setdefault(method, {})
+            s = by_status.get(status_class)
+            if s is None:
+                s = by_status[status_class] = _Series()
+            _fill_series(s, field, value)
+        elif key.startswith("s|"):
+            head, field = key.rsplit("|", 1)
+            s = stages.get(head[2:])
+            if s is None:
+                s = stages[head[2:]] = _Series()
+            _fill_series(s, field, value)
+    return metrics, series, stages, live_gauges
+
+
+def _fmt_le(bound: float) -> str:
+    return repr(float(bound))
+
+
+def _histogram_lines(hist: str, labels: str, s: _Series) -> List[str]:
+    lines = []
+    cumulative = 0
+    for bound, n in zip(LATENCY_BUCKETS, s.buckets):
+        cumulative += n
+        lines.append(f'{hist}_bucket{{{labels},le="{_fmt_le(bound)}"}} {cumulative}')
+    cumulative += s.buckets[-1]
+    lines.append(f'{hist}_bucket{{{labels},le="+Inf"}} {cumulative}')
+    lines.append(f"{hist}_sum{{{labels}}} {s.sum:.6f}")
+    lines.append(f"{hist}_count{{{labels}}} {s.count}")
+    return lines
+
+
+def _render_histograms(service: str, series_map) -> List[str]:
+    lines = []
+    hist = f"{service}_http_request_duration_seconds"
+    counter = f"{service}_http_route_requests_total"
+
+    lines.append(f"# HELP {hist} HTTP request latency by route, method and status class")
+    lines.append(f"# TYPE {hist} histogram")
+    counter_lines = [
+        f"# HELP {counter} HTTP requests by route, method and status class",
+        f"# TYPE {counter} counter",
+    ]
+    for route, by_method in sorted(series_map.items()):
+        for method, by_status in sorted(by_method.items()):
+            for status_class, s in sorted(by_status.items()):
+                labels = f'route="{route}",method="{method}",status="{status_class}"'
+                lines.extend(_histogram_lines(hist, labels, s))
+                counter_lines.append(f"{counter}{{{labels}}} {s.count}")
+    return lines + counter_lines
+
+
+def _render_stage_histograms(service: str, stage_map) -> List[str]:
+    if not stage_map:
+        return []
+    hist = f"{service}_stage_duration_seconds"
+    lines = [
+        f"# HELP {hist} Pipeline stage duration",
+        f"# TYPE {hist} histogram",
+    ]
+    for stage, s in sorted(stage_map.items()):
+        lines.extend(_histogram_lines(hist, f'stage="{stage}"', s))
+    return lines
 
 
 async def _metrics_endpoint(request: Request) -> Response:
@@ -42,33 +272,58 @@ async def _metrics_endpoint(request: Request) -> Response:
     service = _metrics.get("_service_name", "scannr_service")
     lines = []
 
+    metrics, series_map, stage_map, live_gauges = _metrics, _series, _stage_series, None
+    if _store is not None:
+        metrics, series_map, stage_map, live_gauges = _collect_shared(_store)
+
     # Request counters
     lines.append(f"# HELP {service}_http_requests_total Total HTTP requests")
     lines.append(f"# TYPE {service}_http_requests_total counter")
-    lines.append(f'{service}_http_requests_total {_metrics["requests_total"]}')
+    lines.append(f'{service}_http_requests_total {metrics["requests_total"]}')
 
     lines.append(f"# HELP {service}_http_requests_success Successful HTTP requests")
     lines.append(f"# TYPE {service}_http_requests_success counter")
-    lines.append(f'{service}_http_requests_success {_metrics["requests_success"]}')
+    lines.append(f'{service}_http_requests_success {metrics["requests_success"]}')
 
     lines.append(f"# HELP {service}_http_requests_error Failed HTTP requests")
     lines.append(f"# TYPE {service}_http_requests_error counter")
-    lines.append(f'{service}_http_requests_error {_metrics["requests_error"]}')
+    lines.append(f'{service}_http_requests_error {metrics["requests_error"]}')
+
+    lines.append(f"# HELP {service}_http_requests_in_flight Requests currently being served")
+    lines.append(f"# TYPE {service}_http_requests_in_flight gauge")
+    lines.append(f'{service}_http_requests_in_flight {metrics["in_flight"]}')
 
     # Latency
     avg_latency = (
-        _metrics["latency_sum"] / max(_metrics["latency_count"], 1)
+        metrics["latency_sum"] / max(metrics["latency_count"], 1)
     )
     lines.append(f"# HELP {service}_http_latency_avg_seconds Average request latency")
     lines.append(f"# TYPE {service}_http_latency_avg_seconds gauge")
     lines.append(f"{service}_http_latency_avg_seconds {avg_latency:.6f}")
 
-    # Custom gauges
-    for name, value in _custom_gauges.items():
-        safe_name = f"{service}_{name}"
-        lines.append(f"# HELP {safe_name} Custom gauge")
-        lines.append(f"# TYPE {safe_name} gauge")
-        lines.append(f"{safe_name} {value}")
+    # Per-route histograms and counters
+    lines.extend(_render_histograms(service, series_map))
+    lines.extend(_render_stage_histograms(service, stage_map))
+
+    # Custom gauges (one sample per live worker in multiprocess mode)
+    if live_gauges is None:
+        for name, value in _custom_gauges.items():
+            safe_name = f"{service}_{name}"
+            lines.append(f"# HELP {safe_name} Custom gauge")
+            lines.append(f"# TYPE {safe_name} gauge")
+            lines.append(f"{safe_name} {value}")
+    else:
+        by_name: Dict[str, List[Tuple[int, float]]] = {}
+        for pid, gauges in live_gauges:
+            for key, value in gauges.items():
+                if key.startswith("g|custom|"):
+                    by_name.setdefault(key[len("g|custom|"):], []).append((pid, value))
+        for name, samples in sorted(by_name.items()):
+            safe_name = f"{service}_{name}"
+            lines.append(f"# HELP {safe_name} Custom gauge")
+            lines.append(f"# TYPE {safe_name} gauge")
+            for pid, value in sorted(samples):
+                lines.append(f'{safe_name}{{pid="{pid}"}} {value}')
 
     # Process uptime
     lines.append(f"# HELP {service}_uptime_seconds Process uptime")
@@ -87,31 +342,78 @@ def get_metrics_route() -> Route:
     return Route("/metrics", _metrics_endpoint, methods=["GET"])
 
 
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency histograms.
+
+    The route template is read after the inner app has run: FastAPI puts
+    the matched route in scope["route"], plain Starlette leaves the
+    endpoint in scope["endpoint"], which is mapped back to its path.
+    """
+
+    def __init__(self, app, routes_source=None):
+        self.app = app
+        self._routes_source = routes_source
+        self._endpoint_paths: Dict[object, str] = {}
+
+    def _route_template(self, scope) -> str:
+        route = scope.get("route")
+        if route is not None:
+            return getattr(route, "path", UNMATCHED_ROUTE)
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        path = self._endpoint_paths.get(endpoint)
+        if path is None:
+            self._refresh_endpoint_paths()
+            path = self._endpoint_paths.get(endpoint, UNMATCHED_ROUTE)
+        return path
+
+    def _refresh_endpoint_paths(self) -> None:
+        routes = getattr(self._routes_source, "routes", None) or []
+        self._endpoint_paths = {
+            getattr(r, "endpoint", None): r.path for r in routes if hasattr(r, "path")
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        _metrics["in_flight"] += 1
+        if _store is not None:
+            _store.inc("g|in_flight", 1)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _metrics["in_flight"] -= 1
+            if _store is not None:
+                _store.inc("g|in_flight", -1)
+            observe_request(self._route_template(scope), scope["method"], status_code, elapsed)
+
+
 def setup_metrics(app, service_name: str = "scannr"):
     """
-    Register metrics middleware and /metrics endpoint on a Starlette app.
+    Register metrics and trace-id middleware and /metrics endpoint on a Starlette app.
 
     For Starlette apps that build routes at construction time, call this
     after app creation and add get_metrics_route() to your routes list.
     """
     _metrics["_service_name"] = service_name.replace("-", "_")
     _metrics["_start_time"] = time.time()
+    if METRICS_MULTIPROC_DIR:
+        enable_multiprocess(METRICS_MULTIPROC_DIR, _metrics["_service_name"])
+    app.add_middleware(MetricsMiddleware, routes_source=app)
 
-    @app.middleware("http")
-    async def metrics_middleware(request: Request, call_next):
-        _metrics["requests_total"] += 1
-        start = time.time()
-        try:
-            response = await call_next(request)
-            if response.status_code < 400:
-                _metrics["requests_success"] += 1
-            else:
-                _metrics["requests_error"] += 1
-            return response
-        except Exception:
-            _metrics["requests_error"] += 1
-            raise
-        finally:
-            elapsed = time.time() - start
-            _metrics["latency_sum"] += elapsed
-            _metrics["latency_count"] += 1
+    from tracing import TraceMiddleware
+
+    app.add_middleware(TraceMiddleware, service_name=service_name)
@@ -0,0 +1,232 @@
+"""
+Memory-mapped metric storage shared by all workers of one service.
+
+When a service runs under several uvicorn/gunicorn workers, each worker
+keeps its own copy of metrics.py's module state, so a /metrics scrape
+only sees the worker that happened to answer it. With
+METRICS_MULTIPROC_DIR set, metrics.py writes every counter, histogram
+bucket and gauge into this store instead, and /metrics aggregates all
+workers.
+
+File layout (<dir>/<service>.metrics):
+
+    header   64 bytes     magic, version, max_workers, slot_entries
+    slot[i]  64 bytes     pid, entry count, last heartbeat
+             N entries    120-byte key + float64 value
+
+Each slot has exactly one writer (the worker that claimed it), so no
+locking is needed on the hot path: a new entry's key is written before
+the slot's entry count is bumped, and readers never look past the count.
+The file lock is only taken while claiming a slot.
+
+Dead workers: counters and histograms are monotonic, so a dead worker's
+values keep being included in the totals, and the next worker that
+reuses the slot continues counting on top of them. Gauges (keys starting
+with "g|") only make sense for live processes; they are skipped for dead
+pids and reset when a slot is adopted.
+
+Clear the directory when the service (not a single worker) restarts, as
+with prometheus_client's multiprocess mode.
+"""
+
+import fcntl
+import mmap
+import os
+import struct
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+_MAGIC = 0x53434E524D455452  # "SCNRMETR"
+_VERSION = 1
+_FILE_HEADER = struct.Struct("<qqqq")
+_FILE_HEADER_SIZE = 64
+_SLOT_HEADER = struct.Struct("<qqd")  # pid, entry count, heartbeat
+_SLOT_HEADER_SIZE = 64
+_KEY_SIZE = 120
+_ENTRY_SIZE = _KEY_SIZE + 8
+
+GAUGE_PREFIX = "g|"
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MmapMetricsStore:
+    """Per-worker slots of named float64 values in one shared file."""
+
+    def __init__(self, path: str, max_workers: int = 32, slot_entries: int = 2048):
+        self.path = path
+        self.max_workers = max_workers
+        self.slot_entries = slot_entries
+        self.slot_size = _SLOT_HEADER_SIZE + slot_entries * _ENTRY_SIZE
+        size = _FILE_HEADER_SIZE + max_workers * self.slot_size
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        with self._locked():
+            header = os.pread(self._fd, _FILE_HEADER.size, 0)
+            expected = (_MAGIC, _VERSION, max_workers, slot_entries)
+            if len(header) < _FILE_HEADER.size or _FILE_HEADER.unpack(header) != expected:
+                # New file or incompatible layout: start from zero
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, _FILE_HEADER.pack(*expected), 0)
+        self._mm = mmap.mmap(self._fd, size)
+        self._doubles = memoryview(self._mm).cast("d")
+
+        self._slot: Optional[int] = None
+        self._pid = 0
+        self._index: Dict[str, int] = {}
+        # Bumped on every claim; callers caching indices compare against it
+        self.generation = 0
+        os.register_at_fork(after_in_child=self._forget_slot)
+
+    # ── Slot ownership ───────────────────────────────────────────────
+
+    @contextmanager
+    def _locked(self):
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _slot_offset(self, slot: int) -> int:
+        return _FILE_HEADER_SIZE + slot * self.slot_size
+
+    def _read_slot_header(self, slot: int) -> Tuple[int, int, float]:
+        return _SLOT_HEADER.unpack_from(self._mm, self._slot_offset(slot))
+
+    def claim_slot(self) -> int:
+        """Claim a slot for the current process (free first, then dead)."""
+        pid = os.getpid()
+        with self._locked():
+            headers = [self._read_slot_header(i) for i in range(self.max_workers)]
+            slot = next((i for i, h in enumerate(headers) if h[0] == pid), None)
+            if slot is None:
+                slot = next((i for i, h in enumerate(headers) if h[0] == 0), None)
+            if slot is None:
+                slot = next((i for i, h in enumerate(headers) if not _pid_alive(h[0])), None)
+            if slot is None:
+                raise RuntimeError(f"All {self.max_workers} metric slots in {self.path} are in use")
+
+            _, count, _ = headers[slot]
+            _SLOT_HEADER.pack_into(self._mm, self._slot_offset(slot), pid, count, time.time())
+
+        self._slot = slot
+        self._pid = pid
+        self._index = {}
+        self.generation += 1
+        # Adopt the previous owner's entries: counters carry on, gauges reset
+        for key, idx in self._iter_entries(slot):
+            self._index[key] = idx
+            if key.startswith(GAUGE_PREFIX):
+                self._doubles[idx] = 0.0
+        return slot
+
+    def _forget_slot(self) -> None:
+        # A forked child must not keep writing into its parent's slot
+        self._slot = None
+        self._pid = 0
+        self._index = {}
+
+    def ensure_slot(self) -> int:
+        """Claim a slot if this process has none; return the generation."""
+        if self._slot is None:
+            self.claim_slot()
+        return self.generation
+
+    # ── Writer side (owning worker only) ────────────────────────────
+
+    def index(self, key: str) -> int:
+        """Return the float64 index of `key` in this worker's slot (-1 if full)."""
+        idx = self._index.get(key)
+        if idx is not None:
+            return idx
+        self.ensure_slot()
+        idx = self._index.get(key)
+        if idx is not None:
+            return idx
+
+        base = self._slot_offset(self._slot)
+        pid, count, _ = _SLOT_HEADER.unpack_from(self._mm, base)
+        if count >= self.slot_entries:
+            return -1  # slot full; caller drops the update
+        raw = key.encode("utf-8")[:_KEY_SIZE]
+        entry = base + _SLOT_HEADER_SIZE + count * _ENTRY_SIZE
+        self._mm[entry:entry + _KEY_SIZE] = raw.ljust(_KEY_SIZE, b"\0")
+        idx = (entry + _KEY_SIZE) // 8
+        self._doubles[idx] = 0.0
+        # Publish only after the key and value are in place
+        _SLOT_HEADER.pack_into(self._mm, base, pid, count + 1, time.time())
+        self._index[key] = idx
+        return idx
+
+    def add(self, idx: int, value: float) -> None:
+        if idx >= 0:
+            self._doubles[idx] += value
+
+    def set(self, idx: int, value: float) -> None:
+        if idx >= 0:
+            self._doubles[idx] = value
+
+    def inc(self, key: str, value: float = 1.0) -> None:
+        self.add(self.index(key), value)
+
+    def set_value(self, key: str, value: float) -> None:
+        self.set(self.index(key), value)
+
+    def release_gauges(self) -> None:
+        """Zero this worker's gauges (called at worker exit)."""
+        if self._slot is None:
+            return
+        for key, idx in self._index.items():
+            if key.startswith(GAUGE_PREFIX):
+                self._doubles[idx] = 0.0
+
+    # ── Reader side (any worker) ─────────────────────────────────────
+
+    def _iter_entries(self, slot: int):
+        base = self._slot_offset(slot)
+        _, count, _ = _SLOT_HEADER.unpack_from(self._mm, base)
+        for i in range(min(count, self.slot_entries)):
+            entry = base + _SLOT_HEADER_SIZE + i * _ENTRY_SIZE
+            key = bytes(self._mm[entry:entry + _KEY_SIZE]).rstrip(b"\0").decode("utf-8", "replace")
+            yield key, (entry + _KEY_SIZE) // 8
+
+    def collect(self) -> Tuple[Dict[str, float], List[Tuple[int, Dict[str, float]]]]:
+        """Aggregate all slots.
+
+        Returns:
+            (totals, live_gauges): `totals` sums every non-gauge key over all
+            slots, live or dead; `live_gauges` lists (pid, {gauge key: value})
+            for slots whose process is still alive.
+        """
+        totals: Dict[str, float] = {}
+        live_gauges: List[Tuple[int, Dict[str, float]]] = []
+        for slot in range(self.max_workers):
+            pid, _, _ = self._read_slot_header(slot)
+            if pid == 0:
+                continue
+            alive = _pid_alive(pid)
+            gauges: Dict[str, float] = {}
+            for key, idx in self._iter_entries(slot):
+                value = self._doubles[idx]
+                if key.startswith(GAUGE_PREFIX):
+                    if alive:
+                        gauges[key] = value
+                else:
+                    totals[key] = totals.get(key, 0.0) + value
+            if alive:
+                live_gauges.append((pid, gauges))
+        return totals, live_gauges
@@ -0,0 +1,5 @@
+import sys
+import os
+
+# Add the shared directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -0,0 +1,34 @@
+import random
+
+from hs_index import HSIndex, hs_level, normalize_hs_code
+
+
+def test_normalizes_formats_and_resolves_most_specific_prefix():
+    index = HSIndex({"84": 1.1, "8471": 1.15, "8471.30": 1.2, "8471.30.10": 1.3, "2933.39": 2.0})
+
+    assert normalize_hs_code(" 8471.30.10 ") == "84713010"
+    assert normalize_hs_code("8471-30/90") == "84713090"
+    assert index.get("8471.30.10") == 1.3       # tariff line
+    assert index.get("8471 30 90") == 1.2       # subheading
+    assert index.get("847150") == 1.15          # heading
+    assert index.get("8443.32") == 1.1          # chapter
+    assert index.get("0101.21", 1.0) == 1.0     # unknown chapter
+    assert index.get("", 1.0) == 1.0
+    assert index.resolve("293339") == ("293339", 2.0)
+    assert hs_level("8471") == "heading" and hs_level("84713010") == "tariff_line"
+    assert "8471.30" in index and "847131" not in index
+    assert len(index) == 5
+
+
+def test_matches_linear_longest_prefix_scan():
+    rng = random.Random(0)
+    table = {}
+    for _ in range(3000):
+        digits = "".join(rng.choice("0123456789") for _ in range(8))
+        table[digits[: rng.choice([2, 4, 6, 8])]] = rng.random()
+    index = HSIndex(table)
+    for _ in range(2000):
+        code = "".join(rng.choice("0123456789") for _ in range(8))
+        matches = [k for k in table if code.startswith(k)]
+        expected = table[max(matches, key=len)] if matches else None
+        assert index.get(code) == expected
@@ -0,0 +1,55 @@
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import metrics
+
+
+async def _item(request):
+    return JSONResponse({"id": request.path_params["item_id"]})
+
+
+async def _boom(request):
+    return JSONResponse({"error": "nope"}, status_code=503)
+
+
+def _client():
+    routes = [
+        Route("/items/{item_id}", _item, methods=["GET"]),
+        Route("/boom", _boom, methods=["POST"]),
+        metrics.get_metrics_route(),
+    ]
+    app = Starlette(routes=routes)
+    metrics.setup_metrics(app, service_name="test-svc")
+    return TestClient(app)
+
+
+def test_histogram_labels_use_route_template():
+    client = _client()
+    client.get("/items/1")
+    client.get("/items/2")
+    client.post("/boom")
+    client.get("/does-not-exist")
+
+    body = client.get("/metrics").text
+    labels = 'route="/items/{item_id}",method="GET",status="2xx"'
+    assert f"test_svc_http_request_duration_seconds_count{{{labels}}} 2" in body
+    assert f'test_svc_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2' in body
+    assert 'test_svc_http_route_requests_total{route="/boom",method="POST",status="5xx"} 1' in body
+    assert 'route="__unmatched__",method="GET",status="4xx"' in body
+    assert "/items/1" not in body
+
+
+def test_buckets_are_cumulative():
+    metrics._series.clear()
+    metrics.observe_request("/x", "GET", 200, 0.003)
+    metrics.observe_request("/x", "GET", 200, 0.2)
+    metrics.observe_request("/x", "GET", 200, 60.0)
+
+    lines = metrics._render_histograms("svc", metrics._series)
+    buckets = [l for l in lines if l.startswith("svc_http_request_duration_seconds_bucket")]
+    counts = [int(l.rsplit(" ", 1)[1]) for l in buckets]
+    assert counts == sorted(counts)
+    assert 'le="0.005"} 1' in buckets[0]
+    assert buckets[-1].endswith('le="+Inf"} 3')
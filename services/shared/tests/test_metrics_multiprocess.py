@@ -0,0 +1,79 @@
+import multiprocessing
+import os
+
+from metrics_multiprocess import MmapMetricsStore
+
+_ctx = multiprocessing.get_context("fork")
+
+
+def _worker(path, requests, gauge, ready, release):
+    store = MmapMetricsStore(path, max_workers=2, slot_entries=64)
+    store.inc("c|requests_total", requests)
+    store.inc('h|/items/{item_id}|GET|2xx|count', requests)
+    store.set_value("g|in_flight", gauge)
+    ready.set()
+    release.wait(10)
+
+
+def _spawn(path, requests, gauge):
+    ready, release = _ctx.Event(), _ctx.Event()
+    proc = _ctx.Process(target=_worker, args=(path, requests, gauge, ready, release))
+    proc.start()
+    assert ready.wait(10)
+    return proc, release
+
+
+def test_aggregates_live_and_dead_workers(tmp_path):
+    path = str(tmp_path / "svc.metrics")
+    a, release_a = _spawn(path, 3, 1)
+    b, release_b = _spawn(path, 5, 2)
+
+    reader = MmapMetricsStore(path, max_workers=2, slot_entries=64)
+    totals, live = reader.collect()
+    assert totals["c|requests_total"] == 8
+    assert sorted(g["g|in_flight"] for _, g in live) == [1, 2]
+
+    # Worker b dies: its counts stay, its gauge goes
+    release_b.set()
+    b.join()
+    totals, live = reader.collect()
+    assert totals["c|requests_total"] == 8
+    assert [pid for pid, _ in live] == [a.pid]
+
+    # A replacement worker adopts the dead slot and keeps counting
+    c, release_c = _spawn(path, 2, 4)
+    totals, live = reader.collect()
+    assert totals["c|requests_total"] == 10
+    assert totals["h|/items/{item_id}|GET|2xx|count"] == 10
+    assert sorted(g["g|in_flight"] for _, g in live) == [1, 4]
+
+    for release, proc in ((release_a, a), (release_c, c)):
+        release.set()
+        proc.join()
+
+
+def test_metrics_endpoint_sums_workers(tmp_path, monkeypatch):
+    import metrics
+
+    monkeypatch.setattr(metrics, "_store", None)
+    store = metrics.enable_multiprocess(str(tmp_path), "svc", max_workers=4, slot_entries=256)
+    monkeypatch.setattr(metrics, "_series", {})
+    metrics.observe_request("/x", "GET", 200, 0.02)
+
+    def _child():
+        metrics.observe_request("/x", "GET", 200, 0.2)
+        metrics.observe_request("/x", "GET", 500, 0.2)
+        os._exit(0)
+
+    proc = _ctx.Process(target=_child)
+    proc.start()
+    proc.join()
+
+    _, series, _, _ = metrics._collect_shared(store)
+    ok = series["/x"]["GET"]["2xx"]
+    assert ok.count == 2
+    assert sum(ok.buckets) == 2
+    assert series["/x"]["GET"]["5xx"].count == 1
+
+    lines = metrics._render_histograms("svc", series)
+    assert 'svc_http_request_duration_seconds_count{route="/x",method="GET",status="2xx"} 2' in lines
@@ -0,0 +1,52 @@
+import json
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import metrics
+import tracing
+
+
+async def _score(request):
+    with tracing.span("predict"):
+        pass
+    return JSONResponse({"trace": tracing.current_trace().trace_id})
+
+
+def test_span_records_stage_histogram_and_trace():
+    metrics._stage_series.clear()
+    trace = tracing.start_trace("CLR-1")
+    with tracing.span("gstn"):
+        assert tracing.trace_headers() == {"X-Trace-Id": "CLR-1"}
+    with tracing.span("gstn"):
+        pass
+    record = tracing.finish_trace(trace, lane="GREEN")
+
+    assert tracing.current_trace() is None
+    assert record["trace_id"] == "CLR-1"
+    assert record["lane"] == "GREEN"
+    assert set(record["stages"]) == {"gstn"}
+    assert metrics._stage_series["gstn"].count == 2
+    lines = metrics._render_stage_histograms("svc", metrics._stage_series)
+    assert 'svc_stage_duration_seconds_count{stage="gstn"} 2' in lines
+
+
+def test_middleware_adopts_trace_id_and_dumps_jsonl(tmp_path, monkeypatch):
+    out = tmp_path / "stages.jsonl"
+    monkeypatch.setattr(tracing, "STAGE_TRACE_FILE", str(out))
+    app = Starlette(routes=[Route("/score", _score, methods=["POST"])])
+    metrics.setup_metrics(app, service_name="risk-svc")
+    client = TestClient(app)
+
+    response = client.post("/score", headers={"X-Trace-Id": "CLR-42"})
+    assert response.json() == {"trace": "CLR-42"}
+    assert response.headers["X-Trace-Id"] == "CLR-42"
+    assert client.post("/score").headers["X-Trace-Id"] != "CLR-42"
+
+    records = [json.loads(line) for line in out.read_text().splitlines()]
+    assert records[0]["trace_id"] == "CLR-42"
+    assert records[0]["service"] == "risk-svc"
+    assert records[0]["path"] == "/score"
+    assert "predict" in records[0]["stages"]
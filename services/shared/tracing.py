@@ -0,0 +1,168 @@
+"""
+Stage-level timing for SCANNR requests.
+
+A trace is one request's journey through the clearance pipeline; each
+timed step inside it is a stage. `span("risk")` times a block, adds the
+duration to the per-service `<svc>_stage_duration_seconds{stage=...}`
+histogram (see metrics.py) and to the current trace's breakdown.
+
+The trace id travels between services in the X-Trace-Id header: callers
+attach `trace_headers()` to outgoing requests, and TraceMiddleware (added
+by setup_metrics) adopts the incoming id so stages recorded in vision-svc
+and risk-svc line up with the gateway's. With STAGE_TRACE_FILE set, every
+finished trace is appended to that file as one JSON line.
+
+Usage:
+    from tracing import span, start_trace, finish_trace, trace_headers
+
+    trace = start_trace(clearance_id)
+    with span("gstn"):
+        ...
+    await client.post(url, json=body, headers=trace_headers())
+    finish_trace(trace, lane="GREEN")
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from metrics import observe_stage
+
+TRACE_HEADER = "X-Trace-Id"
+STAGE_TRACE_FILE = os.getenv("STAGE_TRACE_FILE", "")
+
+_current: ContextVar[Optional["Trace"]] = ContextVar("scannr_trace", default=None)
+_file_lock = threading.Lock()
+
+
+class Trace:
+    """Stage durations collected for one request."""
+
+    __slots__ = ("trace_id", "service", "stages", "started_at", "_t0", "_token")
+
+    def __init__(self, trace_id: str, service: str = ""):
+        self.trace_id = trace_id
+        self.service = service
+        self.stages: Dict[str, float] = {}
+        self.started_at = datetime.now(timezone.utc)
+        self._t0 = time.perf_counter()
+        self._token = None
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._t0
+
+
+def new_trace_id() -> str:
+    return uuid.uuid4().hex
+
+
+def start_trace(trace_id: Optional[str] = None, service: str = "") -> Trace:
+    """Begin a trace and make it current for this task/context."""
+    trace = Trace(trace_id or new_trace_id(), service)
+    trace._token = _current.set(trace)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+def trace_headers() -> Dict[str, str]:
+    """Headers propagating the current trace id to a downstream call."""
+    trace = _current.get()
+    return {TRACE_HEADER: trace.trace_id} if trace is not None else {}
+
+
+def record_stage(stage: str, elapsed: float) -> None:
+    """Add a measured duration to the stage histogram and current trace."""
+    observe_stage(stage, elapsed)
+    trace = _current.get()
+    if trace is not None:
+        trace.stages[stage] = trace.stages.get(stage, 0.0) + elapsed
+
+
+@contextmanager
+def span(stage: str):
+    """Time the enclosed block as `stage` (recorded even if it raises)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+def _detach(trace: Trace) -> None:
+    if trace._token is not None:
+        try:
+            _current.reset(trace._token)
+        except ValueError:
+            _current.set(None)  # finished from a different context
+        trace._token = None
+
+
+def finish_trace(trace: Trace, **fields) -> Dict[str, object]:
+    """End a trace, restore the previous one and dump it if configured.
+
+    Returns:
+        The per-request breakdown (trace_id, total_sec, stages, extra fields).
+    """
+    _detach(trace)
+    record = {
+        "trace_id": trace.trace_id,
+        "service": trace.service,
+        "started_at": trace.started_at.isoformat(),
+        "total_sec": round(trace.elapsed(), 6),
+        "stages": {k: round(v, 6) for k, v in trace.stages.items()},
+        **fields,
+    }
+    if STAGE_TRACE_FILE:
+        line = json.dumps(record, default=str) + "\n"
+        with _file_lock:
+            with open(STAGE_TRACE_FILE, "a") as f:
+                f.write(line)
+    return record
+
+
+class TraceMiddleware:
+    """ASGI middleware adopting (or minting) the request's trace id.
+
+    The id is echoed back in the response headers; a trace that recorded
+    any stage is finished and dumped when the response completes.
+    """
+
+    def __init__(self, app, service_name: str = ""):
+        self.app = app
+        self.service_name = service_name
+        self._header = TRACE_HEADER.lower().encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = None
+        for name, value in scope.get("headers", ()):
+            if name == self._header:
+                trace_id = value.decode("latin-1")
+                break
+        trace = start_trace(trace_id, self.service_name)
+        header = (self._header, trace.trace_id.encode("latin-1"))
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [header]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if trace.stages:
+                finish_trace(trace, path=scope.get("path"))
+            else:
+                _detach(trace)
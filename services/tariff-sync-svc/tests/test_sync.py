@@ -0,0 +1,131 @@
+import asyncio
+import copy
+
+import pytest
+
+from app import main
+
+_fetch_cbic_tariffs = main._fetch_cbic_tariffs
+
+
+def _tariffs(n=10):
+    return [
+        {"hs_code": f"{8400 + i}.10", "description": f"Line {i}", "duty_pct": 10.0, "risk_weight": 1.0 + i / 10,
+         "budget_year": 2026}
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def sync(monkeypatch):
+    """run_sync against a fake CBIC feed, database and risk-svc."""
+    state = {"tariffs": _tariffs(), "writes": [], "posts": [], "db_down": False, "risk": {"source": None}}
+
+    async def fetch():
+        return copy.deepcopy(state["tariffs"])
+
+    async def write(rows, removed):
+        if state["db_down"]:
+            raise OSError("database unavailable")
+        state["writes"].append(({t["hs_code"] for t in rows}, list(removed)))
+
+    async def post(body):
+        state["posts"].append(body)
+        risk = state["risk"]
+        if risk.get("status"):
+            return risk["status"]
+        if not body.get("replace") and body["base_hash"] != risk["source"]:
+            return 409
+        risk["source"] = body["source_hash"]
+        return 200
+
+    monkeypatch.setattr(main, "_fetch_cbic_tariffs", fetch)
+    monkeypatch.setattr(main, "_write_tariff_rows", write)
+    monkeypatch.setattr(main, "_post_weights", post)
+    for name, value in [("_current_weights", {}), ("_last_hash", None), ("_pushed_hash", None),
+                        ("_db_in_sync", False), ("_last_sync", None), ("_tariff_index", None)]:
+        monkeypatch.setattr(main, name, value)
+    state["run"] = lambda: asyncio.run(main.run_sync())
+    return state
+
+
+def test_unchanged_fetch_skips_db_and_push(sync):
+    first = sync["run"]()
+    assert first["status"] == "synced" and first["risk_svc_push"] == "full"
+    assert len(sync["writes"]) == 1 and len(sync["posts"]) == 1
+
+    again = sync["run"]()
+    assert again["status"] == "unchanged" and again["content_hash"] == first["content_hash"]
+    assert len(sync["writes"]) == 1 and len(sync["posts"]) == 1
+
+
+def test_only_added_and_changed_rows_are_written_and_pushed(sync):
+    sync["run"]()
+    sync["tariffs"][2]["risk_weight"] = 2.5
+    sync["tariffs"][3]["description"] = "Renamed"
+    del sync["tariffs"][9]
+    sync["tariffs"].append({"hs_code": "9306.30", "description": "Cartridges", "risk_weight": 2.5})
+
+    result = sync["run"]()
+    assert (result["added"], result["updated"], result["removed"]) == (1, 2, ["8409.10"])
+    assert sync["writes"][-1] == ({"8402.10", "8403.10", "9306.30"}, ["8409.10"])
+    assert sync["posts"][-1]["weights"] == {"8402.10": 2.5, "9306.30": 2.5}
+    assert sync["posts"][-1]["removed"] == ["8409.10"] and result["risk_svc_push"] == "delta"
+
+
+def test_failed_write_forces_full_upsert_next_cycle(sync):
+    sync["run"]()
+    sync["db_down"] = True
+    sync["tariffs"][0]["risk_weight"] = 1.05
+    failed = sync["run"]()
+    assert failed["status"] == "synced" and not failed["db_written"]
+
+    sync["db_down"] = False
+    retried = sync["run"]()  # same fetch: the hash did not advance
+    assert retried["status"] == "synced" and retried["rows_written"] == 10
+    assert len(sync["writes"][-1][0]) == 10
+    assert sync["run"]()["status"] == "unchanged"
+
+
+def test_conflict_from_risk_svc_triggers_full_replace(sync):
+    sync["run"]()
+    sync["risk"]["source"] = None  # risk-svc restarted with its seed weights
+    sync["tariffs"][1]["risk_weight"] = 1.9
+
+    result = sync["run"]()
+    delta, full = sync["posts"][-2:]
+    assert delta["base_hash"] and "replace" not in delta
+    assert full["replace"] is True and len(full["weights"]) == 10
+    assert result["risk_svc_push"] == "full"
+
+
+def test_failed_push_does_not_advance_hash(sync):
+    sync["risk"]["status"] = 503
+    first = sync["run"]()
+    assert first["risk_svc_push"] == "failed" and not first["risk_svc_notified"]
+
+    del sync["risk"]["status"]
+    retried = sync["run"]()
+    assert retried["status"] == "synced" and retried["risk_svc_push"] == "full"
+    assert sync["run"]()["status"] == "unchanged"
+
+
+def test_failed_fetch_or_mass_removal_changes_nothing(sync, monkeypatch):
+    sync["run"]()
+    writes, posts = len(sync["writes"]), len(sync["posts"])
+
+    sync["tariffs"] = sync["tariffs"][:2]  # e.g. a truncated feed
+    rejected = sync["run"]()
+    assert rejected["status"] == "rejected" and rejected["removed"] == 8
+    assert len(main._current_weights) == 10
+
+    import httpx
+
+    async def unreachable(*args, **kwargs):
+        raise httpx.ConnectError("CBIC unreachable")
+
+    monkeypatch.setattr(httpx.AsyncClient, "get", unreachable)
+    monkeypatch.setattr(main, "_fetch_cbic_tariffs", _fetch_cbic_tariffs)
+    monkeypatch.setattr(main, "CBIC_API_KEY", "key")
+    assert sync["run"]()["status"] == "no_data"
+    assert (len(sync["writes"]), len(sync["posts"])) == (writes, posts)
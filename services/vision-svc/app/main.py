@@ -16,8 +16,10 @@ import sys, os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
 try:
     from metrics import get_metrics_route, setup_metrics as _setup_metrics
+    from tracing import span
     _HAS_METRICS = True
 except ImportError:
+    from contextlib import nullcontext as span
     _HAS_METRICS = False
 
 logging.basicConfig(level=logging.INFO)
@@ -101,8 +103,9 @@ async def scan_image_file(file: UploadFile = File(...)):
 
         try:
             import cv2
-            processed_image = preprocess_xray(file_path)
-            cv2.imwrite(file_path, processed_image)
+            with span("preprocess"):
+                processed_image = preprocess_xray(file_path)
+                cv2.imwrite(file_path, processed_image)
             logger.info(f"Preprocessing successful for {filename}")
         except Exception as e:
             logger.error(f"Preprocessing failed: {e}")
@@ -112,11 +115,12 @@ async def scan_image_file(file: UploadFile = File(...)):
             logger.warning(f"Custom model not found at {MODEL_PATH}. Using standard yolov8n.pt for demonstration.")
             model_to_use = "yolov8n.pt"
 
-        result = run_inference(
-            model_path=model_to_use,
-            image_path=file_path,
-            conf_thres=0.25
-        )
+        with span("inference"):
+            result = run_inference(
+                model_path=model_to_use,
+                image_path=file_path,
+                conf_thres=0.25
+            )
 
         if "error" in result:
             raise HTTPException(status_code=500, detail=result["error"])